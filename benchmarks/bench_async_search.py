@@ -0,0 +1,111 @@
+"""
+Benchmark des recherches RAG concurrentes dans une boucle d'événements.
+
+Simule N sessions vocales qui interrogent le RAG en même temps depuis un même worker
+API, et compare :
+- "sync"  : `QdrantRAGService.search` appelé directement dans une coroutine (ce que
+            faisaient les routes `async def`) : les requêtes passent une par une
+- "async" : `AsyncQdrantRAGService.search` (AsyncQdrantClient + embeddings asynchrones)
+
+Mesure le temps total, la latence p50/p95 par requête et le retard maximal d'un
+« battement » de 10 ms de la boucle (blocage ressenti par les autres connexions).
+
+Usage :
+    python benchmarks/bench_async_search.py [--concurrency 32] [--rounds 3] [--no-cache]
+
+Nécessite un serveur Qdrant (QDRANT_URL ou QDRANT_HOST) avec une collection indexée,
+et OPENAI_API_KEY. Avec --no-cache, les requêtes sont rendues uniques pour mesurer
+l'appel d'embedding réel.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from context.async_qdrant_service import AsyncQdrantRAGService
+from context.qdrant_service import QdrantRAGService
+from context.vector_store import MODE_REMOTE, VectorStoreConfig
+
+QUERIES = [
+    "budget marketing de l'année",
+    "objectifs de la stratégie produit",
+    "risques identifiés par l'équipe technique",
+    "prévisions de chiffre d'affaires",
+    "plan de recrutement",
+    "retours clients sur la dernière version",
+]
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    """Retard d'un réveil périodique de 10 ms (réactivité de la boucle)."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+async def run(label: str, search, concurrency: int, unique: bool) -> None:
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop, lags))
+
+    async def one(i: int) -> None:
+        query = QUERIES[i % len(QUERIES)] + (f" {uuid.uuid4().hex[:6]}" if unique else "")
+        started = time.perf_counter()
+        await search(query)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+
+    latencies.sort()
+    print(
+        f"{label:<6} | {elapsed * 1e3:>8.0f} ms | {statistics.median(latencies) * 1e3:>7.0f} ms | "
+        f"{latencies[int(0.95 * (len(latencies) - 1))] * 1e3:>7.0f} ms | {max(lags, default=0) * 1e3:>9.0f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="Recherches simultanées")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--no-cache", action="store_true", help="Requêtes uniques (embeddings non cachés)")
+    args = parser.parse_args()
+
+    config = VectorStoreConfig.from_env()
+    if config.mode != MODE_REMOTE:
+        print("⚠️ Serveur Qdrant requis (QDRANT_URL ou QDRANT_HOST) : pas de client asynchrone en mode embarqué")
+        return
+
+    service = QdrantRAGService(store_config=config)
+    async_service = AsyncQdrantRAGService(service)
+
+    async def sync_search(query: str):
+        return service.search(query, top_k=3)
+
+    async def async_search(query: str):
+        return await async_service.search(query, top_k=3)
+
+    print(f"\n{args.concurrency} recherches concurrentes, {args.rounds} tours\n")
+    print(f"{'Mode':<6} | {'Total':>11} | {'p50':>10} | {'p95':>10} | {'Blocage max':>12}")
+    print("-" * 62)
+    try:
+        for _ in range(args.rounds):
+            await run("sync", sync_search, args.concurrency, args.no_cache)
+            await run("async", async_search, args.concurrency, args.no_cache)
+    finally:
+        await async_service.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
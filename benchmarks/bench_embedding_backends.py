@@ -0,0 +1,110 @@
+"""
+Benchmark des backends d'embeddings (OpenAI vs modèle local ONNX sur CPU).
+
+Mesure, sans cache, sur la machine courante :
+- la latence d'une requête (p50 / p95), celle que subit chaque recherche RAG
+- le débit d'ingestion (chunks/s) sur des chunks de ~1000 caractères,
+  avec plusieurs nombres de threads pour le backend local
+
+Usage :
+    python benchmarks/bench_embedding_backends.py [--chunks 256] [--queries 30]
+
+Le backend OpenAI nécessite OPENAI_API_KEY ; le backend local nécessite fastembed
+(le modèle est téléchargé au premier lancement dans EMBEDDING_CACHE_DIR).
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from context.embedding_backends import BACKEND_LOCAL, BACKEND_OPENAI, LocalEmbeddings, create_embedding_backend
+
+WORDS = (
+    "stratégie marché client produit budget croissance équipe objectif innovation risque "
+    "données plateforme lancement partenariat trimestre marge acquisition rétention prix "
+    "concurrence roadmap architecture sécurité déploiement performance utilisateurs"
+).split()
+
+
+def synthetic_texts(count: int, length: int, seed: int) -> list:
+    """Textes pseudo-aléatoires (distincts) d'environ `length` caractères."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        words = [f"#{seed}-{i}"]
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(rng.choice(WORDS))
+        texts.append(" ".join(words))
+    return texts
+
+
+def query_latency(embeddings, queries: list) -> tuple:
+    """Latences p50 / p95 d'embed_query (secondes)."""
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        embeddings.embed_query(query)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+
+def throughput(embeddings, chunks: list) -> float:
+    """Chunks embarqués par seconde (embed_documents en un appel)."""
+    started = time.perf_counter()
+    embeddings.embed_documents(chunks)
+    return len(chunks) / (time.perf_counter() - started)
+
+
+def print_row(label: str, dimension: int, p50: float, p95: float, rate: float) -> None:
+    print(f"{label:<28} | {dimension:>5} | {p50 * 1e3:>7.1f} ms | {p95 * 1e3:>7.1f} ms | {rate:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=256, help="Chunks pour la mesure de débit")
+    parser.add_argument("--queries", type=int, default=30, help="Requêtes pour la mesure de latence")
+    args = parser.parse_args()
+
+    queries = synthetic_texts(args.queries, 80, seed=1)
+    chunks = synthetic_texts(args.chunks, 1000, seed=2)
+
+    print(f"CPU : {os.cpu_count()} cœurs — {args.queries} requêtes, {args.chunks} chunks de ~1000 caractères\n")
+    print(f"{'Backend':<28} | {'Dim':>5} | {'p50 req.':>10} | {'p95 req.':>10} | {'chunks/s':>9}")
+    print("-" * 76)
+
+    if os.getenv("OPENAI_API_KEY"):
+        backend = create_embedding_backend(BACKEND_OPENAI)
+        p50, p95 = query_latency(backend.embeddings, queries)
+        print_row(f"openai {backend.model}", backend.dimension, p50, p95, throughput(backend.embeddings, chunks))
+    else:
+        print("openai : OPENAI_API_KEY absente, ignoré")
+
+    try:
+        backend = create_embedding_backend(BACKEND_LOCAL)
+    except ImportError as e:
+        print(f"local : {e}")
+        return
+
+    # Pré-chauffage (allocation des sessions ONNX)
+    backend.embeddings.embed_documents(chunks[:8])
+
+    p50, p95 = query_latency(backend.embeddings, queries)
+    for threads in sorted({1, 2, 4, backend.embeddings.threads}):
+        embeddings = backend.embeddings if threads == backend.embeddings.threads else LocalEmbeddings(
+            model_name=backend.model.split("/", 1)[1], threads=threads
+        )
+        print_row(f"local ({threads} thread{'s' if threads > 1 else ''})", backend.dimension,
+                  p50, p95, throughput(embeddings, chunks))
+
+    print(f"\nModèle local : {backend.model}")
+
+
+if __name__ == "__main__":
+    main()
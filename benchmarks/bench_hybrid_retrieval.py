@@ -0,0 +1,175 @@
+"""
+Benchmark de la recherche dense vs hybride (dense + BM25, fusion RRF).
+
+Indexe un corpus dans une collection Qdrant en mémoire, puis mesure pour chaque mode
+le rappel@k, le MRR et la latence de `search`, sur deux familles de requêtes tirées
+des chunks du corpus :
+- "termes exacts" : les termes les plus rares du chunk (noms de produits, sigles, chiffres)
+- "phrase"        : la première phrase du chunk (formulation naturelle)
+
+Un fichier de requêtes annotées peut compléter le jeu (JSONL : {"query": ..., "doc_id": ...}).
+
+Usage :
+    python benchmarks/bench_hybrid_retrieval.py [corpus_dir] [--queries 50] [--top-k 5]
+                                                [--queries-file requetes.jsonl]
+
+Nécessite OPENAI_API_KEY pour les embeddings (mis en cache : les relances sont gratuites).
+Sans clé, seule la latence d'encodage BM25 (locale) est mesurée.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import timeit
+from collections import Counter
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from context.sparse import BM25SparseEncoder, tokenize
+
+
+def bench_sparse_encoding(encoder: BM25SparseEncoder) -> None:
+    """Latence de l'encodage BM25 local (requête et chunk)."""
+    query = "Quel est le budget marketing 2024 du produit NovaX pour la région EMEA ?"
+    chunk = (query + " ") * 40
+
+    query_time = min(timeit.repeat(lambda: encoder.encode_query(query), number=2_000, repeat=3)) / 2_000
+    chunk_time = min(timeit.repeat(lambda: encoder.encode_document(chunk), number=200, repeat=3)) / 200
+
+    print("Encodage BM25 local (sans réseau)\n")
+    print(f"  requête (~15 mots)  : {query_time * 1e6:8.1f} µs")
+    print(f"  chunk (~1000 car.)  : {chunk_time * 1e6:8.1f} µs\n")
+
+
+def load_chunks(service) -> list:
+    """Tous les chunks indexés (id, doc_id, texte)."""
+    chunks, offset = [], None
+    while True:
+        points, offset = service.client.scroll(
+            collection_name=service.collection_name, limit=1000, offset=offset, with_payload=True
+        )
+        chunks.extend((str(p.id), p.payload["doc_id"], p.payload["text"]) for p in points)
+        if offset is None:
+            return chunks
+
+
+def build_queries(chunks: list, count: int, seed: int) -> list:
+    """Requêtes synthétiques : (famille, requête, ids pertinents)."""
+    document_frequency = Counter()
+    for _, _, text in chunks:
+        document_frequency.update(set(tokenize(text)))
+
+    rng = random.Random(seed)
+    queries = []
+    for point_id, _, text in rng.sample(chunks, min(count, len(chunks))):
+        rare_terms = sorted(set(tokenize(text)), key=lambda token: (document_frequency[token], token))[:3]
+        if rare_terms:
+            queries.append(("termes exacts", " ".join(rare_terms), {point_id}))
+
+        sentence = re.split(r"(?<=[.!?])\s+", text.strip())[0][:200]
+        if len(sentence.split()) >= 4:
+            queries.append(("phrase", sentence, {point_id}))
+
+    return queries
+
+
+def load_annotated_queries(path: str, chunks: list) -> list:
+    """Requêtes annotées : pertinent = tout chunk du document attendu."""
+    by_doc = {}
+    for point_id, doc_id, _ in chunks:
+        by_doc.setdefault(doc_id, set()).add(point_id)
+
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                queries.append(("annotées", item["query"], by_doc.get(item["doc_id"], set())))
+    return queries
+
+
+def evaluate(service, queries: list, mode: str, top_k: int) -> dict:
+    """Rappel@k, MRR et latences par famille de requêtes."""
+    stats = {}
+    for family, query, relevant in queries:
+        started = time.perf_counter()
+        results = service.search(query, top_k=top_k, mode=mode)
+        latency = time.perf_counter() - started
+
+        ranks = [rank for rank, result in enumerate(results, 1) if result["id"] in relevant]
+        entry = stats.setdefault(family, {"hits": 0, "rr": 0.0, "n": 0, "latencies": []})
+        entry["n"] += 1
+        entry["hits"] += bool(ranks)
+        entry["rr"] += 1 / ranks[0] if ranks else 0.0
+        entry["latencies"].append(latency)
+    return stats
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus_dir", nargs="?", default="data/uploads")
+    parser.add_argument("--queries", type=int, default=50, help="Chunks tirés pour les requêtes synthétiques")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries-file", help="Requêtes annotées (JSONL)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    bench_sparse_encoding(BM25SparseEncoder())
+
+    if not os.getenv("OPENAI_API_KEY"):
+        print("ℹ️  OPENAI_API_KEY absente : comparaison dense / hybride ignorée")
+        return
+
+    files = sorted(
+        os.path.join(args.corpus_dir, name) for name in os.listdir(args.corpus_dir)
+        if os.path.isfile(os.path.join(args.corpus_dir, name))
+    )
+    if not files:
+        print(f"⚠️ Aucun document dans {args.corpus_dir}")
+        return
+
+    from context.qdrant_service import QdrantRAGService, SEARCH_DENSE, SEARCH_HYBRID
+    from context.vector_store import VectorStoreConfig, MODE_MEMORY
+
+    service = QdrantRAGService(collection_name="bench-hybrid", store_config=VectorStoreConfig(mode=MODE_MEMORY))
+    for path in files:
+        service.index_file(path, doc_id=os.path.basename(path))
+
+    chunks = load_chunks(service)
+    queries = build_queries(chunks, args.queries, args.seed)
+    if args.queries_file:
+        queries += load_annotated_queries(args.queries_file, chunks)
+
+    # Pré-chauffage : les embeddings de requêtes passent en cache, la latence mesurée
+    # est celle de la recherche elle-même (Qdrant + encodage BM25)
+    for _, query, _ in queries:
+        service.embeddings.embed_query(query)
+
+    print(f"Corpus : {len(files)} fichiers, {len(chunks)} chunks, {len(queries)} requêtes, top_k={args.top_k}\n")
+    print(f"{'Famille':<14} | {'Mode':<7} | {'Rappel@k':>8} | {'MRR':>6} | {'p50':>8} | {'p95':>8}")
+    print("-" * 66)
+
+    results = {mode: evaluate(service, queries, mode, args.top_k) for mode in (SEARCH_DENSE, SEARCH_HYBRID)}
+    for family in dict.fromkeys(family for family, _, _ in queries):
+        for mode, stats in results.items():
+            entry = stats[family]
+            print(
+                f"{family:<14} | {mode:<7} | {entry['hits'] / entry['n']:>8.2%} | {entry['rr'] / entry['n']:>6.3f} | "
+                f"{statistics.median(entry['latencies']) * 1e3:>5.1f} ms | "
+                f"{percentile(entry['latencies'], 0.95) * 1e3:>5.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Micro-benchmark du routage par mots-clés.
+
+Compare l'ancienne approche (un `any(kw in text)` par liste, sur tout le contexte) au
+moteur `KeywordEngine`, qui compile toutes les listes en une seule regex et parcourt
+le texte une fois :
+- sélection de l'agent (`first_match`, même ordre de priorité, tout le contexte)
+- score de toutes les catégories (`scan`, contre un `str.count` par mot-clé), avec la
+  configuration actuelle puis avec beaucoup plus de mots-clés
+
+La fenêtre ROUTING_CONTEXT_CHARS (optionnelle, désactivée par défaut) est mesurée à
+part : elle réduit le texte examiné, ce n'est pas un gain du matcher.
+
+Usage : python benchmarks/bench_keyword_router.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from agents.config import AGENTS_CONFIG, ROUTING_PRIORITY, CONSENSUS_INDICATORS, CONSENSUS_THRESHOLD
+from agents.keywords import KeywordEngine
+
+
+KEYWORD_LISTS = {
+    agent_id: list(AGENTS_CONFIG[agent_id]["keywords"]) for agent_id in ROUTING_PRIORITY
+}
+
+FILLER = (
+    "nous devons avancer sur le projet et clarifier les prochaines étapes avec l'équipe "
+    "afin de préparer la présentation au comité la semaine prochaine "
+)
+
+# Fenêtre mesurée à titre indicatif (ROUTING_CONTEXT_CHARS)
+WINDOW = 4000
+
+
+def legacy_selection(text: str) -> str:
+    """Ancienne approche : un any() par liste, dans l'ordre tech > strategie > creatif."""
+    text_lower = text.lower()
+    for agent_id, keywords in KEYWORD_LISTS.items():
+        if any(kw in text_lower for kw in keywords):
+            return agent_id
+    return None
+
+
+def legacy_scores(lists, text: str):
+    """Score de toutes les catégories avec un str.count par mot-clé."""
+    text_lower = text.lower()
+    return {category: sum(text_lower.count(kw) for kw in keywords) for category, keywords in lists.items()}
+
+
+def bench(func, number: int) -> float:
+    """Temps moyen d'un appel (meilleur de 3 séries), en secondes."""
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def build_context(size: int, seed: int = 42, keyword_rate: float = 0.05) -> str:
+    """Construit un contexte de `size` caractères avec quelques mots-clés dispersés."""
+    rng = random.Random(seed)
+    all_keywords = [kw for keywords in KEYWORD_LISTS.values() for kw in keywords]
+    parts = []
+    total = 0
+    while total < size:
+        chunk = FILLER if rng.random() > keyword_rate else f" {rng.choice(all_keywords)} "
+        parts.append(chunk)
+        total += len(chunk)
+    return "".join(parts)[:size]
+
+
+def synthetic_lists(count: int, seed: int = 7):
+    """Trois catégories de `count` mots-clés synthétiques au total."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyzéè"
+    keywords = {"".join(rng.choice(letters) for _ in range(rng.randint(5, 12))) for _ in range(count)}
+    keywords = sorted(keywords)
+    return {f"cat{i}": keywords[i::3] for i in range(3)}
+
+
+def check_equivalence(engine: KeywordEngine, samples: int = 200) -> None:
+    """Vérifie que le moteur choisit le même agent que l'ancienne approche."""
+    for seed in range(samples):
+        text = build_context(2_000, seed=seed, keyword_rate=0.01)
+        assert legacy_selection(text) == engine.first_match(text, ROUTING_PRIORITY), seed
+
+    consensus = KeywordEngine.for_consensus()
+    for text in ["D'accord, allons-y !", "Je ne suis pas convaincu.", "Google", "validé", "ok, go"]:
+        legacy = any(kw in text.lower() for kw in CONSENSUS_INDICATORS)
+        assert legacy == (consensus.scores(text)["consensus"] > 0), text
+
+
+def main():
+    engine = KeywordEngine.from_agents_config()
+    check_equivalence(engine)
+    print("✅ Même agent choisi que l'ancienne approche (tout le contexte)\n")
+
+    consensus = KeywordEngine.for_consensus()
+    print(f"Consensus (seuil {CONSENSUS_THRESHOLD}) : un indicateur faible seul ne suffit plus")
+    for text in ["Google Docs", "ok", "ok, go", "d'accord"]:
+        score = consensus.scores(text)["consensus"]
+        print(f"  {text!r:<14} score {score:.1f} -> {'positif' if score >= CONSENSUS_THRESHOLD else 'neutre'}")
+    print()
+
+    print("Sélection de l'agent, tout le contexte (mots-clés dispersés / aucun mot-clé)\n")
+    print(f"{'Taille':>10} | {'Cas':>10} | {'any() ancien':>12} | {'moteur':>10} | "
+          f"{'fenêtre ' + str(WINDOW):>13}")
+    print("-" * 68)
+
+    for size in (1_000, 10_000, 100_000, 1_000_000):
+        number = max(1, 2_000_000 // size)
+        cases = {
+            "mots-clés": build_context(size),
+            "aucun": (FILLER * (size // len(FILLER) + 1))[:size],
+        }
+        for case, text in cases.items():
+            legacy_time = bench(lambda: legacy_selection(text), number)
+            engine_time = bench(lambda: engine.first_match(text, ROUTING_PRIORITY), number)
+            window_time = bench(lambda: engine.first_match(text, ROUTING_PRIORITY, window=WINDOW), number)
+            print(
+                f"{size:>10,} | {case:>10} | {legacy_time * 1e3:>9.3f} ms | {engine_time * 1e3:>7.3f} ms | "
+                f"{window_time * 1e3:>10.3f} ms"
+            )
+
+    print("\nScore de toutes les catégories (100 000 caractères)\n")
+    print(f"{'Mots-clés':>14} | {'str.count ancien':>16} | {'moteur (1 passage)':>18}")
+    print("-" * 56)
+
+    text = build_context(100_000)
+    for label, lists in (("config", KEYWORD_LISTS), ("300", synthetic_lists(300)), ("1 500", synthetic_lists(1_500))):
+        lists_engine = KeywordEngine(lists)
+        count = sum(len(keywords) for keywords in lists.values())
+        legacy_time = bench(lambda: legacy_scores(lists, text), 5)
+        engine_time = bench(lambda: lists_engine.scan(text), 5)
+        print(f"{label + f' ({count})':>14} | {legacy_time * 1e3:>13.2f} ms | {engine_time * 1e3:>15.2f} ms")
+
+    print("\nNotes :")
+    print("- Avec quelques dizaines de mots-clés, la recherche de sous-chaîne C de CPython reste")
+    print("  compétitive ; le coût du passage unique dépend peu du nombre de mots-clés.")
+    print("- La fenêtre n'est qu'une option (ROUTING_CONTEXT_CHARS) : elle ignore la tête du")
+    print("  prompt (objectif, contexte organisationnel).")
+
+
+if __name__ == "__main__":
+    main()
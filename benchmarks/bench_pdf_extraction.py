@@ -0,0 +1,145 @@
+"""
+Benchmark de l'extraction des pages PDF dans les deux types de worker Celery.
+
+`iter_pdf_pages` est exécuté comme dans un worker :
+- "prefork" : dans un processus enfant démonique (comme les enfants du pool prefork,
+  qui ne peuvent pas créer de processus) ; le pool d'extraction échoue à démarrer et
+  l'extraction reste séquentielle
+- "threads" : dans un thread du processus principal (worker `--pool=threads`, celui de
+  la file d'indexation) ; les pages sont extraites sur le pool de processus
+
+Chaque mesure part d'un processus neuf (pool non encore créé) ; la création du pool
+est comptée dans la première extraction et exclue des suivantes.
+
+Usage :
+    python benchmarks/bench_pdf_extraction.py [--pdf fichier.pdf] [--pages 200] [--repeat 3]
+
+Sans --pdf, un PDF synthétique de --pages pages de texte est généré.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+LINE = "Budget marketing, stratégie produit, recrutement et feuille de route du trimestre."
+
+
+def build_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """Écrit un PDF de texte minimal (police Helvetica standard, sans dépendance)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = "".join(f"({LINE} {page}-{line}) Tj T* " for line in range(lines_per_page))
+        stream = f"BT /F1 9 Tf 12 TL 40 800 Td {text}ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    body, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def extract(pdf_path: str, repeat: int) -> dict:
+    """Extrait le PDF `repeat` fois ; durées et usage du pool de processus."""
+    from context import ingestion
+
+    timings = []
+    pages = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pages = sum(1 for _ in ingestion.iter_pdf_pages(pdf_path))
+        timings.append(time.perf_counter() - started)
+
+    pool = ingestion._parse_pool
+    if pool is not None:
+        # Sinon la sortie du processus de mesure attend les processus du pool
+        pool.shutdown()
+    return {"pages": pages, "first": timings[0], "best": min(timings[1:] or timings), "pool": pool is not None}
+
+
+def _extract_in_process(pdf_path: str, repeat: int, results: "multiprocessing.Queue") -> None:
+    results.put(extract(pdf_path, repeat))
+
+
+def _extract_in_thread(pdf_path: str, repeat: int, results: "multiprocessing.Queue") -> None:
+    thread = threading.Thread(target=_extract_in_process, args=(pdf_path, repeat, results))
+    thread.start()
+    thread.join()
+
+
+def run_prefork(pdf_path: str, repeat: int) -> dict:
+    """Extraction dans un processus enfant démonique (enfant d'un worker prefork)."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_extract_in_process, args=(pdf_path, repeat, results), daemon=True)
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def run_threads(pdf_path: str, repeat: int) -> dict:
+    """Extraction dans un thread d'un processus neuf (worker --pool=threads)."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_extract_in_thread, args=(pdf_path, repeat, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", help="PDF à extraire (défaut: PDF synthétique)")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from context.ingestion import PARSE_WORKERS
+
+    directory = None
+    pdf_path = args.pdf
+    if pdf_path is None:
+        directory = tempfile.mkdtemp(prefix="bench-pdf-")
+        pdf_path = os.path.join(directory, "synthetic.pdf")
+        build_pdf(pdf_path, args.pages)
+
+    try:
+        print(f"\n{pdf_path} — INGEST_PARSE_WORKERS={PARSE_WORKERS}\n")
+        print(f"{'Worker':<8} | {'Pool':>5} | {'Pages':>6} | {'1re extraction':>14} | "
+              f"{'Meilleure':>10} | {'Pages/s':>8}")
+        print("-" * 68)
+
+        for name, runner in (("prefork", run_prefork), ("threads", run_threads)):
+            result = runner(pdf_path, args.repeat)
+            print(
+                f"{name:<8} | {'oui' if result['pool'] else 'non':>5} | {result['pages']:>6} | "
+                f"{result['first']:>12.2f}s | {result['best']:>8.2f}s | "
+                f"{result['pages'] / result['best']:>8.0f}"
+            )
+    finally:
+        if directory:
+            os.remove(pdf_path)
+            os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    main()
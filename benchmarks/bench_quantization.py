@@ -0,0 +1,163 @@
+"""
+Benchmark de la quantification des vecteurs (aucune / scalar int8 / binary).
+
+Copie les vecteurs d'une collection existante (ou des vecteurs synthétiques) dans des
+collections temporaires, une par mode, puis mesure contre la recherche exacte en float32 :
+- le rappel@k, avec et sans rescoring, pour plusieurs facteurs de sur-échantillonnage
+- la latence p50 d'une recherche
+- la RAM estimée des vecteurs interrogés
+
+Usage :
+    python benchmarks/bench_quantization.py [--source-collection debatehub-context]
+                                            [--limit 20000] [--queries 100] [--top-k 5]
+    python benchmarks/bench_quantization.py --synthetic 20000
+
+Nécessite un serveur Qdrant (QDRANT_URL ou QDRANT_HOST) : le mode local embarqué
+ignore la quantification. Les vecteurs synthétiques (aléatoires) sont un cas
+défavorable : le rappel mesuré sur le vrai corpus est meilleur.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from qdrant_client.models import Distance, PointStruct, SearchParams, VectorParams
+
+from context.quantization import (
+    QUANTIZATION_BINARY,
+    QUANTIZATION_NONE,
+    QUANTIZATION_SCALAR,
+    QuantizationSettings,
+    estimate_vector_memory
+)
+from context.vector_store import MODE_REMOTE, VectorStoreConfig, create_qdrant_client
+
+
+def load_vectors(client, collection: str, limit: int) -> np.ndarray:
+    """Vecteurs denses d'une collection existante."""
+    vectors, offset = [], None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            collection_name=collection, limit=min(1000, limit - len(vectors)), offset=offset,
+            with_payload=False, with_vectors=True
+        )
+        for point in points:
+            vector = point.vector.get("", None) if isinstance(point.vector, dict) else point.vector
+            if vector is not None:
+                vectors.append(vector)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def create_copy(client, name: str, vectors: np.ndarray, settings: QuantizationSettings) -> None:
+    """Collection temporaire avec la quantification demandée."""
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE,
+                                    on_disk=settings.enabled or None),
+        quantization_config=settings.quantization_config(),
+    )
+    for start in range(0, len(vectors), 512):
+        client.upsert(
+            collection_name=name,
+            points=[PointStruct(id=start + i, vector=vector.tolist())
+                    for i, vector in enumerate(vectors[start:start + 512])],
+            wait=True
+        )
+
+
+def wait_until_ready(client, name: str, timeout: float = 300) -> None:
+    """Attend la fin de l'optimisation (construction des vecteurs quantifiés)."""
+    started = time.monotonic()
+    while client.get_collection(name).status != "green" and time.monotonic() - started < timeout:
+        time.sleep(1)
+
+
+def search_ids(client, name: str, query: np.ndarray, top_k: int, params) -> tuple:
+    started = time.perf_counter()
+    response = client.query_points(collection_name=name, query=query.tolist(), limit=top_k, search_params=params)
+    return [point.id for point in response.points], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source-collection", default="debatehub-context")
+    parser.add_argument("--limit", type=int, default=20_000, help="Vecteurs copiés au maximum")
+    parser.add_argument("--synthetic", type=int, default=0, help="Nombre de vecteurs aléatoires (dimension 1536)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    config = VectorStoreConfig.from_env()
+    if config.mode != MODE_REMOTE:
+        print("⚠️ Serveur Qdrant requis (QDRANT_URL ou QDRANT_HOST) : le mode local ignore la quantification")
+        return
+    client = create_qdrant_client(config)
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        vectors = rng.standard_normal((args.synthetic, 1536), dtype=np.float32)
+        source = f"{args.synthetic} vecteurs synthétiques"
+    else:
+        vectors = load_vectors(client, args.source_collection, args.limit)
+        source = f"'{args.source_collection}' ({len(vectors)} vecteurs)"
+    if len(vectors) <= args.queries:
+        print(f"⚠️ Pas assez de vecteurs dans {source}")
+        return
+
+    # Requêtes : vecteurs tenus à l'écart de l'index, légèrement bruités
+    queries = vectors[:args.queries] + 0.05 * rng.standard_normal(vectors[:args.queries].shape, dtype=np.float32)
+    vectors = vectors[args.queries:]
+    print(f"Source : {source}, dimension {vectors.shape[1]}, {len(queries)} requêtes, top_k={args.top_k}\n")
+
+    names = {}
+    for mode in (QUANTIZATION_NONE, QUANTIZATION_SCALAR, QUANTIZATION_BINARY):
+        names[mode] = f"bench-quantization-{mode}"
+        create_copy(client, names[mode], vectors, QuantizationSettings(mode=mode))
+        wait_until_ready(client, names[mode])
+
+    exact = SearchParams(exact=True)
+    truth = [set(search_ids(client, names[QUANTIZATION_NONE], query, args.top_k, exact)[0]) for query in queries]
+
+    print(f"{'Mode':<8} | {'Rescore':<7} | {'Oversampling':>12} | {'Rappel@k':>8} | {'p50':>8} | {'RAM vecteurs':>12}")
+    print("-" * 72)
+
+    runs = [(QUANTIZATION_NONE, True, None)] + [
+        (mode, rescore, oversampling)
+        for mode in (QUANTIZATION_SCALAR, QUANTIZATION_BINARY)
+        for rescore in (False, True)
+        for oversampling in (1.0, 2.0, 4.0)
+        if rescore or oversampling == 1.0
+    ]
+    try:
+        for mode, rescore, oversampling in runs:
+            settings = QuantizationSettings(mode=mode, rescore=rescore, oversampling=oversampling)
+            hits, latencies = 0, []
+            for query, expected in zip(queries, truth):
+                ids, latency = search_ids(client, names[mode], query, args.top_k, settings.search_params())
+                hits += len(expected.intersection(ids))
+                latencies.append(latency)
+
+            memory = estimate_vector_memory(len(vectors), vectors.shape[1], mode)
+            print(
+                f"{mode:<8} | {str(rescore):<7} | {oversampling or '-':>12} | "
+                f"{hits / (len(queries) * args.top_k):>8.2%} | {statistics.median(latencies) * 1e3:>5.1f} ms | "
+                f"{memory / 2 ** 20:>9.1f} Mo"
+            )
+    finally:
+        for name in names.values():
+            client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
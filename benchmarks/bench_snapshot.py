@@ -0,0 +1,90 @@
+"""
+Benchmark du démarrage à chaud depuis un instantané de l'index.
+
+Remplit une collection en mémoire avec N points synthétiques (vecteurs aléatoires,
+texte court), exporte un instantané, puis l'importe dans un nouveau service en
+mémoire (redémarrage simulé). Mesure la durée de l'export, de l'import, le débit et
+la taille de l'instantané sur disque ; l'import ne fait aucun appel d'embedding.
+
+Usage :
+    python benchmarks/bench_snapshot.py [--points 50000] [--parallel 1]
+
+Le service est construit avec le backend d'embeddings configuré (EMBEDDING_BACKEND) ;
+il n'est jamais appelé.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from qdrant_client.models import PointStruct
+
+from context.qdrant_service import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, QdrantRAGService
+from context.snapshot import export_snapshot, import_snapshot
+from context.tenancy import DEFAULT_TENANT, TENANT_FIELD
+from context.vector_store import MODE_MEMORY, VectorStoreConfig
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--parallel", type=int, default=1, help="Requêtes d'upsert parallèles à l'import")
+    args = parser.parse_args()
+
+    source = QdrantRAGService(collection_name="bench-snapshot", store_config=VectorStoreConfig(mode=MODE_MEMORY))
+    rng = np.random.default_rng(0)
+
+    started = time.perf_counter()
+    for start in range(0, args.points, 1000):
+        batch = []
+        for i in range(start, min(start + 1000, args.points)):
+            text = f"Chunk synthétique {i} : budget, stratégie produit et recrutement"
+            batch.append(PointStruct(
+                id=str(uuid.uuid4()),
+                vector={
+                    DENSE_VECTOR_NAME: rng.standard_normal(source.embedding_dim, dtype=np.float32).tolist(),
+                    SPARSE_VECTOR_NAME: source.sparse_encoder.encode_document(text)
+                },
+                payload={"doc_id": f"doc-{i // 50}", TENANT_FIELD: DEFAULT_TENANT, "chunk_index": i % 50, "text": text}
+            ))
+        source.client.upsert(collection_name=source.collection_name, points=batch)
+    print(f"\n{args.points} points synthétiques ({source.embedding_dim} dimensions) "
+          f"écrits en {time.perf_counter() - started:.1f}s\n")
+
+    directory = tempfile.mkdtemp(prefix="bench-snapshot-")
+    try:
+        started = time.perf_counter()
+        path = export_snapshot(source, directory)
+        export_seconds = time.perf_counter() - started
+
+        # Redémarrage simulé : nouveau service, collection vide
+        target = QdrantRAGService(collection_name="bench-snapshot", store_config=VectorStoreConfig(mode=MODE_MEMORY))
+        started = time.perf_counter()
+        imported = import_snapshot(target, path, parallel=args.parallel)
+        import_seconds = time.perf_counter() - started
+
+        print(f"\n{'Étape':<8} | {'Durée':>8} | {'Points/s':>10}")
+        print("-" * 32)
+        print(f"{'export':<8} | {export_seconds:>7.1f}s | {args.points / export_seconds:>10.0f}")
+        print(f"{'import':<8} | {import_seconds:>7.1f}s | {imported / import_seconds:>10.0f}")
+        print(f"\nInstantané : {directory_size(path) / 2 ** 20:.1f} Mo, "
+              f"{target.client.count(collection_name=target.collection_name, exact=True).count} points importés")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
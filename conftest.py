@@ -0,0 +1,59 @@
+"""
+Fixtures partagées des tests : service RAG hors ligne (Qdrant en mémoire, embeddings
+factices déterministes, sans Redis ni clé API).
+"""
+
+import hashlib
+import os
+import re
+import sys
+
+import pytest
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+
+class FakeEmbeddings:
+    """Embeddings déterministes (sac de mots haché) : des textes proches ont des vecteurs proches."""
+
+    def __init__(self, dimension: int = 64):
+        self.dimension = dimension
+        self.embedded = 0
+
+    def _embed(self, text: str):
+        vector = [0.0] * self.dimension
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dimension] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+@pytest.fixture
+def fake_embeddings():
+    return FakeEmbeddings()
+
+
+@pytest.fixture
+def rag_service(monkeypatch, fake_embeddings):
+    """QdrantRAGService en mémoire ; chaque embedding compté dans `fake_embeddings.embedded`."""
+    monkeypatch.delenv("REDIS_URL", raising=False)
+
+    from context.embedding_backends import EmbeddingBackend
+    from context.embedding_cache import EmbeddingCache
+    from context.qdrant_service import QdrantRAGService
+    from context.vector_store import VectorStoreConfig
+
+    return QdrantRAGService(
+        store_config=VectorStoreConfig(),
+        embedding_backend=EmbeddingBackend("fake", fake_embeddings, "fake", fake_embeddings.dimension),
+        # Pas de cache d'embeddings : les ré-embeddings restent visibles
+        embedding_cache=EmbeddingCache(max_entries=0),
+        search_mode="dense",
+    )
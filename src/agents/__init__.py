@@ -3,5 +3,6 @@ Module de gestion des agents IA spécialisés.
 """
 from .config import AGENTS_CONFIG
 from .prompts import AGENTS_PROMPTS
+from .keywords import KeywordEngine, KeywordScore
 
-__all__ = ['AGENTS_CONFIG', 'AGENTS_PROMPTS']
+__all__ = ['AGENTS_CONFIG', 'AGENTS_PROMPTS', 'KeywordEngine', 'KeywordScore']
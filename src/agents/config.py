@@ -1,8 +1,14 @@
 """
 Configuration des agents IA pour le système multi-agents.
 Définit les personas, comportements et expertises de chaque agent.
+
+Configuration par variables d'environnement :
+    ROUTING_CONTEXT_CHARS   Fin du contexte examinée par le routage par mots-clés
+                            (défaut: 0 = tout le contexte)
 """
 
+import os
+
 AGENTS_CONFIG = {
     "facilitateur": {
         "name": "Facilitateur",
@@ -77,6 +83,11 @@ AGENTS_CONFIG = {
             "Identifier les risques",
             "Maximiser les opportunités",
             "Challenger les hypothèses"
+        ],
+        # Mots-clés de routage (fallback sans LLM)
+        "keywords": [
+            "business", "marché", "market", "économique", "risque", "rentabilité",
+            "stratégie", "concurrent", "roi", "revenu", "viabilité", "monetisation"
         ]
     },
 
@@ -117,6 +128,12 @@ AGENTS_CONFIG = {
             "Optimiser les choix technologiques",
             "Anticiper les contraintes",
             "Proposer des solutions concrètes"
+        ],
+        # Mots-clés de routage (fallback sans LLM)
+        "keywords": [
+            "technique", "technologie", "code", "développeur", "dev", "faisable",
+            "architecture", "stack", "api", "database", "performance", "implementation",
+            "techniquement", "programmer", "coder"
         ]
     },
 
@@ -157,10 +174,34 @@ AGENTS_CONFIG = {
             "Challenger le statu quo",
             "Centrer sur l'utilisateur",
             "Créer de la différenciation"
+        ],
+        # Mots-clés de routage (fallback sans LLM)
+        "keywords": [
+            "design", "designer", "ux", "ui", "créatif", "utilisateur", "branding",
+            "expérience", "interface", "visuel", "graphique"
         ]
     }
 }
 
+# Ordre de priorité du routage par mots-clés : le premier agent dont un mot-clé
+# apparaît est choisi
+ROUTING_PRIORITY = ["tech", "strategie", "creatif"]
+
+# Fin du contexte examinée par le routage par mots-clés, en caractères (0 = tout le
+# contexte). Optionnel : avec une fenêtre, l'objectif et le contexte organisationnel
+# en tête du prompt ne sont plus pris en compte par le routage
+ROUTING_CONTEXT_CHARS = int(os.getenv("ROUTING_CONTEXT_CHARS", "0"))
+
+# Indicateurs de consensus et leur poids : un message est "positif" si la somme
+# pondérée de ses indicateurs atteint CONSENSUS_THRESHOLD. Un indicateur faible
+# (0.5, ex. "ok", "go", aussi présents dans "token", "Google"...) ne suffit pas seul
+CONSENSUS_INDICATORS = {
+    "d'accord": 1.0, "valide": 1.0, "ok": 0.5, "parfait": 1.0, "exactement": 1.0,
+    "je suis pour": 1.0, "allons-y": 1.0, "approuvé": 1.0, "validé": 1.0,
+    "consensus": 1.0, "go": 0.5
+}
+CONSENSUS_THRESHOLD = 1.0
+
 # Reset color
 RESET_COLOR = "\033[0m"
 
@@ -0,0 +1,197 @@
+"""
+Moteur de mots-clés pour le routage de secours et la détection de consensus.
+Toutes les listes sont compilées en une seule expression régulière : un seul passage
+sur le texte trouve les mots-clés de toutes les catégories.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import AGENTS_CONFIG, CONSENSUS_INDICATORS
+
+# Liste de mots-clés (poids 1) ou {mot-clé: poids}
+Keywords = Union[Iterable[str], Dict[str, float]]
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """
+    Construit une regex factorisée par préfixes à partir d'une liste de mots-clés.
+
+    Args:
+        keywords: Mots-clés (déjà en minuscules)
+
+    Returns:
+        Motif regex équivalent à l'alternance des mots-clés, qui reconnaît le plus
+        long mot-clé possible à une position donnée
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+
+        if not branches:
+            return ""
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+
+        return f"(?:{'|'.join(branches)})" + ("?" if is_end else "")
+
+    return build(trie)
+
+
+@dataclass
+class KeywordScore:
+    """Score d'une catégorie sur un texte."""
+    score: float = 0.0
+    matches: Dict[str, int] = field(default_factory=dict)
+
+
+class KeywordEngine:
+    """
+    Matcher multi-motifs pondéré.
+
+    Les mots-clés sont factorisés en trie puis compilés en une seule regex
+    (ex. "code|coder|concurrent" -> "co(?:de(?:r)?|ncurrent)"), placée dans une
+    assertion avant (`(?=...)`) : le texte est parcouru une fois, et à chaque position
+    le plus long mot-clé qui y commence est reconnu, avec les mots-clés qui en sont
+    des préfixes. Un mot-clé est donc trouvé partout où `mot_clé in texte` est vrai,
+    y compris à l'intérieur d'un autre (ex. "technique" dans "techniquement").
+    """
+
+    def __init__(self, categories: Dict[str, Keywords]):
+        """
+        Compile les listes de mots-clés.
+
+        Args:
+            categories: {catégorie: [mot-clé] ou {mot-clé: poids}}
+        """
+        self.categories: Dict[str, Dict[str, float]] = {}
+        for category, keywords in categories.items():
+            weights = keywords if isinstance(keywords, dict) else dict.fromkeys(keywords, 1.0)
+            self.categories[category] = {keyword.lower(): weight for keyword, weight in weights.items()}
+
+        # mot-clé -> [(catégorie, poids)]
+        entries: Dict[str, List[Tuple[str, float]]] = {}
+        for category, keywords in self.categories.items():
+            for keyword, weight in keywords.items():
+                entries.setdefault(keyword, []).append((category, weight))
+
+        # Pour chaque mot-clé reconnu : les mots-clés qui commencent à la même position
+        self._credits: Dict[str, List[Tuple[str, str, float]]] = {
+            keyword: [
+                (category, prefix, weight)
+                for prefix, targets in entries.items()
+                if keyword.startswith(prefix)
+                for category, weight in targets
+            ]
+            for keyword in entries
+        }
+
+        self._pattern = re.compile(f"(?=({_trie_pattern(entries)}))") if entries else None
+
+    @classmethod
+    def from_agents_config(cls, agents_config: Dict[str, Dict] = None) -> "KeywordEngine":
+        """
+        Construit le moteur de routage depuis la clé "keywords" de la config agents.
+
+        Args:
+            agents_config: Configuration des agents (défaut: AGENTS_CONFIG)
+
+        Returns:
+            Moteur compilé
+        """
+        agents_config = agents_config if agents_config is not None else AGENTS_CONFIG
+        return cls({
+            agent_id: config["keywords"]
+            for agent_id, config in agents_config.items()
+            if config.get("keywords")
+        })
+
+    @classmethod
+    def for_consensus(cls) -> "KeywordEngine":
+        """Construit le moteur de détection de consensus (indicateurs pondérés)."""
+        return cls({"consensus": CONSENSUS_INDICATORS})
+
+    def first_match(self,
+                    text: str,
+                    priority: Iterable[str],
+                    excluded: Iterable[str] = (),
+                    window: Optional[int] = None) -> Optional[str]:
+        """
+        Première catégorie, dans l'ordre de priorité, dont un mot-clé apparaît dans le texte.
+
+        Un seul passage : il s'arrête dès qu'un mot-clé de la catégorie prioritaire
+        est trouvé.
+
+        Args:
+            text: Texte à analyser
+            priority: Catégories dans l'ordre de priorité
+            excluded: Catégories ignorées
+            window: Ne regarder que les `window` derniers caractères (défaut: tout le texte)
+
+        Returns:
+            Catégorie retenue ou None si aucun mot-clé ne correspond
+        """
+        if not text or self._pattern is None:
+            return None
+
+        excluded = set(excluded)
+        candidates = [category for category in priority if category in self.categories and category not in excluded]
+        if not candidates:
+            return None
+
+        if window:
+            text = text[-window:]
+
+        ranks = {category: rank for rank, category in enumerate(candidates)}
+        best = len(candidates)
+        for match in self._pattern.finditer(text.lower()):
+            for category, _, _ in self._credits[match.group(1)]:
+                rank = ranks.get(category, best)
+                if rank < best:
+                    best = rank
+                    if best == 0:
+                        return candidates[0]
+
+        return candidates[best] if best < len(candidates) else None
+
+    def scan(self, text: str) -> Dict[str, KeywordScore]:
+        """
+        Score toutes les catégories en un seul passage.
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            {catégorie: KeywordScore} pour chaque catégorie configurée
+        """
+        results = {category: KeywordScore() for category in self.categories}
+        if not text or self._pattern is None:
+            return results
+
+        for match in self._pattern.finditer(text.lower()):
+            for category, keyword, weight in self._credits[match.group(1)]:
+                result = results[category]
+                result.score += weight
+                result.matches[keyword] = result.matches.get(keyword, 0) + 1
+
+        return results
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Raccourci : uniquement les scores pondérés par catégorie.
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            {catégorie: score}
+        """
+        return {category: result.score for category, result in self.scan(text).items()}
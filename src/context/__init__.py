@@ -6,13 +6,18 @@ from .models import OrganizationalContext, CustomField, RAGDocument
 from .storage import ContextStorage
 
 # Service RAG Production (Qdrant)
+from .vector_store import VectorStoreConfig
 from .qdrant_service import QdrantRAGService, get_qdrant_service
+from .async_qdrant_service import AsyncQdrantRAGService, get_async_qdrant_service
 
 __all__ = [
     'OrganizationalContext',
     'CustomField',
     'RAGDocument',
     'ContextStorage',
+    'VectorStoreConfig',
     'QdrantRAGService',
     'get_qdrant_service',
+    'AsyncQdrantRAGService',
+    'get_async_qdrant_service',
 ]
@@ -0,0 +1,339 @@
+"""
+Assemblage du contexte RAG injecté dans les prompts.
+
+Les chunks se recouvrent (chunk_overlap=200) : les meilleurs résultats d'une recherche
+contiennent souvent plusieurs fois le même texte. L'assembleur, à partir des résultats
+de `search` (avec leurs vecteurs) :
+1. écarte les résultats sous le seuil de similarité (scores cosinus uniquement)
+2. écarte les quasi-doublons (cosinus entre chunks ≥ seuil)
+3. diversifie par MMR (Maximal Marginal Relevance), vectorisé
+4. fusionne les chunks adjacents d'un même document en retirant le recouvrement
+5. remplit un budget de tokens par blocs entiers, dans l'ordre de sélection du MMR
+
+Moins de tokens de prompt par tour, pour la même information.
+
+Configuration par variables d'environnement :
+    RAG_CONTEXT_MIN_SCORE      Similarité cosinus minimale (défaut: 0.7)
+    RAG_CONTEXT_DEDUP_SIM      Similarité au-delà de laquelle deux chunks sont des
+                               doublons (défaut: 0.95)
+    RAG_CONTEXT_MMR_LAMBDA     Compromis pertinence / diversité du MMR (défaut: 0.7)
+    RAG_CONTEXT_MAX_CHUNKS     Chunks retenus au maximum par le MMR (défaut: 5)
+    RAG_CONTEXT_TOKEN_BUDGET   Budget de tokens du contexte (défaut: 600)
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from monitoring import get_logger
+
+logger = get_logger("rag")
+
+HEADER = "=== DOCUMENTS DE RÉFÉRENCE PERTINENTS ===\n"
+
+# Plus long recouvrement recherché entre deux chunks consécutifs (chunk_overlap du découpage)
+MAX_OVERLAP_CHARS = 200
+
+
+def _count_tokens_approx(text: str) -> int:
+    # ~4 caractères par token en moyenne
+    return max(1, len(text) // 4)
+
+
+class LazyTokenCounter:
+    """
+    Compteur de tokens tiktoken, dont l'encodage est chargé au premier comptage.
+
+    tiktoken télécharge l'encodage à son premier chargement : hors ligne (ou sans
+    tiktoken), le compteur se rabat sur l'estimation au lieu de faire échouer la
+    construction du service.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """
+        Args:
+            encoding_name: Encodage tiktoken
+        """
+        self.encoding_name = encoding_name
+        self._count: Optional[Callable[[str], int]] = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> int:
+        if self._count is None:
+            with self._lock:
+                if self._count is None:
+                    self._count = self._load()
+        return self._count(text)
+
+    def _load(self) -> Callable[[str], int]:
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding(self.encoding_name)
+        except Exception as e:
+            logger.warning(f"Encodage tiktoken {self.encoding_name} indisponible, tokens estimés : {e}")
+            return _count_tokens_approx
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def default_token_counter() -> Callable[[str], int]:
+    """
+    Compteur de tokens : tiktoken (cl100k_base), chargé au premier comptage, sinon estimation.
+
+    Returns:
+        Fonction texte -> nombre de tokens
+    """
+    return LazyTokenCounter()
+
+
+def overlap_length(left: str, right: str, max_overlap: int = MAX_OVERLAP_CHARS) -> int:
+    """
+    Longueur du plus long suffixe de `left` qui est un préfixe de `right`.
+
+    Args:
+        left: Chunk précédent
+        right: Chunk suivant
+        max_overlap: Recouvrement maximal recherché
+
+    Returns:
+        Nombre de caractères communs (0 si aucun)
+    """
+    for size in range(min(max_overlap, len(left), len(right)), 0, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def mmr_select(relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """
+    Sélection MMR : à chaque étape, le candidat qui maximise
+    lambda * pertinence - (1 - lambda) * similarité max aux candidats déjà retenus.
+
+    Args:
+        relevance: Pertinence des candidats, normalisée dans [0, 1]
+        vectors: Vecteurs normalisés des candidats (une ligne par candidat)
+        k: Nombre de candidats à retenir
+        lambda_mult: 1 = pertinence seule, 0 = diversité seule
+
+    Returns:
+        Indices retenus, dans l'ordre de sélection
+    """
+    count = len(relevance)
+    if count == 0:
+        return []
+
+    similarity = vectors @ vectors.T
+    selected = [int(np.argmax(relevance))]
+    # Similarité de chaque candidat au plus proche des retenus
+    closest = similarity[selected[0]].copy()
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * closest
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(closest, similarity[best], out=closest)
+
+    return selected
+
+
+@dataclass
+class ContextBlock:
+    """Passage continu d'un document (un ou plusieurs chunks fusionnés)."""
+    doc_id: str
+    text: str
+    score: float
+    chunk_indexes: List[int]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class AssembledContext:
+    """Contexte prêt pour le prompt, et bilan de l'assemblage."""
+    text: str
+    blocks: List[ContextBlock]
+    tokens: int
+    stats: Dict[str, int]
+
+
+class ContextAssembler:
+    """Construit un contexte compact et diversifié à partir des résultats de recherche."""
+
+    def __init__(self,
+                 min_score: Optional[float] = None,
+                 dedup_similarity: Optional[float] = None,
+                 mmr_lambda: Optional[float] = None,
+                 token_budget: Optional[int] = None,
+                 max_chunks: Optional[int] = None,
+                 token_counter: Optional[Callable[[str], int]] = None):
+        """
+        Args:
+            min_score: Similarité cosinus minimale (défaut: RAG_CONTEXT_MIN_SCORE)
+            dedup_similarity: Seuil de quasi-doublon (défaut: RAG_CONTEXT_DEDUP_SIM)
+            mmr_lambda: Compromis pertinence / diversité (défaut: RAG_CONTEXT_MMR_LAMBDA)
+            token_budget: Budget de tokens (défaut: RAG_CONTEXT_TOKEN_BUDGET)
+            max_chunks: Chunks retenus au maximum par le MMR (défaut: RAG_CONTEXT_MAX_CHUNKS)
+            token_counter: Compteur de tokens (défaut: tiktoken, ou estimation)
+        """
+        self.min_score = min_score if min_score is not None else float(os.getenv("RAG_CONTEXT_MIN_SCORE", "0.7"))
+        self.dedup_similarity = dedup_similarity if dedup_similarity is not None else float(
+            os.getenv("RAG_CONTEXT_DEDUP_SIM", "0.95")
+        )
+        self.mmr_lambda = mmr_lambda if mmr_lambda is not None else float(os.getenv("RAG_CONTEXT_MMR_LAMBDA", "0.7"))
+        self.token_budget = token_budget or int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "600"))
+        self.max_chunks = max_chunks or int(os.getenv("RAG_CONTEXT_MAX_CHUNKS", "5"))
+        self.count_tokens = token_counter or default_token_counter()
+
+    def assemble(self,
+                 results: List[Dict[str, Any]],
+                 token_budget: Optional[int] = None,
+                 max_chunks: Optional[int] = None) -> AssembledContext:
+        """
+        Assemble le contexte.
+
+        Args:
+            results: Résultats de `search` (idéalement avec `with_vectors=True` ;
+                     sans vecteurs, ni dédoublonnage sémantique ni MMR)
+            token_budget: Budget de tokens (défaut: celui de l'assembleur)
+            max_chunks: Chunks retenus au maximum par le MMR (défaut: celui de l'assembleur)
+
+        Returns:
+            Contexte assemblé
+        """
+        budget = token_budget or self.token_budget
+        stats = {"candidates": len(results), "below_threshold": 0, "duplicates": 0,
+                 "mmr_dropped": 0, "merged": 0, "over_budget": 0}
+
+        # 1. Seuil de pertinence (les scores RRF du mode hybride sont des rangs)
+        kept = [r for r in results if r.get("score_type", "cosine") != "cosine" or r["score"] >= self.min_score]
+        stats["below_threshold"] = len(results) - len(kept)
+        if not kept:
+            return AssembledContext(text="", blocks=[], tokens=0, stats=stats)
+
+        kept.sort(key=lambda r: r["score"], reverse=True)
+        vectors = self._normalized_vectors(kept)
+
+        # 2. Quasi-doublons : on garde le mieux classé
+        if vectors is not None:
+            similarity = vectors @ vectors.T
+            unique = []
+            for i in range(len(kept)):
+                if not any(similarity[i, j] >= self.dedup_similarity for j in unique):
+                    unique.append(i)
+            stats["duplicates"] = len(kept) - len(unique)
+            kept, vectors = [kept[i] for i in unique], vectors[unique]
+        else:
+            seen, unique = set(), []
+            for result in kept:
+                key = result.get("metadata", {}).get("content_hash") or result["text"]
+                if key not in seen:
+                    seen.add(key)
+                    unique.append(result)
+            stats["duplicates"] = len(kept) - len(unique)
+            kept = unique
+
+        # 3. Diversification MMR
+        limit = max_chunks or self.max_chunks
+        if vectors is not None and len(kept) > 1:
+            scores = np.array([r["score"] for r in kept], dtype=np.float32)
+            spread = scores.max() - scores.min()
+            relevance = (scores - scores.min()) / spread if spread > 0 else np.ones_like(scores)
+            chosen = mmr_select(relevance, vectors, limit, self.mmr_lambda)
+        else:
+            chosen = list(range(min(limit, len(kept))))
+        stats["mmr_dropped"] = len(kept) - len(chosen)
+        kept = [kept[i] for i in chosen]
+
+        # 4. Fusion des chunks adjacents d'un même document (blocs dans l'ordre du MMR)
+        blocks = self._merge_adjacent(kept)
+        stats["merged"] = len(kept) - len(blocks)
+
+        # 5. Budget de tokens, par blocs entiers
+        packed, used = [], self.count_tokens(HEADER)
+        for block in blocks:
+            cost = self.count_tokens(self._render(len(packed) + 1, block))
+            if used + cost <= budget:
+                packed.append(block)
+                used += cost
+            elif not packed:
+                # Le premier bloc seul dépasse le budget : tronqué en fin de phrase
+                overhead = cost - self.count_tokens(block.text)
+                block.text = self._truncate(block.text, budget - used - overhead)
+                packed.append(block)
+                used += self.count_tokens(self._render(1, block))
+            else:
+                stats["over_budget"] += 1
+
+        text = "\n".join([HEADER] + [self._render(i, block) for i, block in enumerate(packed, 1)])
+        return AssembledContext(text=text, blocks=packed, tokens=used, stats=stats)
+
+    @staticmethod
+    def _normalized_vectors(results: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Vecteurs des résultats normalisés (None s'il en manque un)."""
+        if any(r.get("vector") is None for r in results):
+            return None
+        vectors = np.asarray([r["vector"] for r in results], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    @staticmethod
+    def _merge_adjacent(results: List[Dict[str, Any]]) -> List[ContextBlock]:
+        """
+        Regroupe les chunks consécutifs d'un document en passages continus.
+
+        Les blocs gardent l'ordre des résultats : un bloc prend le rang de son
+        chunk le mieux placé.
+        """
+        by_doc: Dict[str, List[tuple]] = {}
+        for position, result in enumerate(results):
+            by_doc.setdefault(result.get("doc_id", ""), []).append((position, result))
+
+        blocks, ranks = [], []
+        for doc_id, chunks in by_doc.items():
+            chunks.sort(key=lambda item: item[1].get("metadata", {}).get("chunk_index", -1))
+            current = None
+            for position, chunk in chunks:
+                index = chunk.get("metadata", {}).get("chunk_index")
+                text = chunk["text"]
+                if current is not None and index is not None and index == current.chunk_indexes[-1] + 1:
+                    overlap = overlap_length(current.text, text)
+                    current.text += (text[overlap:] if overlap else "\n" + text)
+                    current.chunk_indexes.append(index)
+                    current.score = max(current.score, chunk["score"])
+                    ranks[-1] = min(ranks[-1], position)
+                    continue
+
+                current = ContextBlock(
+                    doc_id=doc_id,
+                    text=text,
+                    score=chunk["score"],
+                    chunk_indexes=[index if index is not None else -1],
+                    metadata={k: v for k, v in chunk.get("metadata", {}).items() if k != "text"}
+                )
+                blocks.append(current)
+                ranks.append(position)
+
+        return [block for _, block in sorted(zip(ranks, blocks), key=lambda item: item[0])]
+
+    @staticmethod
+    def _render(position: int, block: ContextBlock) -> str:
+        source = block.metadata.get("filename") or block.doc_id
+        return f"[Document {position} - {source} - Score: {block.score:.2f}]\n{block.text}\n"
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Tronque un texte à un budget de tokens, en fin de phrase si possible."""
+        # Estimation proportionnelle, puis ajustement
+        total = self.count_tokens(text)
+        cut = text[:max(1, int(len(text) * max(budget, 1) / total))]
+        while cut and self.count_tokens(cut + "...") > budget:
+            cut = cut[:int(len(cut) * 0.9)]
+
+        sentence_end = max(cut.rfind(". "), cut.rfind(".\n"))
+        if sentence_end > len(cut) // 2:
+            cut = cut[:sentence_end + 1]
+        return cut + "..."
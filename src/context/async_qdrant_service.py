@@ -0,0 +1,206 @@
+"""
+Service RAG asynchrone pour les routes FastAPI (`async def`).
+
+Jumeau en lecture de QdrantRAGService : même collection, même routage par tenant,
+mêmes embeddings (et même cache), mais la requête d'embedding et la requête Qdrant
+sont attendues (`await`) au lieu de bloquer la boucle d'événements d'uvicorn. Un seul
+worker API peut ainsi servir de nombreuses recherches RAG concurrentes (sessions
+vocales temps réel) sans blocage en tête de file.
+
+L'indexation et l'administration de la collection restent sur le service synchrone
+(workers Celery).
+
+Hors mode "remote" (Qdrant embarqué), il n'existe pas de client asynchrone distinct :
+les recherches du service synchrone sont alors exécutées dans un thread.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from monitoring import get_logger
+
+from .assembly import AssembledContext
+from .filters import build_filter
+from .qdrant_service import CONTEXT_CANDIDATES, SEARCH_HYBRID, QdrantRAGService, get_qdrant_service
+from .vector_store import create_async_qdrant_client
+
+logger = get_logger("qdrant")
+
+
+class AsyncQdrantRAGService:
+    """Recherche RAG asynchrone, adossée à un QdrantRAGService."""
+
+    def __init__(self, service: Optional[QdrantRAGService] = None):
+        """
+        Args:
+            service: Service synchrone (configuration, collection, embeddings)
+                     (défaut: instance globale)
+        """
+        self.service = service or get_qdrant_service()
+        self.collection_name = self.service.collection_name
+        self.client = create_async_qdrant_client(self.service.store_config)
+
+        if self.client is None:
+            logger.info(
+                "Recherches asynchrones exécutées dans un thread",
+                extra={"mode": self.service.store_config.mode}
+            )
+
+    async def _collection_for(self, tenant_id: Optional[str]) -> str:
+        """Collection d'un tenant (partagée ou dédiée), sans appel bloquant."""
+        service = self.service
+        if service._tenant_discovery_due():
+            try:
+                response = await self.client.get_collections()
+                service.tenants.discover(c.name for c in response.collections)
+            except Exception as e:
+                logger.warning(f"Découverte des collections dédiées impossible : {e}")
+        return service.tenants.collection_for(tenant_id)
+
+    async def search(self,
+                     query: str,
+                     top_k: int = 5,
+                     mode: Optional[str] = None,
+                     filters: Optional[Dict[str, Any]] = None,
+                     tenant_id: Optional[str] = None,
+                     with_vectors: bool = False,
+                     meeting_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Recherche dans Qdrant (voir `QdrantRAGService.search`).
+
+        Args:
+            query: Requête de recherche
+            top_k: Nombre de résultats
+            mode: SEARCH_DENSE ou SEARCH_HYBRID (défaut: mode du service)
+            filters: Expression de filtre sur le payload (voir `filters`)
+            tenant_id: Tenant interrogé (défaut: DEFAULT_TENANT)
+            with_vectors: Ajoute le vecteur dense de chaque résultat
+            meeting_id: Réunion à l'origine de la recherche (statistiques du cache sémantique)
+
+        Returns:
+            Liste des résultats avec score et contenu
+        """
+        service = self.service
+        if self.client is None:
+            return await asyncio.to_thread(
+                service.search, query, top_k=top_k, mode=mode, filters=filters, tenant_id=tenant_id,
+                with_vectors=with_vectors, meeting_id=meeting_id
+            )
+
+        mode = mode or service.search_mode
+        query_filter = build_filter(service.tenants.scope(tenant_id, filters))
+        collection_name = await self._collection_for(tenant_id)
+
+        # Créer l'embedding de la requête
+        query_embedding = await service.embeddings.aembed_query(query)
+
+        # Cache sémantique partagé avec le service synchrone (version lue dans Redis : thread)
+        scope = service.cache_scope(tenant_id, mode, top_k, filters, with_vectors)
+        cached, version = await asyncio.to_thread(service.query_cache.lookup, query_embedding, scope, meeting_id)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        if mode == SEARCH_HYBRID and service.sparse_enabled:
+            request = service._hybrid_request(
+                query, query_embedding, top_k, query_filter, collection_name, with_vectors
+            )
+            score_type = "rrf"
+        else:
+            request = service._dense_request(query_embedding, top_k, query_filter, collection_name, with_vectors)
+            score_type = "cosine"
+
+        response = await self.client.query_points(**request)
+        results = service.format_results(response.points, score_type)
+
+        service.query_cache.store(query_embedding, scope, results, version, time.perf_counter() - started)
+        return results
+
+    async def assemble_context(self,
+                               query: str,
+                               token_budget: Optional[int] = None,
+                               top_k: int = CONTEXT_CANDIDATES,
+                               filters: Optional[Dict[str, Any]] = None,
+                               tenant_id: Optional[str] = None) -> AssembledContext:
+        """
+        Contexte dédoublonné, diversifié et ajusté à un budget de tokens (voir `assembly`).
+
+        Args:
+            query: Requête
+            token_budget: Budget de tokens du contexte (défaut: RAG_CONTEXT_TOKEN_BUDGET)
+            top_k: Candidats récupérés avant dédoublonnage et MMR
+            filters: Expression de filtre sur le payload
+            tenant_id: Tenant interrogé
+
+        Returns:
+            Contexte assemblé
+        """
+        results = await self.search(query, top_k=top_k, filters=filters, tenant_id=tenant_id, with_vectors=True)
+        return self.service.context_assembler.assemble(results, token_budget=token_budget)
+
+    async def get_collection_stats(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Récupère les statistiques de la collection (voir `QdrantRAGService.get_collection_stats`).
+
+        Args:
+            tenant_id: Si précisé, ajoute la collection et le nombre de chunks du tenant
+
+        Returns:
+            Statistiques
+        """
+        service = self.service
+        if self.client is None:
+            return await asyncio.to_thread(service.get_collection_stats, tenant_id)
+
+        try:
+            stats = service.describe_collection(await self.client.get_collection(self.collection_name))
+            if tenant_id is not None:
+                collection_name = await self._collection_for(tenant_id)
+                response = await self.client.count(
+                    collection_name=collection_name,
+                    count_filter=build_filter(service.tenants.scope(tenant_id)),
+                    exact=True
+                )
+                stats["tenant"] = {
+                    "tenant_id": tenant_id,
+                    "collection": collection_name,
+                    "vectors": response.count
+                }
+            return stats
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def close(self) -> None:
+        """Ferme les connexions du client asynchrone."""
+        if self.client is not None:
+            await self.client.close()
+
+
+# Instance globale
+_async_qdrant_service: Optional[AsyncQdrantRAGService] = None
+
+
+async def get_async_qdrant_service() -> AsyncQdrantRAGService:
+    """
+    Récupère l'instance globale du service asynchrone (partage l'instance synchrone globale).
+
+    À appeler depuis la boucle d'événements de l'API : le client asynchrone y est lié.
+    Au premier appel, le service synchrone (connexion Qdrant, création de la collection,
+    chargement d'instantané) est construit dans un thread pour ne pas bloquer la boucle.
+    """
+    global _async_qdrant_service
+    if _async_qdrant_service is None:
+        service = await asyncio.to_thread(get_qdrant_service)
+        # Un autre appel concurrent a pu créer l'instance pendant l'attente
+        if _async_qdrant_service is None:
+            _async_qdrant_service = AsyncQdrantRAGService(service)
+    return _async_qdrant_service
+
+
+async def close_async_qdrant_service() -> None:
+    """Ferme l'instance globale si elle a été créée (arrêt de l'API)."""
+    global _async_qdrant_service
+    if _async_qdrant_service is not None:
+        await _async_qdrant_service.close()
+        _async_qdrant_service = None
@@ -0,0 +1,121 @@
+"""
+Embeddings par lots concurrents pour les gros documents.
+
+Les chunks sont découpés en lots de taille fixe, envoyés en parallèle (concurrence
+bornée), et chaque lot est réessayé indépendamment avec backoff exponentiel.
+
+Configuration par variables d'environnement :
+    EMBEDDING_BATCH_SIZE    Chunks par requête (défaut: 100)
+    EMBEDDING_CONCURRENCY   Requêtes simultanées max (défaut: 4)
+    EMBEDDING_MAX_RETRIES   Nouvelles tentatives par lot (défaut: 4)
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, List, Optional
+
+from monitoring import get_logger
+
+logger = get_logger("embeddings")
+
+# Callback de progression : (étape, fait, total ou None si inconnu)
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+
+
+class BatchingEmbedder:
+    """Découpe, parallélise et réessaie les appels `embed_documents`."""
+
+    def __init__(
+        self,
+        embeddings: Any,
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 1.0
+    ):
+        """
+        Args:
+            embeddings: Modèle d'embeddings (embed_documents)
+            batch_size: Chunks par requête
+            max_concurrency: Requêtes simultanées max
+            max_retries: Nouvelles tentatives par lot
+            backoff_base: Délai initial du backoff (secondes)
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+        self.max_concurrency = max_concurrency or int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("EMBEDDING_MAX_RETRIES", "4"))
+        self.backoff_base = backoff_base
+
+    def embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embarque un lot avec réessais (backoff exponentiel + jitter)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embeddings.embed_documents(batch)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) * (0.5 + random.random())
+                logger.warning(
+                    f"Lot d'embeddings en échec, nouvel essai dans {delay:.1f}s : {e}",
+                    extra={"attempt": attempt + 1, "batch_size": len(batch)}
+                )
+                time.sleep(delay)
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        progress_callback: Optional[ProgressCallback] = None
+    ) -> List[List[float]]:
+        """
+        Embarque des textes par lots concurrents, en conservant l'ordre.
+
+        Args:
+            texts: Textes à embarquer
+            progress_callback: Appelé avec ("embedded", chunks faits, total) après chaque lot
+
+        Returns:
+            Vecteurs dans l'ordre des textes
+        """
+        total = len(texts)
+        if total == 0:
+            return []
+
+        batches = [texts[start:start + self.batch_size] for start in range(0, total, self.batch_size)]
+
+        # Un seul lot : pas besoin de pool de threads
+        if len(batches) == 1:
+            vectors = self.embed_batch(batches[0])
+            if progress_callback:
+                progress_callback("embedded", total, total)
+            return vectors
+
+        results: List[Optional[List[List[float]]]] = [None] * len(batches)
+        done = 0
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)),
+                                thread_name_prefix="embed-batch") as executor:
+            futures = {executor.submit(self.embed_batch, batch): i for i, batch in enumerate(batches)}
+
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                done += len(batches[i])
+                if progress_callback:
+                    progress_callback("embedded", done, total)
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Embeddings par lots terminés",
+            extra={"chunks": total, "batches": len(batches), "seconds": round(elapsed, 2),
+                   "chunks_per_s": round(total / elapsed, 1) if elapsed else None}
+        )
+
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embedding d'une requête (délégué tel quel)."""
+        return self.embeddings.embed_query(text)
@@ -0,0 +1,180 @@
+"""
+Registre des documents indexés, par empreinte de contenu.
+
+Chaque fichier indexé est enregistré sous (tenant, sha256 du fichier) : un fichier déjà
+indexé pour le tenant (même contenu, quel que soit son nom) n'est ni découpé, ni
+embarqué, ni écrit une seconde fois ; l'upload renvoie le document existant.
+
+Avec Redis (REDIS_URL), le registre est partagé entre l'API (dédoublonnage à l'upload)
+et les workers Celery (enregistrement après indexation) ; sans Redis, il est stocké
+dans un fichier JSON local.
+
+Configuration par variables d'environnement :
+    RAG_DOCUMENT_REGISTRY_PATH   Fichier du registre sans Redis
+                                 (défaut: data/document_registry.json)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from monitoring import get_logger
+
+from .tenancy import DEFAULT_TENANT
+
+logger = get_logger("ingestion")
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: str) -> str:
+    """Empreinte sha256 du contenu d'un fichier (lu par blocs)."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentRegistry:
+    """Documents indexés par tenant, retrouvés par l'empreinte de leur contenu."""
+
+    def __init__(self, redis_url: Optional[str] = None, path: Optional[str] = None):
+        """
+        Args:
+            redis_url: URL Redis (défaut: REDIS_URL ; None = fichier JSON local)
+            path: Fichier du registre sans Redis (défaut: RAG_DOCUMENT_REGISTRY_PATH)
+        """
+        self.path = path or os.getenv("RAG_DOCUMENT_REGISTRY_PATH", "data/document_registry.json")
+        self._lock = threading.Lock()
+        self.client = None
+
+        redis_url = redis_url or os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+                self.client = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Registre des documents local (Redis indisponible) : {e}")
+
+    @staticmethod
+    def _key(tenant_id: Optional[str]) -> str:
+        return f"rag:documents:{tenant_id or DEFAULT_TENANT}"
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Registre des documents illisible : {e}")
+            return {}
+
+    def _save(self, data: Dict[str, Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, tenant_id: Optional[str], sha256: str) -> Optional[Dict[str, Any]]:
+        """
+        Document déjà indexé avec ce contenu.
+
+        Args:
+            tenant_id: Tenant propriétaire
+            sha256: Empreinte du fichier
+
+        Returns:
+            Entrée du registre (doc_id, filename, chunks, indexed_at) ou None
+        """
+        key = self._key(tenant_id)
+        if self.client is not None:
+            try:
+                entry = self.client.hget(key, sha256)
+                return json.loads(entry) if entry else None
+            except Exception as e:
+                logger.warning(f"Lecture du registre des documents impossible : {e}")
+                return None
+
+        with self._lock:
+            return self._load().get(key, {}).get(sha256)
+
+    def register(self,
+                 tenant_id: Optional[str],
+                 sha256: str,
+                 doc_id: str,
+                 filename: str,
+                 chunks: int) -> None:
+        """
+        Enregistre un document indexé.
+
+        Args:
+            tenant_id: Tenant propriétaire
+            sha256: Empreinte du fichier
+            doc_id: ID du document dans Qdrant
+            filename: Nom du fichier d'origine
+            chunks: Nombre de chunks indexés
+        """
+        key = self._key(tenant_id)
+        entry = {
+            "doc_id": doc_id,
+            "filename": filename,
+            "chunks": chunks,
+            "indexed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self.client is not None:
+            try:
+                self.client.hset(key, sha256, json.dumps(entry))
+            except Exception as e:
+                logger.warning(f"Écriture du registre des documents impossible : {e}")
+            return
+
+        with self._lock:
+            data = self._load()
+            data.setdefault(key, {})[sha256] = entry
+            self._save(data)
+
+    def forget(self, tenant_id: Optional[str], doc_id: str) -> None:
+        """
+        Retire un document supprimé (il pourra être ré-uploadé).
+
+        Args:
+            tenant_id: Tenant propriétaire
+            doc_id: ID du document
+        """
+        key = self._key(tenant_id)
+        if self.client is not None:
+            try:
+                for sha256, entry in self.client.hgetall(key).items():
+                    if json.loads(entry)["doc_id"] == doc_id:
+                        self.client.hdel(key, sha256)
+            except Exception as e:
+                logger.warning(f"Écriture du registre des documents impossible : {e}")
+            return
+
+        with self._lock:
+            data = self._load()
+            entries = data.get(key, {})
+            for sha256 in [h for h, entry in entries.items() if entry["doc_id"] == doc_id]:
+                del entries[sha256]
+            self._save(data)
+
+
+# Instance globale
+_document_registry: Optional[DocumentRegistry] = None
+
+
+def get_document_registry() -> DocumentRegistry:
+    """Récupère l'instance globale du registre des documents."""
+    global _document_registry
+    if _document_registry is None:
+        _document_registry = DocumentRegistry()
+    return _document_registry
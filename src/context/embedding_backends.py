@@ -0,0 +1,162 @@
+"""
+Backends d'embeddings interchangeables.
+
+- "openai" : API OpenAI (text-embedding-3-small, 1536 dimensions par défaut)
+- "local"  : modèle ONNX quantifié exécuté sur CPU (fastembed), sans réseau ;
+             inférence par lots répartis sur un pool de threads
+
+La dimension de la collection Qdrant suit celle du backend.
+
+Configuration par variables d'environnement :
+    EMBEDDING_BACKEND         "openai" ou "local" (défaut: openai)
+    LOCAL_EMBEDDING_MODEL     Modèle fastembed (défaut: paraphrase-multilingual-MiniLM-L12-v2)
+    LOCAL_EMBEDDING_THREADS   Threads d'inférence (défaut: nombre de cœurs, max 8)
+    LOCAL_EMBEDDING_BATCH     Textes par lot d'inférence (défaut: 32)
+    EMBEDDING_CACHE_DIR       Répertoire des modèles téléchargés (défaut: data/models)
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from monitoring import get_logger
+
+logger = get_logger("embeddings")
+
+BACKEND_OPENAI = "openai"
+BACKEND_LOCAL = "local"
+
+DEFAULT_OPENAI_MODEL = "text-embedding-3-small"
+DEFAULT_OPENAI_DIM = 1536
+DEFAULT_LOCAL_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class LocalEmbeddings:
+    """
+    Embeddings locaux sur CPU (modèle ONNX via fastembed).
+
+    Expose la même interface que les embeddings LangChain (embed_documents / embed_query).
+    Les lots sont répartis sur un pool de threads : onnxruntime libère le GIL pendant
+    l'inférence, chaque thread utilise donc un cœur.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_LOCAL_MODEL,
+        threads: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            model_name: Modèle fastembed
+            threads: Threads d'inférence
+            batch_size: Textes par lot d'inférence
+            cache_dir: Répertoire des modèles téléchargés
+        """
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError(
+                "Backend d'embeddings 'local' : installer fastembed (pip install fastembed)"
+            ) from e
+
+        self.model_name = model_name
+        self.threads = threads or int(os.getenv("LOCAL_EMBEDDING_THREADS", str(min(8, os.cpu_count() or 1))))
+        self.batch_size = batch_size or int(os.getenv("LOCAL_EMBEDDING_BATCH", "32"))
+
+        # Une session ONNX partagée, un thread intra-op par appel : le parallélisme
+        # vient du pool (plusieurs lots en même temps)
+        self.model = TextEmbedding(
+            model_name=model_name,
+            cache_dir=cache_dir or os.getenv("EMBEDDING_CACHE_DIR", "data/models"),
+            threads=1
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="local-embed")
+        self.dimension = len(self.embed_query("dimension"))
+
+        logger.info(
+            "Modèle d'embeddings local chargé",
+            extra={"model": model_name, "dimension": self.dimension, "threads": self.threads}
+        )
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        return [vector.tolist() for vector in self.model.passage_embed(batch, batch_size=len(batch))]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings de documents, lots en parallèle sur le pool de threads."""
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1:
+            return self._embed_batch(texts) if texts else []
+        return [vector for vectors in self._executor.map(self._embed_batch, batches) for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embedding d'une requête (préfixe de requête du modèle le cas échéant)."""
+        return next(iter(self.model.query_embed([text]))).tolist()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embedding d'une requête sur le pool d'inférence, sans bloquer la boucle d'événements."""
+        return await asyncio.wrap_future(self._executor.submit(self.embed_query, text))
+
+
+@dataclass
+class EmbeddingBackend:
+    """Modèle d'embeddings et caractéristiques nécessaires à la collection et au cache."""
+    name: str
+    embeddings: Any
+    model: str
+    dimension: int
+
+
+def create_embedding_backend(
+    backend: Optional[str] = None,
+    model: Optional[str] = None,
+    dimension: Optional[int] = None
+) -> EmbeddingBackend:
+    """
+    Crée le backend d'embeddings configuré.
+
+    Args:
+        backend: BACKEND_OPENAI ou BACKEND_LOCAL (défaut: EMBEDDING_BACKEND)
+        model: Nom du modèle (défaut selon le backend)
+        dimension: Dimension demandée ; pour un modèle local, doit correspondre
+                   à sa dimension native
+
+    Returns:
+        Backend d'embeddings
+
+    Raises:
+        ValueError: Si le backend est inconnu ou la dimension incompatible
+    """
+    backend = (backend or os.getenv("EMBEDDING_BACKEND", BACKEND_OPENAI)).lower()
+
+    if backend == BACKEND_OPENAI:
+        from langchain_openai import OpenAIEmbeddings
+
+        model = model or DEFAULT_OPENAI_MODEL
+        dimension = dimension or DEFAULT_OPENAI_DIM
+        return EmbeddingBackend(
+            name=backend,
+            embeddings=OpenAIEmbeddings(model=model, dimensions=dimension),
+            model=model,
+            dimension=dimension
+        )
+
+    if backend == BACKEND_LOCAL:
+        model = model or os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL)
+        embeddings = LocalEmbeddings(model_name=model)
+        if dimension and dimension != embeddings.dimension:
+            raise ValueError(
+                f"Le modèle local {model} produit des vecteurs de dimension {embeddings.dimension}, "
+                f"pas {dimension}"
+            )
+        return EmbeddingBackend(
+            name=backend,
+            embeddings=embeddings,
+            model=f"local/{model}",
+            dimension=embeddings.dimension
+        )
+
+    raise ValueError(f"Backend d'embeddings inconnu : {backend}")
@@ -0,0 +1,325 @@
+"""
+Cache d'embeddings adressé par contenu.
+
+Clé : (modèle, dimensions, nature, sha256(texte)), la nature distinguant requête et
+document (préfixes "query:" / "passage:" des modèles e5/bge locaux). Deux niveaux :
+- LRU en mémoire du processus
+- Stockage persistant partagé : Redis, ou SQLite local (mmap) sans Redis
+
+Ré-indexer un corpus déjà vu ou répéter une requête ne coûte plus d'appel réseau
+aux embeddings.
+
+Configuration par variables d'environnement :
+    EMBEDDING_CACHE           "redis", "sqlite" ou "none"
+                              (défaut : redis si REDIS_URL est défini, sinon sqlite)
+    EMBEDDING_CACHE_SIZE      Entrées du LRU en mémoire (défaut: 10000)
+    EMBEDDING_CACHE_PATH      Fichier SQLite (défaut: data/embedding_cache.sqlite)
+    EMBEDDING_CACHE_TTL       Expiration Redis en secondes (défaut: 30 jours, 0 = jamais)
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from monitoring import get_logger
+
+logger = get_logger("embedding_cache")
+
+# Nature du texte embarqué (partie de la clé)
+KIND_QUERY = "q"
+KIND_DOCUMENT = "d"
+
+
+def _to_array(vector: Sequence[float]) -> array:
+    """Vecteur -> tableau float32 compact (~4 octets par dimension au lieu de ~32)."""
+    return vector if isinstance(vector, array) else array("f", vector)
+
+
+def _from_bytes(data: bytes) -> array:
+    """Octets float32 -> tableau float32."""
+    vector = array("f")
+    vector.frombytes(data)
+    return vector
+
+
+class RedisEmbeddingStore:
+    """Niveau persistant Redis (partagé entre l'API et les workers)."""
+
+    def __init__(self, redis_url: str, ttl: int = 30 * 24 * 3600):
+        import redis
+        self.client = redis.from_url(redis_url)
+        self.ttl = ttl
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget([f"emb:{key}" for key in keys])
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(f"emb:{key}", value, ex=self.ttl or None)
+        pipe.execute()
+
+
+class SQLiteEmbeddingStore:
+    """Niveau persistant local : SQLite en mmap (un fichier, sans serveur)."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Une connexion par thread (sqlite3 n'autorise pas le partage par défaut)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        found: Dict[str, bytes] = {}
+        conn = self._connection()
+        # Limite SQLite sur le nombre de paramètres : requêtes par paquets
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch)
+            found.update(rows.fetchall())
+        return [found.get(key) for key in keys]
+
+    def set_many(self, items: Dict[str, bytes]) -> None:
+        conn = self._connection()
+        conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", items.items())
+        conn.commit()
+
+
+class EmbeddingCache:
+    """Cache d'embeddings à deux niveaux (LRU mémoire + stockage persistant)."""
+
+    def __init__(self, max_entries: int = 10000, store: Any = None):
+        """
+        Initialise le cache.
+
+        Args:
+            max_entries: Nombre max d'entrées dans le LRU en mémoire
+            store: Niveau persistant (RedisEmbeddingStore, SQLiteEmbeddingStore ou None)
+        """
+        self.max_entries = max_entries
+        self.store = store
+        self._lru: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.store_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """Construit le cache depuis la configuration (voir docstring du module)."""
+        backend = os.getenv("EMBEDDING_CACHE", "redis" if os.getenv("REDIS_URL") else "sqlite").lower()
+        max_entries = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+        store = None
+        try:
+            if backend == "redis":
+                store = RedisEmbeddingStore(
+                    os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                    ttl=int(os.getenv("EMBEDDING_CACHE_TTL", str(30 * 24 * 3600)))
+                )
+            elif backend == "sqlite":
+                store = SQLiteEmbeddingStore(os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite"))
+        except Exception as e:
+            logger.warning(f"Cache d'embeddings persistant indisponible ({backend}) : {e}")
+
+        return cls(max_entries=max_entries, store=store)
+
+    @staticmethod
+    def make_key(model: str, dimensions: Optional[int], text: str, kind: str = KIND_DOCUMENT) -> str:
+        """
+        Clé adressée par contenu.
+
+        Args:
+            model: Modèle d'embedding
+            dimensions: Dimension des vecteurs
+            text: Texte embarqué
+            kind: KIND_QUERY ou KIND_DOCUMENT (un même texte n'a pas le même
+                  vecteur en requête et en document selon le backend)
+
+        Returns:
+            Clé "modèle:dimensions:nature:sha256"
+        """
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{dimensions}:{kind}:{digest}"
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """
+        Récupère des vecteurs (LRU puis niveau persistant).
+
+        Args:
+            keys: Clés à chercher
+
+        Returns:
+            Vecteurs trouvés (None pour les absents), dans l'ordre des clés
+        """
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        missing: List[int] = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = vector.tolist()
+                    self.memory_hits += 1
+                else:
+                    missing.append(i)
+
+        if missing and self.store is not None:
+            try:
+                stored = self.store.get_many([keys[i] for i in missing])
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"Lecture du cache d'embeddings persistant impossible : {e}")
+                stored = [None] * len(missing)
+
+            promoted = {}
+            still_missing = []
+            for i, data in zip(missing, stored):
+                if data is None:
+                    still_missing.append(i)
+                else:
+                    promoted[keys[i]] = _from_bytes(data)
+                    results[i] = promoted[keys[i]].tolist()
+            self.store_hits += len(promoted)
+            self._remember(promoted)
+            missing = still_missing
+
+        self.misses += len(missing)
+        return results
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Enregistre des vecteurs dans les deux niveaux.
+
+        Args:
+            items: {clé: vecteur}
+        """
+        if not items:
+            return
+
+        items = {key: _to_array(vector) for key, vector in items.items()}
+        self._remember(items)
+
+        if self.store is not None:
+            try:
+                self.store.set_many({key: vector.tobytes() for key, vector in items.items()})
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"Écriture du cache d'embeddings persistant impossible : {e}")
+
+    def _remember(self, items: Dict[str, array]) -> None:
+        """Ajoute des entrées au LRU en évinçant les plus anciennes."""
+        with self._lock:
+            for key, vector in items.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du cache.
+
+        Returns:
+            Hits par niveau, misses et taux de hit
+        """
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._lru),
+            "store": type(self.store).__name__ if self.store is not None else None,
+            "store_errors": self.store_errors,
+        }
+
+
+class CachedEmbeddings:
+    """
+    Enveloppe un modèle d'embeddings LangChain (embed_documents / embed_query)
+    avec le cache adressé par contenu. Seuls les textes absents du cache
+    sont envoyés au modèle.
+    """
+
+    def __init__(self, embeddings: Any, cache: EmbeddingCache, model: str, dimensions: Optional[int]):
+        """
+        Args:
+            embeddings: Modèle d'embeddings sous-jacent
+            cache: Cache d'embeddings
+            model: Nom du modèle (partie de la clé)
+            dimensions: Dimension des vecteurs (partie de la clé)
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings de documents, en n'appelant le modèle que pour les absents du cache."""
+        keys = [self.cache.make_key(self.model, self.dimensions, text, KIND_DOCUMENT) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Textes manquants, dédoublonnés (même contenu = un seul appel)
+        to_embed: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                to_embed.setdefault(key, text)
+
+        if to_embed:
+            fresh = dict(zip(to_embed, self.embeddings.embed_documents(list(to_embed.values()))))
+            self.cache.put_many(fresh)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embedding d'une requête (clé distincte de celle du même texte en document)."""
+        key = self.cache.make_key(self.model, self.dimensions, text, KIND_QUERY)
+        vector = self.cache.get_many([key])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Version asynchrone de `embed_query`, sans bloquer la boucle d'événements.
+
+        Le cache (Redis / SQLite) est interrogé dans un thread ; le modèle est appelé
+        via son API asynchrone (`aembed_query`) s'il en a une.
+        """
+        key = self.cache.make_key(self.model, self.dimensions, text, KIND_QUERY)
+        vector = (await asyncio.to_thread(self.cache.get_many, [key]))[0]
+        if vector is None:
+            aembed_query = getattr(self.embeddings, "aembed_query", None)
+            if aembed_query is not None:
+                vector = await aembed_query(text)
+            else:
+                vector = await asyncio.to_thread(self.embeddings.embed_query, text)
+            await asyncio.to_thread(self.cache.put_many, {key: vector})
+        return vector
@@ -0,0 +1,97 @@
+"""
+Index de payload et filtres de recherche.
+
+Les champs indexés (doc_id, filename, file_type, uploaded_at + champs déclarés) rendent
+les suppressions par document et les recherches filtrées indépendantes de la taille
+de la collection : Qdrant élague les candidats avant la recherche vectorielle.
+
+Expression de filtre (dictionnaire, conditions combinées par ET) :
+    {"doc_id": "abc"}                                  égalité
+    {"file_type": ["pdf", "docx"]}                     un parmi
+    {"uploaded_at": {"gte": "2024-01-01T00:00:00Z"}}   intervalle (gt, gte, lt, lte)
+
+Configuration par variables d'environnement :
+    QDRANT_PAYLOAD_INDEXES   Index supplémentaires "champ:type,..." (types : keyword,
+                             datetime, integer, float, bool), ex. "team:keyword,year:integer"
+"""
+
+import os
+from typing import Any, Dict, Optional
+
+from qdrant_client.models import (
+    DatetimeRange,
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    Range
+)
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+# Index créés sur toute collection
+DEFAULT_PAYLOAD_INDEXES = {
+    "doc_id": PayloadSchemaType.KEYWORD,
+    "filename": PayloadSchemaType.KEYWORD,
+    "file_type": PayloadSchemaType.KEYWORD,
+    "uploaded_at": PayloadSchemaType.DATETIME,
+}
+
+
+def payload_indexes_from_env() -> Dict[str, PayloadSchemaType]:
+    """
+    Index de payload à créer : index par défaut + QDRANT_PAYLOAD_INDEXES.
+
+    Returns:
+        {champ: type d'index}
+
+    Raises:
+        ValueError: Si un type d'index est inconnu
+    """
+    indexes = dict(DEFAULT_PAYLOAD_INDEXES)
+
+    for entry in os.getenv("QDRANT_PAYLOAD_INDEXES", "").split(","):
+        if not entry.strip():
+            continue
+        field, _, schema = entry.partition(":")
+        try:
+            indexes[field.strip()] = PayloadSchemaType(schema.strip().lower() or "keyword")
+        except ValueError:
+            raise ValueError(f"Type d'index de payload inconnu pour '{field.strip()}' : {schema}")
+
+    return indexes
+
+
+def build_filter(filters: Optional[Dict[str, Any]]) -> Optional[Filter]:
+    """
+    Convertit une expression de filtre en filtre Qdrant.
+
+    Args:
+        filters: Expression de filtre (voir docstring du module), ou None
+
+    Returns:
+        Filtre Qdrant, ou None sans condition
+
+    Raises:
+        ValueError: Si une condition est mal formée
+    """
+    if not filters:
+        return None
+
+    conditions = []
+    for field, value in filters.items():
+        if isinstance(value, dict):
+            unknown = set(value) - set(RANGE_OPERATORS)
+            if unknown:
+                raise ValueError(f"Opérateurs inconnus pour '{field}' : {sorted(unknown)}")
+
+            # Bornes textuelles = dates ISO 8601, sinon bornes numériques
+            range_class = DatetimeRange if any(isinstance(bound, str) for bound in value.values()) else Range
+            conditions.append(FieldCondition(key=field, range=range_class(**value)))
+        elif isinstance(value, (list, tuple, set)):
+            conditions.append(FieldCondition(key=field, match=MatchAny(any=list(value))))
+        else:
+            conditions.append(FieldCondition(key=field, match=MatchValue(value=value)))
+
+    return Filter(must=conditions)
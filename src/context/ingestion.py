@@ -0,0 +1,334 @@
+"""
+Ingestion en flux des documents, à mémoire bornée.
+
+Chaîne de générateurs : pages -> chunks -> lots d'embeddings -> upserts.
+Un gros fichier n'est jamais entièrement en mémoire (texte, chunks ou vecteurs) :
+seuls le tampon de découpage et `max_in_flight` lots sont vivants à un instant donné.
+Les lots sont écrits dans Qdrant dans l'ordre dès qu'ils sont prêts, donc les
+premiers chunks sont interrogeables avant la fin du fichier. Comme `index_document`,
+la ré-indexation est incrémentale (voir `versioning`).
+
+L'extraction du texte des PDF (CPU, mono-thread) est répartie par plages de pages sur
+un pool de processus partagé ; les pages sont restituées dans l'ordre du document,
+au fil de l'eau. Word et Excel (Unstructured) sont lus d'un bloc, dans le processus.
+Les processus enfants d'un worker Celery "prefork" ne peuvent pas créer de processus :
+l'extraction y reste séquentielle. Les indexations sont donc routées sur un worker
+`--pool=threads` (voir `tasks`) ; benchmarks/bench_pdf_extraction.py mesure les deux.
+
+Configuration par variables d'environnement :
+    INGEST_MAX_IN_FLIGHT   Lots d'embeddings en cours au maximum (défaut: EMBEDDING_CONCURRENCY)
+    INGEST_TEXT_BLOCK_SIZE Caractères lus à la fois pour les fichiers texte (défaut: 65536)
+    INGEST_PARSE_WORKERS   Processus d'extraction des PDF (défaut: nombre de cœurs ;
+                           0 ou 1 = extraction séquentielle)
+    INGEST_PARSE_PAGES_PER_TASK Pages extraites par tâche du pool (défaut: 8)
+    INGEST_PARALLEL_MIN_PAGES   Pages à partir desquelles un PDF est extrait en
+                                parallèle (défaut: 16)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_community.document_loaders import (
+    PyPDFLoader,
+    UnstructuredWordDocumentLoader,
+    UnstructuredExcelLoader
+)
+
+from monitoring import get_logger
+
+from .batch_embedder import ProgressCallback
+from .versioning import ChunkRecord, ReindexStats
+
+logger = get_logger("ingestion")
+
+TEXT_BLOCK_SIZE = int(os.getenv("INGEST_TEXT_BLOCK_SIZE", "65536"))
+
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", str(os.cpu_count() or 1)))
+PARSE_PAGES_PER_TASK = int(os.getenv("INGEST_PARSE_PAGES_PER_TASK", "8"))
+PARALLEL_MIN_PAGES = int(os.getenv("INGEST_PARALLEL_MIN_PAGES", "16"))
+
+# Séparateur entre deux pages (identique à l'ancien chargement "\n\n".join)
+PAGE_SEPARATOR = "\n\n"
+
+
+def iter_document_pages(file_path: str) -> Iterator[str]:
+    """
+    Lit un document page par page (ou bloc par bloc pour le texte brut).
+
+    Chaque morceau inclut son séparateur de fin : les concaténer redonne le
+    contenu complet du document.
+
+    Args:
+        file_path: Chemin du fichier
+
+    Yields:
+        Texte de chaque page / bloc
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+
+    if file_extension == '.pdf':
+        yield from iter_pdf_pages(file_path)
+        return
+    elif file_extension in ['.doc', '.docx']:
+        loader = UnstructuredWordDocumentLoader(file_path)
+    elif file_extension in ['.xls', '.xlsx']:
+        loader = UnstructuredExcelLoader(file_path)
+    else:
+        # .txt et fallback : lecture par blocs
+        with open(file_path, 'r', encoding='utf-8') as f:
+            while True:
+                block = f.read(TEXT_BLOCK_SIZE)
+                if not block:
+                    return
+                yield block
+
+    for document in loader.lazy_load():
+        yield document.page_content + PAGE_SEPARATOR
+
+
+# Pool de processus partagé par les ingestions du processus (créé au premier PDF)
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+_parse_pool_unavailable = False
+
+
+def _get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Pool d'extraction des pages, ou None si extraction séquentielle."""
+    global _parse_pool, _parse_pool_unavailable
+    if PARSE_WORKERS <= 1 or _parse_pool_unavailable:
+        return None
+
+    with _parse_pool_lock:
+        if _parse_pool is None and not _parse_pool_unavailable:
+            try:
+                pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+                # Démarre les processus maintenant : un worker "prefork" échoue ici
+                pool.submit(os.getpid).result()
+                _parse_pool = pool
+            except Exception as e:
+                _parse_pool_unavailable = True
+                logger.warning(f"Extraction des PDF séquentielle (pool de processus indisponible) : {e}")
+        return _parse_pool
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Texte des pages [start, stop[ d'un PDF (exécuté dans un processus du pool)."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() + PAGE_SEPARATOR for i in range(start, stop)]
+
+
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Lit un PDF page par page, en parallèle par plages de pages si le document est long.
+
+    Au plus deux plages par processus sont en cours : la mémoire reste bornée et les
+    premières pages sont restituées sans attendre la fin de l'extraction.
+
+    Args:
+        file_path: Chemin du fichier
+
+    Yields:
+        Texte de chaque page, dans l'ordre du document
+    """
+    from pypdf import PdfReader
+
+    page_count = len(PdfReader(file_path).pages)
+    pool = _get_parse_pool() if page_count >= PARALLEL_MIN_PAGES else None
+    if pool is None:
+        for document in PyPDFLoader(file_path).lazy_load():
+            yield document.page_content + PAGE_SEPARATOR
+        return
+
+    started = time.monotonic()
+    pending: "deque[Future]" = deque()
+    try:
+        for start in range(0, page_count, PARSE_PAGES_PER_TASK):
+            pending.append(pool.submit(
+                _extract_pdf_pages, file_path, start, min(start + PARSE_PAGES_PER_TASK, page_count)
+            ))
+            if len(pending) >= 2 * PARSE_WORKERS:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+    elapsed = time.monotonic() - started
+    logger.debug(
+        "PDF extrait en parallèle",
+        extra={"pages": page_count, "workers": PARSE_WORKERS, "seconds": round(elapsed, 2),
+               "pages_per_s": round(page_count / elapsed, 1) if elapsed else None}
+    )
+
+
+def iter_chunks(pages: Iterable[str], text_splitter: Any) -> Iterator[str]:
+    """
+    Découpe un flux de pages en chunks, sans charger tout le texte.
+
+    Le dernier chunk de chaque page est retenu et recollé à la page suivante :
+    un passage à cheval sur deux pages est découpé comme dans le texte complet.
+
+    Args:
+        pages: Flux de pages (voir `iter_document_pages`)
+        text_splitter: Découpeur LangChain (split_text)
+
+    Yields:
+        Chunks dans l'ordre du document
+    """
+    carry = ""
+    for page in pages:
+        buffer = carry + page
+        chunks = text_splitter.split_text(buffer)
+        if not chunks:
+            carry = buffer
+            continue
+        yield from chunks[:-1]
+
+        # Reprendre le texte brut depuis le dernier chunk (le découpeur retire les
+        # blancs de fin, qui peuvent séparer deux mots à la jonction des pages)
+        start = buffer.rfind(chunks[-1])
+        carry = buffer[start:] if start >= 0 else chunks[-1]
+
+    if carry.strip():
+        yield from text_splitter.split_text(carry)
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Regroupe un flux en lots de taille fixe (le dernier peut être plus petit).
+
+    Args:
+        items: Flux d'éléments
+        batch_size: Taille des lots
+
+    Yields:
+        Lots d'éléments
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class StreamingIngestionPipeline:
+    """
+    Indexe un fichier en flux : page -> chunks -> embeddings -> upsert.
+
+    Contre-pression : au plus `max_in_flight` lots sont en cours d'embedding ;
+    le découpage du fichier attend qu'un lot soit écrit avant d'en lire davantage.
+    """
+
+    def __init__(self, rag_service: Any, max_in_flight: Optional[int] = None):
+        """
+        Args:
+            rag_service: Service RAG (text_splitter, batch_embedder, écriture des points)
+            max_in_flight: Lots d'embeddings en cours au maximum
+        """
+        self.rag_service = rag_service
+        self.max_in_flight = max_in_flight or int(
+            os.getenv("INGEST_MAX_IN_FLIGHT", str(rag_service.batch_embedder.max_concurrency))
+        )
+
+    def run(self,
+            file_path: str,
+            doc_id: str,
+            metadata: Optional[Dict[str, Any]] = None,
+            progress_callback: Optional[ProgressCallback] = None,
+            tenant_id: Optional[str] = None) -> List[str]:
+        """
+        Indexe un fichier.
+
+        Args:
+            file_path: Chemin du fichier
+            doc_id: ID unique du document
+            metadata: Métadonnées ajoutées à chaque chunk
+            progress_callback: Appelé avec (étape, fait, None) pour les étapes
+                               "pages", "embedded" et "upserted" (total inconnu en flux)
+            tenant_id: Tenant propriétaire du document
+
+        Returns:
+            Liste des IDs des chunks indexés
+        """
+        service = self.rag_service
+        embedder = service.batch_embedder
+        started = time.monotonic()
+        counters = {"pages": 0, "embedded": 0, "upserted": 0}
+        stats = ReindexStats()
+
+        def report(stage: str, count: int) -> None:
+            counters[stage] += count
+            if progress_callback:
+                progress_callback(stage, counters[stage], None)
+
+        def pages() -> Iterator[str]:
+            for page in iter_document_pages(file_path):
+                report("pages", 1)
+                yield page
+
+        # Ré-indexation incrémentale : les chunks déjà présents ne sont pas ré-embarqués
+        existing_ids = service.existing_chunk_ids(doc_id, tenant_id)
+        identity = service.chunk_identity(doc_id, tenant_id)
+
+        chunk_ids: List[str] = []
+        pending: "deque[Tuple[List[ChunkRecord], List[ChunkRecord], Any]]" = deque()
+        next_index = 0
+
+        def flush_oldest() -> None:
+            # Écriture dans l'ordre : attend le lot le plus ancien
+            records, fresh, future = pending.popleft()
+            vectors = future.result() if future is not None else []
+            report("embedded", len(fresh))
+
+            written = service.write_chunks(
+                doc_id, records, dict(zip((record.point_id for record in fresh), vectors)), metadata,
+                tenant_id=tenant_id
+            )
+            stats.embedded += written.embedded
+            stats.unchanged += written.unchanged
+            chunk_ids.extend(record.point_id for record in records)
+            report("upserted", len(records))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ingest") as executor:
+            try:
+                for texts in iter_batches(iter_chunks(pages(), service.text_splitter), embedder.batch_size):
+                    records = [identity.record(next_index + i, text) for i, text in enumerate(texts)]
+                    next_index += len(texts)
+
+                    fresh = [record for record in records if record.point_id not in existing_ids]
+                    future = executor.submit(embedder.embed_batch, [record.text for record in fresh]) if fresh else None
+                    pending.append((records, fresh, future))
+
+                    if len(pending) >= self.max_in_flight:
+                        flush_oldest()
+
+                while pending:
+                    flush_oldest()
+            finally:
+                for _, _, future in pending:
+                    if future is not None:
+                        future.cancel()
+
+        # Chunks de l'ancienne version absents de la nouvelle
+        stats.deleted = service.delete_chunks(existing_ids.difference(chunk_ids), tenant_id)
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Ingestion en flux terminée",
+            extra={"doc_id": doc_id, "tenant_id": tenant_id, "pages": counters["pages"], "chunks": len(chunk_ids),
+                   **stats.to_dict(), "seconds": round(elapsed, 2),
+                   "chunks_per_s": round(len(chunk_ids) / elapsed, 1) if elapsed else None}
+        )
+
+        return chunk_ids
@@ -0,0 +1,200 @@
+"""
+Événements de progression des indexations.
+
+Les tâches d'indexation publient leur avancement sur un canal Redis par job
+("ingest:{job_id}"), relayé aux clients par le WebSocket `/ws/ingestion/{job_id}` :
+- {"type": "document_started", ...}    début d'un document
+- {"type": "progress", ...}            pages extraites, chunks embarqués, points écrits
+- {"type": "document_completed", ...}  document indexé, doublon ou en échec
+- {"type": "completed", "result": ...} fin du job
+- {"type": "error", "error": ...}      échec du job
+
+Chaque événement porte les compteurs du document en cours et du job, les débits
+(pages/s, chunks/s, points/s) et le worker Celery : les documents lents et les
+workers saturés se repèrent en direct.
+
+Configuration par variables d'environnement :
+    INGEST_PROGRESS_INTERVAL   Intervalle minimal entre deux événements "progress"
+                               en secondes (défaut: 0.5)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from monitoring import get_logger
+
+logger = get_logger("ingestion")
+
+INGEST_CHANNEL_PREFIX = "ingest:"
+
+# Étapes rapportées par la chaîne d'ingestion (voir `ingestion`)
+STAGES = ("pages", "embedded", "upserted")
+
+
+def ingestion_channel(job_id: str) -> str:
+    """Canal Redis des événements d'un job d'indexation."""
+    return f"{INGEST_CHANNEL_PREFIX}{job_id}"
+
+
+def _rate(count: int, seconds: float) -> Optional[float]:
+    return round(count / seconds, 1) if seconds > 0 else None
+
+
+class IngestionProgress:
+    """
+    Publie la progression d'un job d'indexation (un ou plusieurs documents).
+
+    S'utilise comme `progress_callback` de `QdrantRAGService.index_file`.
+    Sans Redis, les événements sont seulement journalisés au niveau DEBUG.
+    """
+
+    def __init__(self,
+                 job_id: str,
+                 documents: int = 1,
+                 worker: Optional[str] = None,
+                 redis_url: Optional[str] = None,
+                 interval: Optional[float] = None):
+        """
+        Args:
+            job_id: ID du job Celery
+            documents: Nombre de documents du job
+            worker: Worker Celery qui exécute le job
+            redis_url: URL Redis (défaut: REDIS_URL)
+            interval: Intervalle minimal entre deux événements "progress"
+                      (défaut: INGEST_PROGRESS_INTERVAL)
+        """
+        self.job_id = job_id
+        self.channel = ingestion_channel(job_id)
+        self.documents = documents
+        self.worker = worker
+        self.interval = interval if interval is not None else float(os.getenv("INGEST_PROGRESS_INTERVAL", "0.5"))
+
+        self.client = None
+        redis_url = redis_url or os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+                self.client = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Progression de l'indexation non publiée (Redis indisponible) : {e}")
+
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.totals = {stage: 0 for stage in STAGES}
+        self.position = 0
+        self.doc_id: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.counters = {stage: 0 for stage in STAGES}
+        self._document_open = False
+        self._doc_started_at = self.started_at
+        self._last_progress = 0.0
+
+    def start_document(self, doc_id: str, filename: str) -> None:
+        """
+        Passe au document suivant du job.
+
+        Args:
+            doc_id: ID du document
+            filename: Nom du fichier
+        """
+        with self._lock:
+            self.position += 1
+            self.doc_id = doc_id
+            self.filename = filename
+            self.counters = {stage: 0 for stage in STAGES}
+            self._document_open = True
+            self._doc_started_at = time.monotonic()
+        self.publish("document_started")
+
+    def __call__(self, stage: str, done: int, total: Optional[int] = None) -> None:
+        """Callback de progression (étape, fait, total) de la chaîne d'ingestion."""
+        if stage not in self.counters:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self.counters[stage] = done
+            if now - self._last_progress < self.interval:
+                return
+            self._last_progress = now
+        self.publish("progress")
+
+    def finish_document(self, status: str, chunks: int = 0, **extra: Any) -> None:
+        """
+        Clôt le document en cours.
+
+        Args:
+            status: "indexed", "duplicate" ou "failed"
+            chunks: Nombre de chunks indexés
+            **extra: Champs ajoutés à l'événement (ex. error, duplicate_of)
+        """
+        with self._lock:
+            for stage in STAGES:
+                self.totals[stage] += self.counters[stage]
+            self._document_open = False
+        self.publish("document_completed", status=status, chunks=chunks, **extra)
+
+    def complete(self, result: Dict[str, Any]) -> None:
+        """Fin du job (dernier événement du canal)."""
+        self.publish("completed", result=result)
+
+        # Totaux du job seulement : "filename" est un attribut réservé des LogRecord
+        snapshot = self._snapshot()
+        logger.info(
+            "Indexation terminée",
+            extra={"job_id": self.job_id, "worker": self.worker, "documents": self.documents, **snapshot["job"]}
+        )
+
+    def fail(self, error: str) -> None:
+        """Échec du job (dernier événement du canal)."""
+        self.publish("error", error=error)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            doc_elapsed = now - self._doc_started_at
+            job_elapsed = now - self.started_at
+            # Totaux du job : documents clos + document en cours
+            current = self.counters if self._document_open else dict.fromkeys(STAGES, 0)
+            totals = {stage: self.totals[stage] + current[stage] for stage in STAGES}
+            return {
+                "job_id": self.job_id,
+                "worker": self.worker,
+                "doc_id": self.doc_id,
+                "filename": self.filename,
+                "position": self.position,
+                "documents": self.documents,
+                **self.counters,
+                "elapsed": round(doc_elapsed, 2),
+                "throughput": {
+                    "pages_per_s": _rate(self.counters["pages"], doc_elapsed),
+                    "chunks_per_s": _rate(self.counters["embedded"], doc_elapsed),
+                    "points_per_s": _rate(self.counters["upserted"], doc_elapsed),
+                },
+                "job": {
+                    **totals,
+                    "elapsed": round(job_elapsed, 2),
+                    "points_per_s": _rate(totals["upserted"], job_elapsed),
+                },
+            }
+
+    def publish(self, event_type: str, **fields: Any) -> None:
+        """
+        Publie un événement sur le canal du job.
+
+        Args:
+            event_type: Type d'événement
+            **fields: Champs propres à l'événement
+        """
+        event = {"type": event_type, **self._snapshot(), **fields}
+        if self.client is None:
+            logger.debug("Progression de l'indexation", extra={"event": event_type, "job_id": self.job_id})
+            return
+
+        try:
+            self.client.publish(self.channel, json.dumps(event, default=str))
+        except Exception as e:
+            logger.warning(f"Publication de la progression impossible : {e}")
@@ -4,18 +4,68 @@ Inspiré de : https://github.com/techwithtim/ProductionGradeRAGPythonApp
 """
 
 import os
-import uuid
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredWordDocumentLoader,
-    UnstructuredExcelLoader
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterable, Optional, Set
+from qdrant_client.models import (
+    VectorParams,
+    Distance,
+    PointStruct,
+    PointIdsList,
+    SetPayload,
+    SetPayloadOperation,
+    SparseVectorParams,
+    Modifier,
+    Prefetch,
+    FusionQuery,
+    Fusion,
+    VectorParamsDiff,
+    HnswConfigDiff,
+    Filter,
+    IsEmptyCondition,
+    PayloadField
 )
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from monitoring import get_logger
+
+from .vector_store import VectorStoreConfig, create_qdrant_client
+from .embedding_cache import EmbeddingCache, CachedEmbeddings
+from .embedding_backends import EmbeddingBackend, create_embedding_backend
+from .batch_embedder import BatchingEmbedder, ProgressCallback
+from .ingestion import StreamingIngestionPipeline, iter_document_pages
+from .versioning import ChunkIdentity, ChunkRecord, ReindexStats
+from .sparse import BM25SparseEncoder
+from .quantization import QuantizationSettings, estimate_vector_memory, quantization_mode
+from .filters import build_filter, payload_indexes_from_env
+from .assembly import AssembledContext, ContextAssembler
+from .query_cache import CollectionVersion, SemanticQueryCache
+from .tenancy import DEFAULT_TENANT, TENANT_FIELD, TENANT_INDEX_SCHEMA, TenantRouter
+from .snapshot import export_snapshot, import_snapshot, load_snapshot_on_startup
+
+logger = get_logger("qdrant")
+
+# Points envoyés par requête d'upsert
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "256"))
+
+# Modes de recherche
+SEARCH_DENSE = "dense"    # similarité cosinus des embeddings
+SEARCH_HYBRID = "hybrid"  # dense + BM25 creux, fusion RRF côté Qdrant
+SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", SEARCH_DENSE).lower()
+
+# Nom du vecteur creux BM25 ("" = vecteur dense par défaut de la collection)
+DENSE_VECTOR_NAME = ""
+SPARSE_VECTOR_NAME = "bm25"
+
+# Candidats récupérés par chaque branche avant fusion, en multiple de top_k
+HYBRID_PREFETCH_FACTOR = int(os.getenv("RAG_HYBRID_PREFETCH_FACTOR", "4"))
+
+# Candidats récupérés pour l'assemblage du contexte (avant dédoublonnage et MMR)
+CONTEXT_CANDIDATES = int(os.getenv("RAG_CONTEXT_CANDIDATES", "12"))
+
+# Fréquence de re-découverte des collections dédiées créées par un autre processus
+TENANT_DISCOVERY_TTL_SECONDS = 30
 
 
 class QdrantRAGService:
@@ -32,37 +82,82 @@ class QdrantRAGService:
     def __init__(self,
                  url: str = None,
                  collection_name: str = "debatehub-context",
-                 embedding_dim: int = 1536):
+                 embedding_dim: Optional[int] = None,
+                 store_config: Optional[VectorStoreConfig] = None,
+                 embedding_model: Optional[str] = None,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 search_mode: Optional[str] = None,
+                 embedding_backend: Optional[EmbeddingBackend] = None,
+                 quantization: Optional[QuantizationSettings] = None):
         """
         Initialise le service RAG avec Qdrant.
 
         Args:
-            url: URL Qdrant (default: local en mémoire)
+            url: URL Qdrant (raccourci pour un backend "remote")
             collection_name: Nom de la collection
-            embedding_dim: Dimension des embeddings (1536 pour text-embedding-3-small)
+            embedding_dim: Dimension des embeddings (défaut: celle du backend, 1536 pour OpenAI)
+            store_config: Backend de stockage (défaut: en mémoire, parfait pour dev/test)
+            embedding_model: Modèle d'embeddings (défaut selon le backend)
+            embedding_cache: Cache d'embeddings (défaut: configuré depuis l'environnement)
+            search_mode: SEARCH_DENSE ou SEARCH_HYBRID (défaut: RAG_SEARCH_MODE)
+            embedding_backend: Backend d'embeddings (défaut: EMBEDDING_BACKEND, voir
+                               `embedding_backends`)
+            quantization: Quantification des vecteurs (défaut: QDRANT_QUANTIZATION, voir
+                          `quantization`)
         """
+        if (search_mode or SEARCH_MODE) not in (SEARCH_DENSE, SEARCH_HYBRID):
+            raise ValueError(f"Mode de recherche inconnu : {search_mode or SEARCH_MODE}")
+
+        # Backend d'embeddings (OpenAI ou modèle local) : fixe la dimension de la collection
+        self.embedding_backend = embedding_backend or create_embedding_backend(
+            model=embedding_model, dimension=embedding_dim
+        )
+
         self.collection_name = collection_name
-        self.embedding_dim = embedding_dim
+        self.tenants = TenantRouter(collection_name)
+        self._tenants_refreshed_at = 0.0
+        self._promotion_lock = threading.Lock()
+        self.embedding_dim = self.embedding_backend.dimension
+        self.search_mode = search_mode or SEARCH_MODE
+        self.quantization = quantization or QuantizationSettings.from_env()
 
-        # Initialiser Qdrant
-        # Si pas d'URL, utiliser en mémoire (parfait pour dev/test)
-        if url:
-            self.client = QdrantClient(url=url, timeout=30)
-            print(f"✅ Qdrant connecté à : {url}")
-        else:
-            # Mode en mémoire (pas besoin de serveur Qdrant!)
-            self.client = QdrantClient(":memory:")
-            print("✅ Qdrant initialisé en mémoire (mode dev)")
+        # Vecteurs creux BM25, calculés localement à l'ingestion et à la requête
+        self.sparse_encoder = BM25SparseEncoder()
+        self.sparse_enabled = False
+
+        # Version des données par tenant (invalide le cache de recherches à chaque écriture,
+        # y compris pendant la mise à niveau de la collection)
+        self.data_versions = CollectionVersion(collection_name)
+
+        # Initialiser Qdrant selon le backend (serveur, disque local ou mémoire)
+        if store_config is None:
+            store_config = VectorStoreConfig.from_url(url) if url else VectorStoreConfig()
+        self.store_config = store_config
+        self.client = create_qdrant_client(store_config)
+        logger.info("Qdrant initialisé", extra={"mode": store_config.mode, "store": store_config.describe()})
 
         # Créer la collection si elle n'existe pas
         self._ensure_collection()
 
-        # Initialiser OpenAI Embeddings
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
+        # Embeddings du backend, derrière le cache adressé par contenu
+        self.embedding_model = self.embedding_backend.model
+        self.embedding_cache = embedding_cache or EmbeddingCache.from_env()
+        self.embeddings = CachedEmbeddings(
+            self.embedding_backend.embeddings,
+            self.embedding_cache,
+            model=self.embedding_model,
             dimensions=self.embedding_dim
         )
 
+        # Recherches proches réutilisées, invalidées à chaque écriture du tenant
+        self.query_cache = SemanticQueryCache(self.embedding_dim, self.data_versions)
+
+        # Contexte des agents : dédoublonnage, MMR et budget de tokens
+        self.context_assembler = ContextAssembler()
+
+        # Embeddings des gros documents : lots concurrents avec réessais
+        self.batch_embedder = BatchingEmbedder(self.embeddings)
+
         # Text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
@@ -70,22 +165,317 @@ class QdrantRAGService:
             length_function=len,
         )
 
-    def _ensure_collection(self) -> None:
-        """Crée la collection Qdrant si elle n'existe pas."""
+    def _ensure_collection(self, collection_name: Optional[str] = None) -> None:
+        """
+        Crée une collection Qdrant si elle n'existe pas (vecteur dense + vecteur creux BM25).
+
+        Une collection existante est mise à niveau : quantification, rattachement des
+        chunks au tenant par défaut, migration des IDs de points et index de payload,
+        chaque étape indépendamment des autres. Le vecteur creux ne peut pas être ajouté à une collection existante : une
+        collection antérieure au mode hybride reste en recherche dense.
+
+        Args:
+            collection_name: Collection (défaut: collection partagée)
+        """
+        collection_name = collection_name or self.collection_name
+        shared = collection_name == self.collection_name
+        sparse_config = {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+
         try:
-            if not self.client.collection_exists(self.collection_name):
+            existed = self.client.collection_exists(collection_name)
+            if not existed:
                 self.client.create_collection(
-                    collection_name=self.collection_name,
+                    collection_name=collection_name,
                     vectors_config=VectorParams(
                         size=self.embedding_dim,
-                        distance=Distance.COSINE
+                        distance=Distance.COSINE,
+                        # Quantifiés en RAM, vecteurs d'origine sur disque pour le rescoring
+                        on_disk=self.quantization.enabled or None
                     ),
+                    sparse_vectors_config=sparse_config,
+                    quantization_config=self.quantization.quantization_config(),
+                    # Collection partagée : un graphe HNSW par tenant, pas de graphe global
+                    # (toutes les requêtes sont filtrées par tenant)
+                    hnsw_config=HnswConfigDiff(payload_m=16, m=0) if shared else None,
                 )
-                print(f"✅ Collection '{self.collection_name}' créée")
+                logger.info("Collection créée", extra={"collection": collection_name})
+                has_sparse = True
             else:
-                print(f"ℹ️  Collection '{self.collection_name}' existe déjà")
+                logger.debug("Collection existante", extra={"collection": collection_name})
+
+                info = self.client.get_collection(collection_name)
+                collection_dim = info.config.params.vectors.size
+                if collection_dim != self.embedding_dim:
+                    raise ValueError(
+                        f"Collection '{collection_name}' en dimension {collection_dim}, backend "
+                        f"'{self.embedding_backend.name}' en dimension {self.embedding_dim} : "
+                        f"utiliser une autre collection ou ré-indexer"
+                    )
+
+                # Collection antérieure au mode hybride : Qdrant n'ajoute pas de vecteur
+                # à une collection existante (recréer la collection et ré-indexer)
+                has_sparse = SPARSE_VECTOR_NAME in (info.config.params.sparse_vectors or {})
+                if not has_sparse:
+                    logger.warning(
+                        f"Collection sans vecteur creux '{SPARSE_VECTOR_NAME}' : recherche dense uniquement "
+                        f"(recréer la collection pour le mode hybride)",
+                        extra={"collection": collection_name}
+                    )
+        except ValueError:
+            raise
         except Exception as e:
-            print(f"⚠️ Erreur création collection : {e}")
+            logger.error(f"Erreur création collection : {e}", extra={"collection": collection_name})
+            return
+
+        # Les points ne portent le vecteur creux que si la collection partagée le déclare
+        if shared:
+            self.sparse_enabled = has_sparse
+
+        steps = []
+        if existed:
+            if not self.quantization.matches(info.config.quantization_config):
+                steps.append(("quantification", lambda: self.migrate_quantization(collection_name=collection_name)))
+            if shared:
+                # Chunks antérieurs au multi-tenant : rattachés au tenant par défaut
+                steps.append(("rattachement au tenant par défaut", lambda: self.client.set_payload(
+                    collection_name=collection_name,
+                    payload={TENANT_FIELD: DEFAULT_TENANT},
+                    points=Filter(must=[IsEmptyCondition(is_empty=PayloadField(key=TENANT_FIELD))])
+                )))
+            steps.append(("migration des IDs de points", lambda: self.migrate_point_ids(collection_name)))
+        steps.append(("index de payload", lambda: self._ensure_payload_indexes(collection_name)))
+
+        # Une étape en échec n'empêche pas les suivantes
+        for label, step in steps:
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"Erreur {label} : {e}", extra={"collection": collection_name})
+
+    def _ensure_payload_indexes(self, collection_name: str) -> None:
+        """Crée les index de payload manquants (tenant_id, doc_id, filename, file_type, uploaded_at...)."""
+        existing = self.client.get_collection(collection_name).payload_schema or {}
+
+        indexes = {TENANT_FIELD: TENANT_INDEX_SCHEMA, **payload_indexes_from_env()}
+        for field, schema in indexes.items():
+            if field not in existing:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=schema
+                )
+                logger.info("Index de payload créé", extra={"collection": collection_name, "field": field})
+
+    def migrate_quantization(self,
+                             quantization: Optional[QuantizationSettings] = None,
+                             collection_name: Optional[str] = None) -> None:
+        """
+        Applique une quantification à une collection existante, sans ré-indexation.
+
+        Qdrant construit les vecteurs quantifiés en arrière-plan ; la collection reste
+        interrogeable pendant la migration (statut "yellow").
+
+        Args:
+            quantization: Quantification cible (défaut: celle du service)
+            collection_name: Collection (défaut: collection partagée)
+        """
+        quantization = quantization or self.quantization
+        collection_name = collection_name or self.collection_name
+        if quantization.mode is None:
+            return
+
+        self.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={DENSE_VECTOR_NAME: VectorParamsDiff(on_disk=quantization.enabled)},
+            quantization_config=quantization.migration_config(),
+        )
+        self.quantization = quantization
+        logger.info("Quantification appliquée", extra={"collection": collection_name, "mode": quantization.mode})
+
+    def migrate_point_ids(self, collection_name: Optional[str] = None) -> int:
+        """
+        Passe les chunks de l'ancien schéma d'IDs au schéma versionné, sans ré-embedding.
+
+        Avant le versionnement, l'ID d'un point était uuid5(doc_id:position) et le payload
+        n'avait pas de "content_hash". Ces points sont ré-écrits sous leur ID versionné
+        (même vecteur, même payload + "content_hash"), puis supprimés : la collection ne
+        garde pas deux copies d'un chunk, et une ré-indexation retrouve les chunks
+        inchangés.
+
+        Args:
+            collection_name: Collection (défaut: collection partagée)
+
+        Returns:
+            Nombre de points migrés
+        """
+        collection_name = collection_name or self.collection_name
+        legacy = IsEmptyCondition(is_empty=PayloadField(key="content_hash"))
+
+        # Documents concernés (payload réduit, sans vecteurs)
+        documents = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=Filter(must=[legacy]),
+                limit=1000,
+                offset=offset,
+                with_payload=["doc_id", TENANT_FIELD],
+                with_vectors=False
+            )
+            documents.update(
+                (point.payload.get(TENANT_FIELD, DEFAULT_TENANT), point.payload.get("doc_id", ""))
+                for point in points
+            )
+            if offset is None:
+                break
+
+        # Un document à la fois : les n° d'occurrence suivent l'ordre des chunks
+        migrated = 0
+        for tenant_id, doc_id in sorted(documents):
+            doc_filter = build_filter(self.tenants.scope(tenant_id, {"doc_id": doc_id}))
+            points = []
+            offset = None
+            while True:
+                batch, offset = self.client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=Filter(must=[*doc_filter.must, legacy]),
+                    limit=1000,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                points.extend(batch)
+                if offset is None:
+                    break
+
+            identity = self.chunk_identity(doc_id, tenant_id)
+            migrated_points = []
+            for point in sorted(points, key=lambda p: p.payload.get("chunk_index", 0)):
+                record = identity.record(point.payload.get("chunk_index", 0), point.payload.get("text", ""))
+                migrated_points.append(PointStruct(
+                    id=record.point_id,
+                    vector=point.vector,
+                    payload={**point.payload, "content_hash": record.content_hash}
+                ))
+
+            self._upsert_points(migrated_points, collection_name=collection_name)
+            new_ids = {point.id for point in migrated_points}
+            old_ids = [point.id for point in points if str(point.id) not in new_ids]
+            for start in range(0, len(old_ids), UPSERT_BATCH_SIZE):
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=PointIdsList(points=old_ids[start:start + UPSERT_BATCH_SIZE])
+                )
+            self.data_versions.bump(self.tenants.resolve(tenant_id))
+            migrated += len(points)
+
+        if migrated:
+            logger.info("Chunks migrés vers les IDs versionnés", extra={"collection": collection_name, "chunks": migrated})
+        return migrated
+
+    def _collection_for(self, tenant_id: Optional[str]) -> str:
+        """
+        Collection d'un tenant (partagée ou dédiée).
+
+        Les collections dédiées créées par un autre processus (worker Celery) sont
+        redécouvertes périodiquement.
+        """
+        if self._tenant_discovery_due():
+            try:
+                self.tenants.discover(c.name for c in self.client.get_collections().collections)
+            except Exception as e:
+                logger.warning(f"Découverte des collections dédiées impossible : {e}")
+        return self.tenants.collection_for(tenant_id)
+
+    def _tenant_discovery_due(self) -> bool:
+        """Indique (et note) qu'il est temps de redécouvrir les collections dédiées."""
+        if self.tenants.threshold <= 0 or time.monotonic() - self._tenants_refreshed_at <= TENANT_DISCOVERY_TTL_SECONDS:
+            return False
+        self._tenants_refreshed_at = time.monotonic()
+        return True
+
+    def chunk_identity(self, doc_id: str, tenant_id: Optional[str] = None) -> ChunkIdentity:
+        """
+        Identité des chunks d'un document, propre au tenant.
+
+        Les IDs du tenant par défaut n'ont pas de préfixe de tenant. Les chunks indexés
+        avant le versionnement (IDs uuid5(doc_id:position)) sont ré-écrits sous ces IDs
+        par `migrate_point_ids`.
+        """
+        tenant_id = self.tenants.resolve(tenant_id)
+        return ChunkIdentity(doc_id, None if tenant_id == DEFAULT_TENANT else tenant_id)
+
+    def count_tenant_points(self, tenant_id: Optional[str] = None) -> int:
+        """
+        Nombre de chunks d'un tenant.
+
+        Args:
+            tenant_id: ID du tenant
+
+        Returns:
+            Nombre de points
+        """
+        return self.client.count(
+            collection_name=self._collection_for(tenant_id),
+            count_filter=build_filter(self.tenants.scope(tenant_id)),
+            exact=True
+        ).count
+
+    def _maybe_promote_tenant(self, tenant_id: Optional[str]) -> None:
+        """Déplace le tenant dans sa propre collection s'il dépasse le seuil."""
+        tenant_id = self.tenants.resolve(tenant_id)
+        if self.tenants.threshold <= 0 or self._collection_for(tenant_id) != self.collection_name:
+            return
+        if self.tenants.should_promote(tenant_id, self.count_tenant_points(tenant_id)):
+            self.promote_tenant(tenant_id)
+
+    def promote_tenant(self, tenant_id: str) -> str:
+        """
+        Déplace les chunks d'un tenant de la collection partagée vers une collection dédiée.
+
+        Les points (vecteurs dense et creux, payload) sont copiés tels quels, sans
+        nouvel embedding. À éviter pendant une indexation en cours pour ce tenant.
+
+        Args:
+            tenant_id: ID du tenant
+
+        Returns:
+            Nom de la collection dédiée
+        """
+        with self._promotion_lock:
+            target = self.tenants.dedicated_collection(tenant_id)
+            self._ensure_collection(target)
+
+            tenant_filter = build_filter(self.tenants.scope(tenant_id))
+            copied = 0
+            offset = None
+
+            while True:
+                points, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=tenant_filter,
+                    limit=UPSERT_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                if points:
+                    self.client.upsert(
+                        collection_name=target,
+                        points=[PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points]
+                    )
+                    copied += len(points)
+                if offset is None:
+                    break
+
+            # Bascule du routage, puis nettoyage de la collection partagée
+            self.tenants.mark_dedicated(tenant_id)
+            self.data_versions.bump(self.tenants.resolve(tenant_id))
+            self.client.delete(collection_name=self.collection_name, points_selector=tenant_filter)
+
+            logger.info("Tenant déplacé vers sa collection", extra={"tenant_id": tenant_id, "collection": target, "chunks": copied})
+            return target
 
     def load_document(self, file_path: str) -> str:
         """
@@ -97,224 +487,564 @@ class QdrantRAGService:
         Returns:
             Contenu du document
         """
-        file_extension = os.path.splitext(file_path)[1].lower()
-
         try:
-            if file_extension == '.pdf':
-                loader = PyPDFLoader(file_path)
-            elif file_extension == '.txt':
-                loader = TextLoader(file_path, encoding='utf-8')
-            elif file_extension in ['.doc', '.docx']:
-                loader = UnstructuredWordDocumentLoader(file_path)
-            elif file_extension in ['.xls', '.xlsx']:
-                loader = UnstructuredExcelLoader(file_path)
-            else:
-                # Fallback
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-
-            documents = loader.load()
-            return "\n\n".join([doc.page_content for doc in documents])
-
+            return "".join(iter_document_pages(file_path)).rstrip("\n")
         except Exception as e:
             raise Exception(f"Erreur chargement document : {str(e)}")
 
+    def index_file(self,
+                   file_path: str,
+                   doc_id: str,
+                   metadata: Dict[str, Any] = None,
+                   progress_callback: Optional[ProgressCallback] = None,
+                   tenant_id: Optional[str] = None) -> List[str]:
+        """
+        Indexe un fichier en flux, à mémoire bornée (voir `ingestion`).
+
+        Les premiers chunks sont interrogeables avant la fin de l'indexation.
+
+        Args:
+            file_path: Chemin du fichier
+            doc_id: ID unique du document
+            metadata: Métadonnées (complétées par filename, file_type et uploaded_at)
+            progress_callback: Appelé avec (étape, fait, None) pour les étapes
+                               "pages", "embedded" et "upserted"
+            tenant_id: Tenant propriétaire du document (défaut: DEFAULT_TENANT)
+
+        Returns:
+            Liste des IDs des chunks indexés
+        """
+        # Métadonnées filtrables par défaut (champs indexés)
+        metadata = {
+            "filename": os.path.basename(file_path),
+            "file_type": os.path.splitext(file_path)[1].lstrip(".").lower(),
+            "uploaded_at": datetime.now(timezone.utc).isoformat(),
+            **(metadata or {})
+        }
+
+        chunk_ids = StreamingIngestionPipeline(self).run(
+            file_path, doc_id, metadata, progress_callback, tenant_id=tenant_id
+        )
+        logger.info("Document indexé", extra={"doc_id": doc_id, "chunks": len(chunk_ids)})
+
+        self._maybe_promote_tenant(tenant_id)
+        return chunk_ids
+
     def index_document(self,
                       doc_id: str,
                       content: str,
-                      metadata: Dict[str, Any] = None) -> List[str]:
+                      metadata: Dict[str, Any] = None,
+                      progress_callback: Optional[ProgressCallback] = None,
+                      tenant_id: Optional[str] = None) -> List[str]:
         """
-        Indexe un document dans Qdrant.
+        Indexe (ou ré-indexe) un document dans Qdrant.
+
+        Ré-indexation incrémentale : seuls les chunks nouveaux ou modifiés sont
+        embarqués ; les chunks qui ont disparu sont supprimés.
 
         Args:
             doc_id: ID unique du document
             content: Contenu du document
             metadata: Métadonnées
+            progress_callback: Appelé avec (étape, fait, total) pour les étapes
+                               "embedded" et "upserted"
+            tenant_id: Tenant propriétaire du document (défaut: DEFAULT_TENANT)
 
         Returns:
             Liste des IDs des chunks indexés
         """
-        # Découper en chunks
-        chunks = self.text_splitter.split_text(content)
+        # Découper en chunks et les identifier par leur contenu
+        identity = self.chunk_identity(doc_id, tenant_id)
+        records = [identity.record(i, chunk) for i, chunk in enumerate(self.text_splitter.split_text(content))]
 
-        # Créer les embeddings
-        embeddings_list = self.embeddings.embed_documents(chunks)
+        existing_ids = self.existing_chunk_ids(doc_id, tenant_id)
+        fresh = [record for record in records if record.point_id not in existing_ids]
 
-        # Préparer les points Qdrant
-        points = []
-        chunk_ids = []
+        # Créer les embeddings des seuls chunks nouveaux (lots concurrents)
+        vectors = self.batch_embedder.embed_documents([record.text for record in fresh], progress_callback)
+
+        # Écrire dans Qdrant par lots, puis retirer les chunks disparus
+        stats = self.write_chunks(
+            doc_id,
+            records,
+            dict(zip((record.point_id for record in fresh), vectors)),
+            metadata,
+            progress_callback,
+            tenant_id=tenant_id
+        )
+        stats.deleted = self.delete_chunks(existing_ids - {record.point_id for record in records}, tenant_id)
+
+        logger.info("Document indexé", extra={"doc_id": doc_id, "chunks": len(records), **stats.to_dict()})
+
+        self._maybe_promote_tenant(tenant_id)
+        return [record.point_id for record in records]
+
+    def existing_chunk_ids(self, doc_id: str, tenant_id: Optional[str] = None) -> Set[str]:
+        """
+        IDs des chunks déjà indexés pour un document.
+
+        Args:
+            doc_id: ID du document
+            tenant_id: Tenant propriétaire du document
+
+        Returns:
+            Ensemble des IDs de points
+        """
+        doc_filter = build_filter(self.tenants.scope(tenant_id, {"doc_id": doc_id}))
+        collection_name = self._collection_for(tenant_id)
+        ids: Set[str] = set()
+        offset = None
+
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=doc_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=False,
+                with_vectors=False
+            )
+            ids.update(str(point.id) for point in points)
+            if offset is None:
+                return ids
+
+    def write_chunks(self,
+                     doc_id: str,
+                     records: List[ChunkRecord],
+                     vectors: Dict[str, List[float]],
+                     metadata: Dict[str, Any] = None,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     tenant_id: Optional[str] = None) -> ReindexStats:
+        """
+        Écrit des chunks d'un document.
+
+        Les chunks embarqués (présents dans `vectors`) sont upsertés ; les autres,
+        déjà indexés, ne reçoivent qu'une mise à jour du payload (position, métadonnées).
+
+        Args:
+            doc_id: ID du document
+            records: Chunks identifiés
+            vectors: {point_id: vecteur} des chunks nouveaux ou modifiés
+            metadata: Métadonnées
+            progress_callback: Appelé avec ("upserted", fait, total) après chaque lot
+            tenant_id: Tenant propriétaire du document
 
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings_list)):
-            # ID unique basé sur le doc_id + index
-            chunk_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc_id}:{i}"))
-            chunk_ids.append(chunk_id)
+        Returns:
+            Nombre de chunks embarqués et inchangés
+        """
+        collection_name = self._collection_for(tenant_id)
+        points = []
+        payload_updates = []
 
+        for record in records:
             # Payload avec métadonnées
             payload = {
                 **(metadata or {}),
                 "doc_id": doc_id,
-                "chunk_index": i,
-                "text": chunk
+                TENANT_FIELD: self.tenants.resolve(tenant_id),
+                "chunk_index": record.index,
+                "content_hash": record.content_hash,
+                "text": record.text
             }
 
-            points.append(
-                PointStruct(
-                    id=chunk_id,
-                    vector=embedding,
-                    payload=payload
+            vector = vectors.get(record.point_id)
+            if vector is not None:
+                if self.sparse_enabled:
+                    vector = {
+                        DENSE_VECTOR_NAME: vector,
+                        SPARSE_VECTOR_NAME: self.sparse_encoder.encode_document(record.text)
+                    }
+                points.append(PointStruct(id=record.point_id, vector=vector, payload=payload))
+            else:
+                del payload["text"]
+                payload_updates.append(
+                    SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[record.point_id]))
                 )
+
+        self._upsert_points(points, progress_callback, collection_name)
+
+        for start in range(0, len(payload_updates), UPSERT_BATCH_SIZE):
+            self.client.batch_update_points(
+                collection_name=collection_name,
+                update_operations=payload_updates[start:start + UPSERT_BATCH_SIZE]
             )
 
-        # Upsert dans Qdrant
-        self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
-        )
+        if points or payload_updates:
+            self.data_versions.bump(self.tenants.resolve(tenant_id))
 
-        print(f"✅ {len(chunks)} chunks indexés pour le document '{doc_id}'")
+        return ReindexStats(embedded=len(points), unchanged=len(payload_updates))
 
-        return chunk_ids
+    def delete_chunks(self, point_ids: Iterable[str], tenant_id: Optional[str] = None) -> int:
+        """
+        Supprime des chunks par ID.
+
+        Args:
+            point_ids: IDs des points à supprimer
+            tenant_id: Tenant propriétaire des chunks
+
+        Returns:
+            Nombre de chunks supprimés
+        """
+        point_ids = list(point_ids)
+        collection_name = self._collection_for(tenant_id)
+        for start in range(0, len(point_ids), UPSERT_BATCH_SIZE):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=point_ids[start:start + UPSERT_BATCH_SIZE])
+            )
+        if point_ids:
+            self.data_versions.bump(self.tenants.resolve(tenant_id))
+        return len(point_ids)
+
+    def _upsert_points(self,
+                       points: List[PointStruct],
+                       progress_callback: Optional[ProgressCallback] = None,
+                       collection_name: Optional[str] = None) -> None:
+        """
+        Upsert des points par lots de UPSERT_BATCH_SIZE.
+
+        Args:
+            points: Points à écrire
+            progress_callback: Appelé avec ("upserted", fait, total) après chaque lot
+            collection_name: Collection cible (défaut: collection partagée)
+        """
+        for start in range(0, len(points), UPSERT_BATCH_SIZE):
+            batch = points[start:start + UPSERT_BATCH_SIZE]
+            self.client.upsert(
+                collection_name=collection_name or self.collection_name,
+                points=batch
+            )
+            if progress_callback:
+                progress_callback("upserted", start + len(batch), len(points))
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(self,
+               query: str,
+               top_k: int = 5,
+               mode: Optional[str] = None,
+               filters: Optional[Dict[str, Any]] = None,
+               tenant_id: Optional[str] = None,
+               with_vectors: bool = False,
+               meeting_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Recherche sémantique dans Qdrant.
+        Recherche dans Qdrant (sémantique, ou hybride sémantique + lexicale).
 
         Args:
             query: Requête de recherche
             top_k: Nombre de résultats
+            mode: SEARCH_DENSE ou SEARCH_HYBRID (défaut: mode du service)
+            filters: Expression de filtre sur le payload (voir `filters`), ex.
+                     {"file_type": "pdf", "uploaded_at": {"gte": "2024-01-01T00:00:00Z"}}
+            tenant_id: Tenant interrogé (défaut: DEFAULT_TENANT) ; seuls ses chunks
+                       sont visibles
+            with_vectors: Ajoute le vecteur dense de chaque résultat ("vector"),
+                          utilisé par l'assemblage du contexte
+            meeting_id: Réunion à l'origine de la recherche (statistiques du cache
+                        sémantique, voir `query_cache`)
 
         Returns:
-            Liste des résultats avec score et contenu
+            Liste des résultats avec score et contenu. `score_type` vaut "cosine"
+            (similarité) ou "rrf" (rang fusionné, non comparable à un seuil cosinus)
         """
+        mode = mode or self.search_mode
+        query_filter = build_filter(self.tenants.scope(tenant_id, filters))
+        collection_name = self._collection_for(tenant_id)
+
         # Créer l'embedding de la requête
         query_embedding = self.embeddings.embed_query(query)
 
-        # Rechercher dans Qdrant (nouvelle API)
-        try:
-            # API moderne (Qdrant >= 1.7.0)
+        # Requête proche déjà cherchée (mêmes tenant, mode, filtres et top_k)
+        scope = self.cache_scope(tenant_id, mode, top_k, filters, with_vectors)
+        cached, version = self.query_cache.lookup(query_embedding, scope, meeting_id)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        if mode == SEARCH_HYBRID and self.sparse_enabled:
             response = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_embedding,
-                with_payload=True,
-                limit=top_k
+                **self._hybrid_request(query, query_embedding, top_k, query_filter, collection_name, with_vectors)
             )
-            results = response.points
-        except AttributeError:
-            # Ancienne API (fallback pour versions < 1.7.0)
-            results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_embedding,
-                with_payload=True,
-                limit=top_k
+            results = self.format_results(response.points, "rrf")
+        else:
+            results = self.format_results(
+                self._dense_query(query_embedding, top_k, query_filter, collection_name, with_vectors), "cosine"
             )
 
-        # Formater les résultats
+        self.query_cache.store(query_embedding, scope, results, version, time.perf_counter() - started)
+        return results
+
+    def cache_scope(self,
+                    tenant_id: Optional[str],
+                    mode: str,
+                    top_k: int,
+                    filters: Optional[Dict[str, Any]],
+                    with_vectors: bool) -> tuple:
+        """Portée d'une recherche dans le cache sémantique."""
+        return SemanticQueryCache.scope_key(
+            self.tenants.resolve(tenant_id), mode=mode, top_k=top_k, filters=filters, with_vectors=with_vectors
+        )
+
+    @staticmethod
+    def format_results(results: List[Any], score_type: str) -> List[Dict[str, Any]]:
+        """
+        Formate les points Qdrant en résultats de recherche.
+
+        Args:
+            results: Points retournés par Qdrant
+            score_type: "cosine" ou "rrf"
+
+        Returns:
+            Liste des résultats avec score et contenu
+        """
         formatted_results = []
         for result in results:
             payload = getattr(result, "payload", None) or {}
 
-            formatted_results.append({
+            formatted = {
                 "id": str(result.id),
                 "score": result.score,
+                "score_type": score_type,
                 "text": payload.get("text", ""),
                 "doc_id": payload.get("doc_id", ""),
                 "metadata": payload
-            })
+            }
+
+            # Vecteur dense (vecteurs nommés : dense "" + creux "bm25")
+            vector = getattr(result, "vector", None)
+            if vector is not None:
+                formatted["vector"] = vector.get(DENSE_VECTOR_NAME) if isinstance(vector, dict) else vector
+
+            formatted_results.append(formatted)
 
         return formatted_results
 
-    def delete_document(self, doc_id: str) -> None:
+    def _dense_query(self,
+                     query_embedding: List[float],
+                     top_k: int,
+                     query_filter: Any = None,
+                     collection_name: Optional[str] = None,
+                     with_vectors: bool = False) -> List[Any]:
+        """Recherche par similarité cosinus seule."""
+        request = self._dense_request(query_embedding, top_k, query_filter, collection_name, with_vectors)
+        # Rechercher dans Qdrant (nouvelle API)
+        try:
+            # API moderne (Qdrant >= 1.7.0)
+            return self.client.query_points(**request).points
+        except AttributeError:
+            # Ancienne API (fallback pour versions < 1.7.0)
+            request["query_vector"] = request.pop("query")
+            return self.client.search(**request)
+
+    def _dense_request(self,
+                       query_embedding: List[float],
+                       top_k: int,
+                       query_filter: Any = None,
+                       collection_name: Optional[str] = None,
+                       with_vectors: bool = False) -> Dict[str, Any]:
+        """Paramètres de `query_points` pour une recherche par similarité cosinus."""
+        return {
+            "collection_name": collection_name or self.collection_name,
+            "query": query_embedding,
+            "query_filter": query_filter,
+            "search_params": self.quantization.search_params(),
+            "with_payload": True,
+            "with_vectors": with_vectors,
+            "limit": top_k,
+        }
+
+    def _hybrid_request(self,
+                        query: str,
+                        query_embedding: List[float],
+                        top_k: int,
+                        query_filter: Any = None,
+                        collection_name: Optional[str] = None,
+                        with_vectors: bool = False) -> Dict[str, Any]:
+        """Paramètres de `query_points` pour une recherche dense + BM25 fusionnée par RRF côté Qdrant."""
+        prefetch_limit = top_k * HYBRID_PREFETCH_FACTOR
+        prefetch = [Prefetch(
+            query=query_embedding,
+            filter=query_filter,
+            params=self.quantization.search_params(),
+            limit=prefetch_limit
+        )]
+
+        sparse_query = self.sparse_encoder.encode_query(query)
+        if sparse_query.indices:
+            prefetch.append(Prefetch(
+                query=sparse_query,
+                using=SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=prefetch_limit
+            ))
+
+        return {
+            "collection_name": collection_name or self.collection_name,
+            "prefetch": prefetch,
+            "query": FusionQuery(fusion=Fusion.RRF),
+            "query_filter": query_filter,
+            "with_payload": True,
+            "with_vectors": with_vectors,
+            "limit": top_k,
+        }
+
+    def delete_document(self, doc_id: str, tenant_id: Optional[str] = None) -> None:
         """
         Supprime tous les chunks d'un document.
 
         Args:
             doc_id: ID du document
+            tenant_id: Tenant propriétaire du document
         """
         try:
-            # Qdrant permet de filtrer par metadata
-            from qdrant_client.models import Filter, FieldCondition, MatchValue
-
+            # Filtre sur tenant_id + doc_id (champs indexés : pas de parcours complet)
             self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=Filter(
-                    must=[
-                        FieldCondition(
-                            key="doc_id",
-                            match=MatchValue(value=doc_id)
-                        )
-                    ]
-                )
+                collection_name=self._collection_for(tenant_id),
+                points_selector=build_filter(self.tenants.scope(tenant_id, {"doc_id": doc_id}))
             )
-            print(f"✅ Document '{doc_id}' supprimé")
+            self.data_versions.bump(self.tenants.resolve(tenant_id))
+            logger.info("Document supprimé", extra={"doc_id": doc_id})
 
         except Exception as e:
-            print(f"⚠️ Erreur suppression document : {e}")
+            logger.error(f"Erreur suppression document : {e}", extra={"doc_id": doc_id})
 
-    def get_relevant_context(self, query: str, max_chars: int = 3000) -> str:
+    def export_snapshot(self, directory: Optional[str] = None) -> str:
         """
-        Récupère le contexte pertinent formaté pour les agents.
+        Exporte l'index (vecteurs .npy + payloads compressés, voir `snapshot`).
+
+        Args:
+            directory: Répertoire des instantanés (défaut: RAG_SNAPSHOT_DIR)
+
+        Returns:
+            Chemin de l'instantané créé
+        """
+        return export_snapshot(self, directory)
+
+    def import_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Importe un instantané par upserts groupés, sans aucun appel d'embedding.
+
+        Args:
+            path: Instantané (défaut: dernier instantané de la collection)
+
+        Returns:
+            Nombre de points importés
+        """
+        return import_snapshot(self, path)
+
+    def get_relevant_context(self,
+                             query: str,
+                             token_budget: Optional[int] = None,
+                             results: Optional[List[Dict[str, Any]]] = None,
+                             filters: Optional[Dict[str, Any]] = None,
+                             tenant_id: Optional[str] = None) -> str:
+        """
+        Récupère le contexte pertinent formaté pour les agents (voir `assembly`).
 
         Args:
             query: Requête
-            max_chars: Nombre max de caractères
+            token_budget: Budget de tokens du contexte (défaut: RAG_CONTEXT_TOKEN_BUDGET)
+            results: Résultats déjà obtenus par `search` (évite une seconde recherche)
+            filters: Expression de filtre sur le payload (voir `search`)
+            tenant_id: Tenant interrogé
 
         Returns:
             Contexte formaté
         """
-        results = self.search(query, top_k=5)
-
-        if not results:
-            return ""
+        return self.assemble_context(query, token_budget, results, filters, tenant_id).text
 
-        context_parts = ["=== DOCUMENTS DE RÉFÉRENCE PERTINENTS ===\n"]
-        total_chars = 0
+    def assemble_context(self,
+                         query: str,
+                         token_budget: Optional[int] = None,
+                         results: Optional[List[Dict[str, Any]]] = None,
+                         filters: Optional[Dict[str, Any]] = None,
+                         tenant_id: Optional[str] = None) -> AssembledContext:
+        """
+        Contexte dédoublonné, diversifié et ajusté à un budget de tokens.
 
-        for i, result in enumerate(results, 1):
-            text = result['text']
-            score = result['score']
+        Args:
+            query: Requête
+            token_budget: Budget de tokens du contexte (défaut: RAG_CONTEXT_TOKEN_BUDGET)
+            results: Résultats déjà obtenus par `search`, de préférence avec
+                     `with_vectors=True` (évite une seconde recherche)
+            filters: Expression de filtre sur le payload (voir `search`)
+            tenant_id: Tenant interrogé
 
-            # Limiter la longueur
-            if total_chars + len(text) > max_chars:
-                remaining_chars = max_chars - total_chars
-                text = text[:remaining_chars] + "..."
+        Returns:
+            Contexte assemblé (texte, blocs retenus, tokens, bilan)
+        """
+        if results is None:
+            results = self.search(
+                query, top_k=CONTEXT_CANDIDATES, filters=filters, tenant_id=tenant_id, with_vectors=True
+            )
 
-            context_parts.append(f"[Document {i} - Score: {score:.2f}]")
-            context_parts.append(text)
-            context_parts.append("")
+        return self.context_assembler.assemble(results, token_budget=token_budget)
 
-            total_chars += len(text)
+    def describe_collection(self, info: Any) -> Dict[str, Any]:
+        """
+        Statistiques à partir de la description Qdrant de la collection partagée.
 
-            if total_chars >= max_chars:
-                break
+        Args:
+            info: Résultat de `get_collection`
 
-        return "\n".join(context_parts)
+        Returns:
+            Statistiques
+        """
+        mode = quantization_mode(info.config.quantization_config)
+        return {
+            "total_vectors": info.points_count,
+            "vector_size": self.embedding_dim,
+            "embedding_backend": self.embedding_backend.name,
+            "embedding_model": self.embedding_model,
+            "search_mode": self.search_mode,
+            "quantization": mode,
+            "estimated_vector_ram_bytes": estimate_vector_memory(info.points_count or 0, self.embedding_dim, mode),
+            "status": info.status,
+            "dedicated_tenant_collections": len(self.tenants.dedicated),
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "query_cache": self.query_cache.get_stats()
+        }
 
-    def get_collection_stats(self) -> Dict[str, Any]:
+    def get_collection_stats(self, tenant_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Récupère les statistiques de la collection.
 
+        Args:
+            tenant_id: Si précisé, ajoute la collection et le nombre de chunks du tenant
+
         Returns:
             Statistiques
         """
         try:
-            info = self.client.get_collection(self.collection_name)
-            return {
-                "total_vectors": info.points_count,
-                "vector_size": self.embedding_dim,
-                "status": info.status
-            }
+            stats = self.describe_collection(self.client.get_collection(self.collection_name))
+            if tenant_id is not None:
+                stats["tenant"] = {
+                    "tenant_id": tenant_id,
+                    "collection": self._collection_for(tenant_id),
+                    "vectors": self.count_tenant_points(tenant_id)
+                }
+            return stats
         except Exception as e:
             return {"error": str(e)}
 
 
 # Instance globale
 _qdrant_service: Optional[QdrantRAGService] = None
+_qdrant_service_lock = threading.Lock()
 
 
 def get_qdrant_service() -> QdrantRAGService:
-    """Récupère l'instance globale du service Qdrant."""
+    """
+    Récupère l'instance globale du service Qdrant.
+
+    Le backend est choisi par la configuration (QDRANT_MODE, QDRANT_HOST...) :
+    l'API et les workers Celery partagent ainsi le même index, qui survit aux redémarrages.
+    """
     global _qdrant_service
     if _qdrant_service is None:
-        # Mode en mémoire par défaut (pas besoin de serveur!)
-        _qdrant_service = QdrantRAGService()
+        # Peut être appelé depuis plusieurs threads (asyncio.to_thread côté API)
+        with _qdrant_service_lock:
+            if _qdrant_service is None:
+                service = QdrantRAGService(store_config=VectorStoreConfig.from_env())
+                # Démarrage à chaud depuis le dernier instantané (RAG_SNAPSHOT_LOAD_ON_STARTUP)
+                load_snapshot_on_startup(service)
+                _qdrant_service = service
     return _qdrant_service
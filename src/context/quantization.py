@@ -0,0 +1,149 @@
+"""
+Quantification des vecteurs de la collection Qdrant.
+
+- "scalar" : int8, ~4x moins de RAM
+- "binary" : 1 bit par dimension, ~32x moins de RAM (adapté aux grandes dimensions,
+             ex. 1536 d'OpenAI)
+
+Les vecteurs quantifiés restent en RAM, les vecteurs d'origine passent sur disque.
+Les `top_k * oversampling` meilleurs candidats sont re-classés (rescoring) avec les
+vecteurs d'origine.
+
+Configuration par variables d'environnement :
+    QDRANT_QUANTIZATION   "none", "scalar" ou "binary" (non défini : collection laissée telle quelle)
+    QDRANT_RESCORE        Re-classement avec les vecteurs d'origine (défaut: true)
+    QDRANT_OVERSAMPLING   Facteur de sur-échantillonnage (défaut: 2.0 scalar, 3.0 binary)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams
+)
+
+QUANTIZATION_NONE = "none"
+QUANTIZATION_SCALAR = "scalar"
+QUANTIZATION_BINARY = "binary"
+
+DEFAULT_OVERSAMPLING = {
+    QUANTIZATION_SCALAR: 2.0,
+    QUANTIZATION_BINARY: 3.0,
+}
+
+# Octets par dimension (estimation de la RAM des vecteurs)
+BYTES_PER_DIMENSION = {
+    QUANTIZATION_NONE: 4.0,
+    QUANTIZATION_SCALAR: 1.0,
+    QUANTIZATION_BINARY: 1 / 8,
+}
+
+
+@dataclass
+class QuantizationSettings:
+    """Quantification souhaitée pour la collection (mode None : ne rien changer)."""
+    mode: Optional[str] = None
+    rescore: bool = True
+    oversampling: Optional[float] = None
+
+    def __post_init__(self):
+        if self.mode not in (None, QUANTIZATION_NONE, QUANTIZATION_SCALAR, QUANTIZATION_BINARY):
+            raise ValueError(f"Quantification inconnue : {self.mode}")
+        if self.oversampling is None and self.mode in DEFAULT_OVERSAMPLING:
+            self.oversampling = DEFAULT_OVERSAMPLING[self.mode]
+
+    @classmethod
+    def from_env(cls) -> "QuantizationSettings":
+        """Construit la configuration depuis l'environnement (voir docstring du module)."""
+        oversampling = os.getenv("QDRANT_OVERSAMPLING")
+        return cls(
+            mode=(os.getenv("QDRANT_QUANTIZATION") or "").lower() or None,
+            rescore=os.getenv("QDRANT_RESCORE", "true").lower() == "true",
+            oversampling=float(oversampling) if oversampling else None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in (QUANTIZATION_SCALAR, QUANTIZATION_BINARY)
+
+    def quantization_config(self) -> Any:
+        """
+        Configuration Qdrant de la quantification.
+
+        Returns:
+            ScalarQuantization, BinaryQuantization, ou None sans quantification
+        """
+        if self.mode == QUANTIZATION_SCALAR:
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if self.mode == QUANTIZATION_BINARY:
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def search_params(self) -> Optional[SearchParams]:
+        """Paramètres de recherche (rescoring et sur-échantillonnage), ou None sans quantification."""
+        if not self.enabled:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        )
+
+    def matches(self, current_config: Any) -> bool:
+        """
+        Indique si la configuration actuelle d'une collection correspond déjà.
+
+        Args:
+            current_config: `config.quantization_config` de la collection
+
+        Returns:
+            True si aucune migration n'est nécessaire
+        """
+        return self.mode is None or self.mode == quantization_mode(current_config)
+
+    def migration_config(self) -> Any:
+        """Configuration à appliquer à une collection existante (Disabled pour retirer la quantification)."""
+        return self.quantization_config() or Disabled.DISABLED
+
+
+def quantization_mode(current_config: Any) -> str:
+    """
+    Mode de quantification d'une collection existante.
+
+    Args:
+        current_config: `config.quantization_config` de la collection
+
+    Returns:
+        QUANTIZATION_SCALAR, QUANTIZATION_BINARY ou QUANTIZATION_NONE
+    """
+    if isinstance(current_config, ScalarQuantization):
+        return QUANTIZATION_SCALAR
+    if isinstance(current_config, BinaryQuantization):
+        return QUANTIZATION_BINARY
+    return QUANTIZATION_NONE
+
+
+def estimate_vector_memory(points: int, dimension: int, mode: Optional[str]) -> int:
+    """
+    RAM approximative des vecteurs interrogés (hors index HNSW).
+
+    Args:
+        points: Nombre de points
+        dimension: Dimension des vecteurs
+        mode: Quantification
+
+    Returns:
+        Octets
+    """
+    return int(points * dimension * BYTES_PER_DIMENSION[mode or QUANTIZATION_NONE])
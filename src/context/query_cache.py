@@ -0,0 +1,278 @@
+"""
+Cache sémantique des recherches RAG.
+
+Dans une réunion, les messages successifs sont souvent des quasi-paraphrases, et le
+client vocal temps réel interroge `/api/rag` à chaque énoncé. Le cache garde les
+embeddings des requêtes récentes avec leurs résultats : si une nouvelle requête est
+assez proche (cosinus) d'une requête en cache, dans la même portée (tenant, mode,
+filtres, top_k), ses résultats sont réutilisés sans interroger Qdrant.
+
+Les comparaisons sont vectorisées (un produit matrice-vecteur sur les entrées en
+cache). Les vecteurs des résultats (`with_vectors=True`, pour le MMR) sont gardés en
+tableaux float32 en lecture seule, partagés entre les copies rendues par `lookup`
+(~6 Ko par résultat en 1536 dimensions, au lieu de ~50 Ko en liste de floats Python). Chaque entrée note la version de la collection du tenant à son insertion :
+toute indexation ou suppression incrémente la version et invalide les entrées.
+Avec Redis, la version est partagée entre l'API et les workers Celery ; sans Redis,
+elle ne couvre que les écritures du processus.
+
+Configuration par variables d'environnement :
+    RAG_QUERY_CACHE_SIZE        Requêtes gardées en cache (défaut: 512, 0 = désactivé)
+    RAG_QUERY_CACHE_THRESHOLD   Similarité cosinus minimale d'un hit (défaut: 0.93)
+    RAG_QUERY_CACHE_TTL         Durée de vie d'une entrée en secondes (défaut: 600)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from monitoring import get_logger
+
+logger = get_logger("query_cache")
+
+# Poids de la dernière mesure dans la latence moyenne d'une recherche
+LATENCY_SMOOTHING = 0.1
+
+# Réunions suivies au maximum dans les statistiques (les plus anciennes sont oubliées)
+MAX_TRACKED_MEETINGS = 1000
+
+
+class CollectionVersion:
+    """
+    Version des données d'un tenant, incrémentée à chaque écriture.
+
+    Redis (REDIS_URL) si disponible, sinon compteur local au processus.
+    """
+
+    def __init__(self, collection_name: str, redis_url: Optional[str] = None):
+        """
+        Args:
+            collection_name: Collection partagée (préfixe des clés)
+            redis_url: URL Redis (défaut: REDIS_URL ; None = compteur local)
+        """
+        self.prefix = f"rag:version:{collection_name}:"
+        self._local: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.client = None
+
+        redis_url = redis_url or os.getenv("REDIS_URL")
+        if redis_url:
+            try:
+                import redis
+                self.client = redis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Version de collection locale au processus (Redis indisponible) : {e}")
+
+    def get(self, tenant_id: str) -> int:
+        """Version courante des données du tenant."""
+        if self.client is not None:
+            try:
+                return int(self.client.get(self.prefix + tenant_id) or 0)
+            except Exception as e:
+                logger.warning(f"Lecture de version impossible : {e}")
+        with self._lock:
+            return self._local.get(tenant_id, 0)
+
+    def bump(self, tenant_id: str) -> None:
+        """Invalide les recherches en cache du tenant (après une écriture)."""
+        with self._lock:
+            self._local[tenant_id] = self._local.get(tenant_id, 0) + 1
+        if self.client is not None:
+            try:
+                self.client.incr(self.prefix + tenant_id)
+            except Exception as e:
+                logger.warning(f"Incrément de version impossible : {e}")
+
+
+class SemanticQueryCache:
+    """Résultats de recherche réutilisés pour les requêtes sémantiquement proches."""
+
+    def __init__(self,
+                 dimension: int,
+                 versions: CollectionVersion,
+                 max_entries: Optional[int] = None,
+                 threshold: Optional[float] = None,
+                 ttl: Optional[float] = None):
+        """
+        Args:
+            dimension: Dimension des embeddings de requête
+            versions: Versions des données par tenant
+            max_entries: Entrées au maximum (défaut: RAG_QUERY_CACHE_SIZE)
+            threshold: Similarité cosinus minimale (défaut: RAG_QUERY_CACHE_THRESHOLD)
+            ttl: Durée de vie d'une entrée (défaut: RAG_QUERY_CACHE_TTL)
+        """
+        self.versions = versions
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("RAG_QUERY_CACHE_SIZE", "512"))
+        self.threshold = threshold if threshold is not None else float(os.getenv("RAG_QUERY_CACHE_THRESHOLD", "0.93"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("RAG_QUERY_CACHE_TTL", "600"))
+
+        # Tampon circulaire : une ligne par entrée (embedding normalisé)
+        capacity = max(self.max_entries, 1)
+        self._vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self._scopes = np.full(capacity, -1, dtype=np.int64)
+        self._versions = np.zeros(capacity, dtype=np.int64)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._results: List[Optional[List[Dict[str, Any]]]] = [None] * capacity
+        self._scope_ids: Dict[tuple, int] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+        # Latence moyenne d'une recherche Qdrant (estimation du temps économisé par hit)
+        self.avg_search_seconds = 0.0
+        self._stats: Dict[tuple, Dict[str, float]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def scope_key(tenant_id: str, **params: Any) -> tuple:
+        """Portée d'une recherche : seules les recherches de même portée se répondent."""
+        return (tenant_id,) + tuple(sorted((name, repr(value)) for name, value in params.items()))
+
+    @staticmethod
+    def _compact(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copie d'un résultat dont le vecteur éventuel est un tableau float32 en lecture seule."""
+        result = dict(result)
+        vector = result.get("vector")
+        if vector is not None:
+            vector = np.array(vector, dtype=np.float32)
+            vector.flags.writeable = False
+            result["vector"] = vector
+        return result
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self,
+               query_embedding: Sequence[float],
+               scope: tuple,
+               meeting_id: Optional[str] = None) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        """
+        Résultats d'une requête proche déjà en cache.
+
+        Args:
+            query_embedding: Embedding de la requête
+            scope: Portée (voir `scope_key`) ; le tenant en est le premier élément
+            meeting_id: Réunion à créditer dans les statistiques
+
+        Returns:
+            Tuple (copie des résultats en cache ou None si miss, version des données
+            à transmettre à `store` après la recherche)
+        """
+        if not self.enabled:
+            return None, 0
+
+        query = self._normalize(query_embedding)
+        version = self.versions.get(scope[0])
+
+        with self._lock:
+            scope_id = self._scope_ids.get(scope)
+            hit = None
+            if scope_id is not None:
+                valid = (
+                    (self._scopes == scope_id)
+                    & (self._versions == version)
+                    & (self._expires > time.monotonic())
+                )
+                if valid.any():
+                    similarity = np.where(valid, self._vectors @ query, -np.inf)
+                    best = int(np.argmax(similarity))
+                    if similarity[best] >= self.threshold:
+                        hit = self._results[best]
+
+            self._record(scope[0], meeting_id, hit is not None)
+
+        # Copies : les appelants peuvent modifier les résultats (ex. retrait des vecteurs)
+        return ([dict(result) for result in hit] if hit is not None else None), version
+
+    def store(self,
+              query_embedding: Sequence[float],
+              scope: tuple,
+              results: List[Dict[str, Any]],
+              version: int,
+              search_seconds: float) -> None:
+        """
+        Met en cache les résultats d'une recherche.
+
+        Args:
+            query_embedding: Embedding de la requête
+            scope: Portée (voir `scope_key`)
+            results: Résultats de la recherche
+            version: Version lue par `lookup` avant la recherche (une écriture pendant
+                     la recherche rend l'entrée aussitôt périmée)
+            search_seconds: Durée de la recherche Qdrant (temps économisé par un hit)
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            scope_id = self._scope_ids.setdefault(scope, len(self._scope_ids))
+            slot = self._next
+            self._next = (self._next + 1) % len(self._results)
+
+            self._vectors[slot] = self._normalize(query_embedding)
+            self._scopes[slot] = scope_id
+            self._versions[slot] = version
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._results[slot] = [self._compact(result) for result in results]
+
+            if self.avg_search_seconds:
+                self.avg_search_seconds += LATENCY_SMOOTHING * (search_seconds - self.avg_search_seconds)
+            else:
+                self.avg_search_seconds = search_seconds
+
+    def _record(self, tenant_id: str, meeting_id: Optional[str], hit: bool) -> None:
+        # Compteurs du processus (None, None), du tenant (tenant, None) et de la réunion
+        keys = [(None, None), (tenant_id, None)]
+        if meeting_id:
+            keys.append((tenant_id, meeting_id))
+
+        if any(key not in self._stats for key in keys) and len(self._stats) > MAX_TRACKED_MEETINGS:
+            # Compteurs les plus anciens (hors total du processus, toujours en tête)
+            del self._stats[next(key for key in self._stats if key != (None, None))]
+
+        for key in keys:
+            stats = self._stats.setdefault(key, {"lookups": 0, "hits": 0, "saved_seconds": 0.0})
+            stats["lookups"] += 1
+            if hit:
+                stats["hits"] += 1
+                stats["saved_seconds"] += self.avg_search_seconds
+
+    def get_stats(self, tenant_id: Optional[str] = None, meeting_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Statistiques du cache.
+
+        Args:
+            tenant_id: Tenant (défaut: toutes les recherches du processus)
+            meeting_id: Réunion du tenant (défaut: toutes les recherches du tenant)
+
+        Returns:
+            Recherches, hits, taux de hit et latence économisée
+        """
+        key = (tenant_id, meeting_id if tenant_id is not None else None)
+        with self._lock:
+            stats = dict(self._stats.get(key, {"lookups": 0, "hits": 0, "saved_seconds": 0.0}))
+            if tenant_id is None:
+                entries = int((self._scopes >= 0).sum())
+            else:
+                scope_ids = [scope_id for scope, scope_id in self._scope_ids.items() if scope[0] == tenant_id]
+                entries = int(np.isin(self._scopes, scope_ids).sum())
+
+        return {
+            "tenant_id": tenant_id,
+            "meeting_id": key[1],
+            "lookups": stats["lookups"],
+            "hits": stats["hits"],
+            "hit_rate": round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0,
+            # Recherches Qdrant évitées (l'embedding de la requête reste calculé, et caché)
+            "latency_saved_ms": round(stats["saved_seconds"] * 1000, 1),
+            "avg_search_ms": round(self.avg_search_seconds * 1000, 1),
+            "entries": entries,
+            "threshold": self.threshold,
+        }
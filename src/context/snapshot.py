@@ -0,0 +1,243 @@
+"""
+Instantanés binaires de l'index vectoriel.
+
+Reconstruire une collection coûte un embedding par chunk (temps et appels API) ; en
+mode "memory", tout est perdu à chaque redémarrage. Un instantané garde les vecteurs
+déjà calculés :
+- vectors.npy        vecteurs denses float32 (une ligne par point), relus en mmap
+- payloads.jsonl.gz  une ligne JSON compressée par point : [id, payload], même ordre
+- manifest.json      modèle, dimension, collections et nombre de points ; écrit en
+                     dernier, il marque un instantané complet
+
+Les vecteurs creux BM25 ne sont pas stockés : ils sont recalculés localement depuis le
+texte à l'import (aucun appel réseau). L'import relit les vecteurs en mmap et les
+écrit par upserts groupés : démarrage à chaud en quelques secondes, sans embedding.
+
+Les collections dédiées des tenants sont incluses (voir `tenancy`).
+
+Configuration par variables d'environnement :
+    RAG_SNAPSHOT_DIR              Répertoire des instantanés (défaut: data/snapshots)
+    RAG_SNAPSHOT_LOAD_ON_STARTUP  Charge le dernier instantané au démarrage si la
+                                  collection est vide (défaut: false)
+    RAG_SNAPSHOT_UPLOAD_PARALLEL  Requêtes d'upsert parallèles à l'import (défaut: 1)
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from monitoring import get_logger
+
+logger = get_logger("snapshot")
+
+SNAPSHOT_DIR = os.getenv("RAG_SNAPSHOT_DIR", "data/snapshots")
+SNAPSHOT_FORMAT = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl.gz"
+
+
+def latest_snapshot(collection_name: str, directory: Optional[str] = None) -> Optional[str]:
+    """
+    Dernier instantané complet d'une collection.
+
+    Args:
+        collection_name: Collection partagée
+        directory: Répertoire des instantanés (défaut: RAG_SNAPSHOT_DIR)
+
+    Returns:
+        Chemin de l'instantané, ou None s'il n'y en a pas
+    """
+    root = os.path.join(directory or SNAPSHOT_DIR, collection_name)
+    if not os.path.isdir(root):
+        return None
+
+    # Noms horodatés : l'ordre alphabétique est l'ordre chronologique
+    for name in sorted(os.listdir(root), reverse=True):
+        path = os.path.join(root, name)
+        if os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            return path
+    return None
+
+
+def export_snapshot(service: Any, directory: Optional[str] = None) -> str:
+    """
+    Exporte la collection partagée et les collections dédiées des tenants.
+
+    À lancer hors indexation : les points écrits pendant l'export peuvent manquer.
+
+    Args:
+        service: QdrantRAGService
+        directory: Répertoire des instantanés (défaut: RAG_SNAPSHOT_DIR)
+
+    Returns:
+        Chemin de l'instantané créé
+    """
+    from .qdrant_service import DENSE_VECTOR_NAME, UPSERT_BATCH_SIZE
+
+    client = service.client
+    prefix = service.tenants.prefix
+    names = [service.collection_name] + sorted(
+        c.name for c in client.get_collections().collections if c.name.startswith(prefix)
+    )
+    counts = [client.count(collection_name=name, exact=True).count for name in names]
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = os.path.join(directory or SNAPSHOT_DIR, service.collection_name, timestamp)
+    os.makedirs(path, exist_ok=True)
+
+    # Tableau .npy écrit en place (mmap) : les vecteurs ne sont jamais tous en mémoire
+    vectors = np.lib.format.open_memmap(
+        os.path.join(path, VECTORS_FILE), mode="w+", dtype=np.float32, shape=(sum(counts), service.embedding_dim)
+    )
+
+    collections: List[Dict[str, Any]] = []
+    row = 0
+    with gzip.open(os.path.join(path, PAYLOADS_FILE), "wt", encoding="utf-8") as payloads:
+        for name, expected in zip(names, counts):
+            start = row
+            offset = None
+            while True:
+                points, offset = client.scroll(
+                    collection_name=name,
+                    limit=UPSERT_BATCH_SIZE,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                for point in points[:start + expected - row]:
+                    vector = point.vector.get(DENSE_VECTOR_NAME) if isinstance(point.vector, dict) else point.vector
+                    vectors[row] = vector
+                    payloads.write(json.dumps([point.id, point.payload], ensure_ascii=False) + "\n")
+                    row += 1
+                if offset is None or row >= start + expected:
+                    break
+
+            if row - start < expected:
+                logger.warning("Points supprimés pendant l'export", extra={"collection": name})
+            collections.append({"suffix": name[len(prefix):] if name != service.collection_name else "",
+                                "start": start, "count": row - start})
+
+    vectors.flush()
+    del vectors
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "collection": service.collection_name,
+        "embedding_model": service.embedding_model,
+        "dimension": service.embedding_dim,
+        "points": row,
+        "collections": collections,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info("Instantané exporté", extra={"path": path, "points": row})
+    return path
+
+
+def _read_payloads(path: str) -> Iterator[List[Any]]:
+    with gzip.open(os.path.join(path, PAYLOADS_FILE), "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def import_snapshot(service: Any, path: Optional[str] = None, parallel: Optional[int] = None) -> int:
+    """
+    Importe un instantané (upserts groupés, aucun appel d'embedding).
+
+    Args:
+        service: QdrantRAGService
+        path: Instantané (défaut: dernier instantané de la collection)
+        parallel: Requêtes d'upsert parallèles (défaut: RAG_SNAPSHOT_UPLOAD_PARALLEL)
+
+    Returns:
+        Nombre de points importés
+    """
+    from .qdrant_service import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME, UPSERT_BATCH_SIZE
+    from .tenancy import TENANT_FIELD
+
+    path = path or latest_snapshot(service.collection_name)
+    if path is None:
+        raise FileNotFoundError(f"Aucun instantané pour la collection '{service.collection_name}'")
+
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest["format"] != SNAPSHOT_FORMAT:
+        raise ValueError(f"Format d'instantané non supporté : {manifest['format']}")
+    if manifest["dimension"] != service.embedding_dim or manifest["embedding_model"] != service.embedding_model:
+        raise ValueError(
+            f"Instantané calculé avec '{manifest['embedding_model']}' ({manifest['dimension']} dimensions), "
+            f"service configuré avec '{service.embedding_model}' ({service.embedding_dim}) : ré-indexer"
+        )
+
+    parallel = parallel or int(os.getenv("RAG_SNAPSHOT_UPLOAD_PARALLEL", "1"))
+    vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r")
+    payloads = _read_payloads(path)
+    tenants = set()
+
+    for entry in manifest["collections"]:
+        if entry["suffix"]:
+            target = service.tenants.prefix + entry["suffix"]
+            service._ensure_collection(target)
+            service.tenants.discover([target])
+        else:
+            target = service.collection_name
+
+        def points() -> Iterator[PointStruct]:
+            for row in range(entry["start"], entry["start"] + entry["count"]):
+                point_id, payload = next(payloads)
+                tenants.add(payload.get(TENANT_FIELD))
+                vector = vectors[row].tolist()
+                if service.sparse_enabled:
+                    vector = {
+                        DENSE_VECTOR_NAME: vector,
+                        SPARSE_VECTOR_NAME: service.sparse_encoder.encode_document(payload.get("text", ""))
+                    }
+                yield PointStruct(id=point_id, vector=vector, payload=payload)
+
+        service.client.upload_points(
+            collection_name=target,
+            points=points(),
+            batch_size=UPSERT_BATCH_SIZE,
+            parallel=parallel,
+            wait=True
+        )
+
+    # Recherches en cache antérieures à l'import périmées
+    for tenant_id in tenants:
+        service.data_versions.bump(service.tenants.resolve(tenant_id))
+
+    logger.info("Instantané importé (aucun embedding)", extra={"path": path, "points": manifest["points"]})
+    return manifest["points"]
+
+
+def load_snapshot_on_startup(service: Any) -> None:
+    """
+    Charge le dernier instantané si RAG_SNAPSHOT_LOAD_ON_STARTUP est activé et que
+    la collection partagée est vide (démarrage à froid, mode "memory" notamment).
+
+    Args:
+        service: QdrantRAGService
+    """
+    if os.getenv("RAG_SNAPSHOT_LOAD_ON_STARTUP", "false").lower() != "true":
+        return
+
+    try:
+        if service.client.count(collection_name=service.collection_name, exact=True).count > 0:
+            return
+        path = latest_snapshot(service.collection_name)
+        if path is None:
+            logger.info("Aucun instantané à charger", extra={"collection": service.collection_name})
+            return
+        service.import_snapshot(path)
+    except Exception as e:
+        logger.warning(f"Chargement de l'instantané impossible : {e}")
@@ -0,0 +1,117 @@
+"""
+Vecteurs creux lexicaux (BM25) calculés localement.
+
+Les chunks sont encodés à l'ingestion (fréquences saturées BM25, normalisées par la
+longueur) ; l'IDF est appliqué côté Qdrant (modificateur IDF du vecteur creux).
+Aucun appel réseau : l'encodage d'une requête coûte quelques microsecondes.
+
+Configuration par variables d'environnement :
+    BM25_K1            Saturation des fréquences (défaut: 1.2)
+    BM25_B             Normalisation par la longueur (défaut: 0.75)
+    BM25_AVG_DOC_LEN   Longueur moyenne d'un chunk en tokens (défaut: 150)
+"""
+
+import os
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+from qdrant_client.models import SparseVector
+
+# Mots, acronymes et nombres (décimales et séparateurs inclus : "3,5", "v2.1", "2024-03")
+_TOKEN_PATTERN = re.compile(r"\w+(?:[.,\-/]\w+)*")
+
+STOPWORDS = frozenset("""
+au aux avec ce ces cet cette dans de des du elle en et eux il ils je la le les leur leurs lui
+ma mais me meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur
+ta te tes toi ton tu un une vos votre vous est sont ete etre avoir a ont cela ca y
+the a an and or of to in on for with is are was were be been it its this that these those
+as at by from but not no
+""".split())
+
+
+def _strip_accents(text: str) -> str:
+    """Supprime les accents ("éléments" -> "elements")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en tokens lexicaux normalisés.
+
+    Minuscules, sans accents, sans mots vides ; les lettres isolées sont ignorées
+    mais les chiffres isolés sont conservés.
+
+    Args:
+        text: Texte à découper
+
+    Returns:
+        Tokens dans l'ordre du texte
+    """
+    tokens = _TOKEN_PATTERN.findall(_strip_accents(text.lower()))
+    return [
+        token for token in tokens
+        if token not in STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def token_id(token: str) -> int:
+    """Indice du token dans l'espace creux (hachage CRC32 stable, 32 bits non signés)."""
+    return zlib.crc32(token.encode("utf-8"))
+
+
+class BM25SparseEncoder:
+    """Encodeur BM25 : chunks et requêtes -> vecteurs creux Qdrant."""
+
+    def __init__(self, k1: float = None, b: float = None, avg_doc_len: float = None):
+        """
+        Args:
+            k1: Saturation des fréquences
+            b: Normalisation par la longueur
+            avg_doc_len: Longueur moyenne d'un chunk (tokens)
+        """
+        self.k1 = k1 if k1 is not None else float(os.getenv("BM25_K1", "1.2"))
+        self.b = b if b is not None else float(os.getenv("BM25_B", "0.75"))
+        self.avg_doc_len = avg_doc_len or float(os.getenv("BM25_AVG_DOC_LEN", "150"))
+
+    def _weights(self, tokens: List[str]) -> Tuple[List[int], List[float]]:
+        """Agrège les fréquences par indice (les collisions de hachage s'additionnent)."""
+        counts: Counter = Counter(token_id(token) for token in tokens)
+        return list(counts), list(counts.values())
+
+    def encode_document(self, text: str) -> SparseVector:
+        """
+        Vecteur creux d'un chunk : fréquences saturées BM25 (sans IDF).
+
+        Args:
+            text: Texte du chunk
+
+        Returns:
+            Vecteur creux
+        """
+        tokens = tokenize(text)
+        indices, frequencies = self._weights(tokens)
+        length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_doc_len)
+
+        values = [tf * (self.k1 + 1) / (tf + length_norm) for tf in frequencies]
+        return SparseVector(indices=indices, values=values)
+
+    def encode_documents(self, texts: List[str]) -> List[SparseVector]:
+        """Vecteurs creux d'une liste de chunks."""
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> SparseVector:
+        """
+        Vecteur creux d'une requête : poids 1 par terme distinct (l'IDF est appliqué par Qdrant).
+
+        Args:
+            text: Requête
+
+        Returns:
+            Vecteur creux
+        """
+        indices = list(dict.fromkeys(token_id(token) for token in tokenize(text)))
+        return SparseVector(indices=indices, values=[1.0] * len(indices))
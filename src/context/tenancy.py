@@ -0,0 +1,138 @@
+"""
+Isolation des données RAG par tenant (entreprise cliente).
+
+Chaque chunk porte une clé `tenant_id` indexée (index "tenant" de Qdrant) : toutes les
+recherches, indexations et suppressions sont filtrées par tenant, et Qdrant construit
+un graphe HNSW par tenant, donc le coût d'une requête dépend du volume du tenant et non
+du volume global.
+
+Au-delà d'un seuil de points, un tenant peut être déplacé dans sa propre collection
+("{collection}--tenant-{tenant_id}").
+
+Configuration par variables d'environnement :
+    RAG_TENANT_COLLECTION_THRESHOLD   Points au-delà desquels un tenant reçoit sa
+                                      propre collection (défaut: 0 = jamais)
+"""
+
+import hashlib
+import os
+import re
+from typing import Any, Dict, Iterable, Optional, Set
+
+from qdrant_client.models import KeywordIndexParams, KeywordIndexType
+
+TENANT_FIELD = "tenant_id"
+DEFAULT_TENANT = "default"
+
+# Index de payload optimisé pour le multi-tenant (données regroupées par tenant)
+TENANT_INDEX_SCHEMA = KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class TenantRouter:
+    """Associe chaque tenant à sa collection (partagée ou dédiée)."""
+
+    def __init__(self, shared_collection: str, threshold: Optional[int] = None):
+        """
+        Args:
+            shared_collection: Collection partagée par les tenants
+            threshold: Points au-delà desquels un tenant reçoit sa propre collection
+        """
+        self.shared_collection = shared_collection
+        self.threshold = threshold if threshold is not None else int(
+            os.getenv("RAG_TENANT_COLLECTION_THRESHOLD", "0")
+        )
+        # Tenants (noms assainis) disposant d'une collection dédiée
+        self.dedicated: Set[str] = set()
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.shared_collection}--tenant-"
+
+    @staticmethod
+    def resolve(tenant_id: Optional[str]) -> str:
+        """Tenant effectif (DEFAULT_TENANT si non précisé)."""
+        return tenant_id or DEFAULT_TENANT
+
+    @staticmethod
+    def _safe_name(tenant_id: str) -> str:
+        return _UNSAFE_CHARS.sub("_", tenant_id)
+
+    def dedicated_collection(self, tenant_id: str) -> str:
+        """Nom de la collection dédiée d'un tenant."""
+        return self.prefix + self._safe_name(tenant_id)
+
+    def discover(self, collection_names: Iterable[str]) -> None:
+        """
+        Recense les collections dédiées existantes.
+
+        Args:
+            collection_names: Noms des collections du serveur
+        """
+        for name in collection_names:
+            if name.startswith(self.prefix):
+                self.dedicated.add(name[len(self.prefix):])
+
+    def mark_dedicated(self, tenant_id: str) -> None:
+        """Route désormais le tenant vers sa collection dédiée."""
+        self.dedicated.add(self._safe_name(tenant_id))
+
+    def collection_for(self, tenant_id: Optional[str]) -> str:
+        """
+        Collection où sont stockés les chunks d'un tenant.
+
+        Args:
+            tenant_id: ID du tenant
+
+        Returns:
+            Nom de la collection
+        """
+        tenant_id = self.resolve(tenant_id)
+        if self._safe_name(tenant_id) in self.dedicated:
+            return self.dedicated_collection(tenant_id)
+        return self.shared_collection
+
+    def should_promote(self, tenant_id: str, points: int) -> bool:
+        """Indique si un tenant de la collection partagée doit passer en collection dédiée."""
+        return (
+            self.threshold > 0
+            and points > self.threshold
+            and self.collection_for(tenant_id) == self.shared_collection
+        )
+
+    def scope(self, tenant_id: Optional[str], filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Ajoute la condition de tenant à une expression de filtre.
+
+        La clé de tenant de l'appelant est toujours écrasée : un filtre ne peut pas
+        sortir de son tenant.
+
+        Args:
+            tenant_id: ID du tenant
+            filters: Expression de filtre (voir `filters`)
+
+        Returns:
+            Expression de filtre limitée au tenant
+        """
+        return {**(filters or {}), TENANT_FIELD: self.resolve(tenant_id)}
+
+
+def tenant_slug(tenant_id: Optional[str]) -> str:
+    """
+    Nom d'un tenant utilisable dans un chemin de fichier ou un identifiant de job.
+
+    Un ID contenant des caractères non sûrs est assaini et suffixé d'une empreinte
+    de l'ID d'origine : deux tenants distincts n'ont jamais le même nom.
+
+    Args:
+        tenant_id: ID du tenant (DEFAULT_TENANT si non précisé)
+
+    Returns:
+        Nom du tenant ([A-Za-z0-9_-])
+    """
+    tenant_id = TenantRouter.resolve(tenant_id)
+    if not _UNSAFE_CHARS.search(tenant_id):
+        return tenant_id
+    digest = hashlib.sha256(tenant_id.encode("utf-8")).hexdigest()[:12]
+    return f"{_UNSAFE_CHARS.sub('_', tenant_id)}-{digest}"
@@ -0,0 +1,170 @@
+"""
+Backends de stockage vectoriel pour Qdrant.
+
+Trois modes :
+- "remote" : serveur Qdrant (docker-compose) partagé entre l'API et les workers Celery
+- "local"  : mode embarqué persistant sur disque (un seul processus à la fois : pas
+             d'API et de workers Celery ensemble ; sur demande, QDRANT_MODE=local)
+- "memory" : en mémoire, perdu au redémarrage (dev, tests)
+
+Configuration par variables d'environnement :
+    QDRANT_MODE     "remote", "local" ou "memory" (défaut : "remote" si un serveur
+                    est configuré, sinon "memory")
+    QDRANT_URL      URL complète du serveur (ex. http://qdrant:6333)
+    QDRANT_HOST     Hôte du serveur (docker-compose : qdrant)
+    QDRANT_PORT     Port HTTP du serveur (défaut: 6333)
+    QDRANT_GRPC_PORT Port gRPC ; active gRPC si QDRANT_PREFER_GRPC=true (défaut: 6334)
+    QDRANT_API_KEY  Clé API (Qdrant Cloud)
+    QDRANT_PATH     Répertoire du mode local (défaut: data/qdrant)
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+MODE_REMOTE = "remote"
+MODE_LOCAL = "local"
+MODE_MEMORY = "memory"
+
+DEFAULT_LOCAL_PATH = "data/qdrant"
+
+
+@dataclass
+class VectorStoreConfig:
+    """Configuration du backend de stockage Qdrant."""
+    mode: str = MODE_MEMORY
+    url: Optional[str] = None
+    host: Optional[str] = None
+    port: int = 6333
+    grpc_port: int = 6334
+    prefer_grpc: bool = False
+    api_key: Optional[str] = None
+    path: str = DEFAULT_LOCAL_PATH
+    timeout: int = 30
+
+    @classmethod
+    def from_env(cls) -> "VectorStoreConfig":
+        """
+        Construit la configuration depuis l'environnement.
+
+        Sans QDRANT_MODE explicite : "remote" si un serveur est configuré
+        (QDRANT_URL ou QDRANT_HOST), sinon "memory". Le mode "local" sur disque
+        n'est jamais choisi implicitement : il ne supporte qu'un processus.
+
+        Returns:
+            Configuration du backend
+        """
+        url = os.getenv("QDRANT_URL") or None
+        host = os.getenv("QDRANT_HOST") or None
+
+        mode = os.getenv("QDRANT_MODE", "").lower()
+        if not mode:
+            mode = MODE_REMOTE if (url or host) else MODE_MEMORY
+
+        return cls(
+            mode=mode,
+            url=url,
+            host=host,
+            port=int(os.getenv("QDRANT_PORT", "6333")),
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true",
+            api_key=os.getenv("QDRANT_API_KEY") or None,
+            path=os.getenv("QDRANT_PATH", DEFAULT_LOCAL_PATH),
+        )
+
+    @classmethod
+    def from_url(cls, url: str) -> "VectorStoreConfig":
+        """
+        Configuration "remote" à partir d'une URL (compatibilité avec l'ancien paramètre `url`).
+
+        Args:
+            url: URL du serveur Qdrant
+
+        Returns:
+            Configuration du backend
+        """
+        return cls(mode=MODE_REMOTE, url=url)
+
+    def describe(self) -> str:
+        """Description lisible du backend (pour les logs)."""
+        if self.mode == MODE_REMOTE:
+            return self.url or f"{self.host}:{self.port}"
+        if self.mode == MODE_LOCAL:
+            return os.path.abspath(self.path)
+        return ":memory:"
+
+
+def create_qdrant_client(config: VectorStoreConfig) -> QdrantClient:
+    """
+    Crée le client Qdrant correspondant au backend configuré.
+
+    Args:
+        config: Configuration du backend
+
+    Returns:
+        Client Qdrant
+
+    Raises:
+        ValueError: Si le mode est inconnu ou incomplet
+        RuntimeError: Si le répertoire du mode "local" est déjà ouvert par un autre processus
+    """
+    if config.mode == MODE_REMOTE:
+        if not (config.url or config.host):
+            raise ValueError("Mode Qdrant 'remote' : QDRANT_URL ou QDRANT_HOST requis")
+
+        location = {"url": config.url} if config.url else {"host": config.host, "port": config.port}
+        return QdrantClient(
+            **location,
+            grpc_port=config.grpc_port,
+            prefer_grpc=config.prefer_grpc,
+            api_key=config.api_key,
+            timeout=config.timeout,
+        )
+
+    if config.mode == MODE_LOCAL:
+        os.makedirs(config.path, exist_ok=True)
+        try:
+            return QdrantClient(path=config.path)
+        except RuntimeError as e:
+            # Verrou du mode embarqué : un seul processus (ex. API + worker Celery)
+            raise RuntimeError(
+                f"Qdrant local '{os.path.abspath(config.path)}' déjà ouvert par un autre processus : "
+                f"le mode 'local' ne supporte qu'un processus, utiliser un serveur "
+                f"(QDRANT_HOST ou QDRANT_URL) pour partager l'index ({e})"
+            ) from e
+
+    if config.mode == MODE_MEMORY:
+        return QdrantClient(":memory:")
+
+    raise ValueError(f"Mode Qdrant inconnu : {config.mode}")
+
+
+def create_async_qdrant_client(config: VectorStoreConfig) -> Optional[AsyncQdrantClient]:
+    """
+    Crée le client Qdrant asynchrone du backend configuré.
+
+    Seul le mode "remote" a un client asynchrone distinct : en mode "local" le fichier
+    est verrouillé par le client synchrone, et en mode "memory" un second client ne
+    verrait pas les mêmes données.
+
+    Args:
+        config: Configuration du backend
+
+    Returns:
+        Client asynchrone, ou None hors mode "remote"
+    """
+    if config.mode != MODE_REMOTE:
+        return None
+    if not (config.url or config.host):
+        raise ValueError("Mode Qdrant 'remote' : QDRANT_URL ou QDRANT_HOST requis")
+
+    location = {"url": config.url} if config.url else {"host": config.host, "port": config.port}
+    return AsyncQdrantClient(
+        **location,
+        grpc_port=config.grpc_port,
+        prefer_grpc=config.prefer_grpc,
+        api_key=config.api_key,
+        timeout=config.timeout,
+    )
@@ -0,0 +1,67 @@
+"""
+Versionnement des chunks d'un document.
+
+L'ID d'un point dépend du contenu du chunk (sha256), pas de sa position : lors d'une
+ré-indexation, seuls les chunks nouveaux ou modifiés sont embarqués, les chunks
+inchangés gardent leur vecteur et ceux qui ont disparu sont supprimés.
+"""
+
+import hashlib
+import uuid
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class ChunkRecord:
+    """Un chunk du document, avec son identité stable."""
+    index: int
+    point_id: str
+    content_hash: str
+    text: str
+
+
+class ChunkIdentity:
+    """Attribue les IDs des chunks d'un document, dans l'ordre du document."""
+
+    def __init__(self, doc_id: str, tenant_id: Optional[str] = None):
+        """
+        Args:
+            doc_id: ID du document
+            tenant_id: Tenant du document (None : tenant par défaut, IDs sans préfixe de tenant)
+        """
+        self.doc_id = doc_id
+        self.namespace = f"{tenant_id}:{doc_id}" if tenant_id else doc_id
+        self._occurrences: Counter = Counter()
+
+    def record(self, index: int, text: str) -> ChunkRecord:
+        """
+        Identité d'un chunk : uuid5([tenant,] doc_id, sha256(texte), n° d'occurrence).
+
+        Le n° d'occurrence distingue les chunks identiques d'un même document.
+
+        Args:
+            index: Position du chunk dans le document
+            text: Texte du chunk
+
+        Returns:
+            Chunk identifié
+        """
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        occurrence = self._occurrences[content_hash]
+        self._occurrences[content_hash] += 1
+
+        point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.namespace}:{content_hash}:{occurrence}"))
+        return ChunkRecord(index=index, point_id=point_id, content_hash=content_hash, text=text)
+
+
+@dataclass
+class ReindexStats:
+    """Bilan d'une (ré-)indexation."""
+    embedded: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
@@ -1,11 +1,20 @@
 """
 Middleware d'authentification Firebase pour FastAPI.
+
+Sans le middleware, les dépendances `get_current_user` et `get_tenant_id` vérifient
+elles-mêmes le Firebase ID Token du header `Authorization: Bearer <token>`. Les
+navigateurs ne pouvant pas poser ce header sur un WebSocket, `get_websocket_tenant_id`
+accepte aussi le token en paramètre de requête (`?token=<token>`).
+
+Configuration par variables d'environnement :
+    FIREBASE_CREDENTIALS_PATH   Fichier credentials Firebase Admin (JSON)
 """
 
 import os
-from fastapi import Request, HTTPException, status
+from fastapi import Request, HTTPException, WebSocket, WebSocketException, status
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import HTTPConnection
 import firebase_admin
 from firebase_admin import credentials, auth
 from typing import Optional
@@ -44,19 +53,7 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
             firebase_credentials_path: Chemin vers le fichier credentials Firebase JSON
         """
         super().__init__(app)
-
-        # Initialiser Firebase Admin SDK si pas déjà fait
-        if not firebase_admin._apps:
-            if firebase_credentials_path and os.path.exists(firebase_credentials_path):
-                cred = credentials.Certificate(firebase_credentials_path)
-                firebase_admin.initialize_app(cred)
-            else:
-                # Mode développement : utiliser les credentials par défaut ou mock
-                try:
-                    firebase_admin.initialize_app()
-                except Exception as e:
-                    print(f"⚠️  Firebase non initialisé : {e}")
-                    print("ℹ️  L'authentification Firebase est désactivée en mode dev")
+        init_firebase(firebase_credentials_path)
 
     async def dispatch(self, request: Request, call_next):
         """
@@ -84,11 +81,7 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
             decoded_token = auth.verify_id_token(token)
 
             # Ajouter les infos utilisateur à la requête
-            request.state.user = {
-                "uid": decoded_token.get("uid"),
-                "email": decoded_token.get("email"),
-                "name": decoded_token.get("name"),
-            }
+            request.state.user = _user_from_token(decoded_token)
 
             return await call_next(request)
 
@@ -105,11 +98,7 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             # En mode développement, on peut bypasser l'auth si Firebase n'est pas configuré
             if os.getenv("ENVIRONMENT") == "development":
-                request.state.user = {
-                    "uid": "dev-user",
-                    "email": "dev@brainstormia.local",
-                    "name": "Dev User",
-                }
+                request.state.user = dict(DEV_USER)
                 return await call_next(request)
 
             return JSONResponse(
@@ -139,6 +128,107 @@ class FirebaseAuthMiddleware(BaseHTTPMiddleware):
         return False
 
 
+def init_firebase(firebase_credentials_path: Optional[str] = None) -> None:
+    """
+    Initialise Firebase Admin SDK si pas déjà fait.
+
+    Args:
+        firebase_credentials_path: Chemin vers le fichier credentials Firebase JSON
+                                   (défaut: FIREBASE_CREDENTIALS_PATH)
+    """
+    if firebase_admin._apps:
+        return
+
+    firebase_credentials_path = firebase_credentials_path or os.getenv("FIREBASE_CREDENTIALS_PATH")
+    if firebase_credentials_path and os.path.exists(firebase_credentials_path):
+        cred = credentials.Certificate(firebase_credentials_path)
+        firebase_admin.initialize_app(cred)
+    else:
+        # Mode développement : utiliser les credentials par défaut ou mock
+        try:
+            firebase_admin.initialize_app()
+        except Exception as e:
+            print(f"⚠️  Firebase non initialisé : {e}")
+            print("ℹ️  L'authentification Firebase est désactivée en mode dev")
+
+
+# Utilisateur injecté en mode développement quand Firebase n'est pas configuré
+DEV_USER = {
+    "uid": "dev-user",
+    "email": "dev@brainstormia.local",
+    "name": "Dev User",
+}
+
+
+def _user_from_token(decoded_token: dict) -> dict:
+    """Informations utilisateur d'un Firebase ID Token décodé."""
+    return {
+        "uid": decoded_token.get("uid"),
+        "email": decoded_token.get("email"),
+        "name": decoded_token.get("name"),
+        # Organisation de l'utilisateur (custom claim, ou tenant Identity Platform)
+        "tenant_id": decoded_token.get("tenant_id") or decoded_token.get("firebase", {}).get("tenant"),
+    }
+
+
+def _bearer_token(connection: HTTPConnection) -> Optional[str]:
+    """Firebase ID Token de la requête (header Authorization, ou `token` pour un WebSocket)."""
+    auth_header = connection.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.split("Bearer ")[1]
+    if connection.scope["type"] == "websocket":
+        return connection.query_params.get("token")
+    return None
+
+
+def authenticate_request(request: HTTPConnection) -> Optional[dict]:
+    """
+    Utilisateur de la requête : posé par le middleware, sinon vérifié depuis le
+    Firebase ID Token du header Authorization.
+
+    Args:
+        request: Requête FastAPI (ou connexion WebSocket)
+
+    Returns:
+        Informations de l'utilisateur, ou None si la requête ne porte pas de token
+
+    Raises:
+        HTTPException: Si le token est invalide ou expiré
+    """
+    user = getattr(request.state, "user", None)
+    if user:
+        return user
+
+    token = _bearer_token(request)
+    if not token:
+        return None
+
+    init_firebase()
+    try:
+        decoded_token = auth.verify_id_token(token)
+    except auth.ExpiredIdTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Expired Firebase ID token"
+        )
+    except auth.InvalidIdTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Firebase ID token"
+        )
+    except Exception as e:
+        # En mode développement, on peut bypasser l'auth si Firebase n'est pas configuré
+        if os.getenv("ENVIRONMENT") != "development":
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Authentication error: {str(e)}"
+            )
+        decoded_token = DEV_USER
+
+    request.state.user = _user_from_token(decoded_token)
+    return request.state.user
+
+
 def get_current_user(request: Request) -> dict:
     """
     Récupère l'utilisateur courant depuis la requête.
@@ -152,10 +242,61 @@ def get_current_user(request: Request) -> dict:
     Raises:
         HTTPException: Si l'utilisateur n'est pas authentifié
     """
-    if not hasattr(request.state, "user"):
+    user = authenticate_request(request)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not authenticated"
         )
 
-    return request.state.user
+    return user
+
+
+def get_tenant_id(request: HTTPConnection) -> Optional[str]:
+    """
+    Récupère le tenant (isolation des documents RAG) de l'utilisateur courant.
+
+    Dépendance FastAPI (`Depends(get_tenant_id)`) : le token est vérifié avant le
+    handler. Le claim `tenant_id` est prioritaire ; à défaut, chaque utilisateur est
+    son propre tenant. Une requête sans token est refusée, sauf en développement
+    (ENVIRONMENT=development) où elle utilise le tenant par défaut.
+
+    Args:
+        request: Requête FastAPI (ou connexion WebSocket)
+
+    Returns:
+        ID du tenant, ou None pour le tenant par défaut (développement uniquement)
+
+    Raises:
+        HTTPException: Si le token est invalide, ou absent hors développement
+    """
+    user = authenticate_request(request)
+    if not user:
+        if os.getenv("ENVIRONMENT") != "development":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not authenticated"
+            )
+        return None
+
+    return user.get("tenant_id") or user.get("uid")
+
+
+def get_websocket_tenant_id(websocket: WebSocket) -> Optional[str]:
+    """
+    Équivalent de `get_tenant_id` pour les routes WebSocket : le token peut être
+    passé en paramètre de requête (`?token=<token>`), et un refus ferme la connexion.
+
+    Args:
+        websocket: Connexion WebSocket
+
+    Returns:
+        ID du tenant, ou None pour le tenant par défaut (développement uniquement)
+
+    Raises:
+        WebSocketException: Si le token est invalide, ou absent hors développement
+    """
+    try:
+        return get_tenant_id(websocket)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
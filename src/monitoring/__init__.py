@@ -0,0 +1,6 @@
+"""
+Module d'observabilité : logging structuré et asynchrone.
+"""
+from .logger import configure_logging, get_logger, log_context, bind_log_fields, shutdown_logging
+
+__all__ = ['configure_logging', 'get_logger', 'log_context', 'bind_log_fields', 'shutdown_logging']
@@ -0,0 +1,274 @@
+"""
+Logging structuré, par niveaux et non-bloquant pour BrainStormIA.
+
+- Les appels de log ne font qu'empiler l'enregistrement dans une file bornée ;
+  le formatage et l'écriture se font dans un thread dédié (QueueListener).
+- Chaque catégorie (logger "brainstormia.<catégorie>") peut être échantillonnée.
+- Les gros contenus (contexte, extraits RAG...) passent dans le champ `payload`
+  et sont tronqués à l'écriture.
+- Les champs de corrélation (turn_id, job_id...) sont attachés via `log_context`.
+
+Configuration par variables d'environnement :
+    LOG_LEVEL        Niveau minimum (défaut: INFO)
+    LOG_FORMAT       "text" ou "json" (défaut: text)
+    LOG_SAMPLING     Taux par catégorie, ex. "rag=0.1,websocket=0.05"
+    LOG_MAX_PAYLOAD  Taille max d'un payload en caractères (défaut: 500)
+    LOG_QUEUE_SIZE   Taille de la file d'attente (défaut: 10000)
+"""
+
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT_LOGGER = "brainstormia"
+
+# Attributs standards d'un LogRecord (tout le reste est un champ structuré)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_log_fields: contextvars.ContextVar = contextvars.ContextVar("log_fields", default={})
+
+_configure_lock = threading.RLock()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextmanager
+def log_context(**fields):
+    """
+    Attache des champs (turn_id, job_id...) à tous les logs émis dans le bloc.
+
+    Args:
+        **fields: Champs à attacher
+    """
+    token = _log_fields.set({**_log_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_fields.reset(token)
+
+
+def bind_log_fields(**fields) -> None:
+    """
+    Attache des champs au contexte courant sans bloc `with`
+    (utile au début d'une tâche Celery ou d'un thread).
+
+    Args:
+        **fields: Champs à attacher
+    """
+    _log_fields.set({**_log_fields.get(), **fields})
+
+
+class ContextFilter(logging.Filter):
+    """Injecte les champs de `log_context` dans l'enregistrement (thread appelant)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_fields.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonne les logs par catégorie. Les WARNING et plus ne sont jamais filtrés.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+
+        rate = self.rates.get(_category(record.name))
+        if rate is None:
+            return True
+        return random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler qui jette les logs (et les compte) quand la file est pleine."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Résoudre le message et la trace ici (côté appelant) ; le formatage
+        # complet (payload, champs) est laissé au thread d'écriture
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formate les enregistrements en texte "clé=valeur" ou en JSON."""
+
+    def __init__(self, fmt_type: str = "text", max_payload: int = 500):
+        super().__init__()
+        self.fmt_type = fmt_type
+        self.max_payload = max_payload
+
+    def _truncate(self, value: Any) -> Any:
+        if isinstance(value, str) and len(value) > self.max_payload:
+            return f"{value[:self.max_payload]}... (+{len(value) - self.max_payload} caractères)"
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            key: self._truncate(value)
+            for key, value in vars(record).items()
+            if key not in _RESERVED_ATTRS and not key.startswith("_")
+        }
+        payload = fields.pop("payload", None)
+        message = self._truncate(record.getMessage())
+        timestamp = self.formatTime(record, "%Y-%m-%dT%H:%M:%S")
+
+        if self.fmt_type == "json":
+            entry = {
+                "ts": timestamp,
+                "level": record.levelname,
+                "category": _category(record.name),
+                "message": message,
+                **fields,
+            }
+            if payload is not None:
+                entry["payload"] = payload
+            if record.exc_text:
+                entry["exc"] = record.exc_text
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+        line = f"{timestamp} {record.levelname:<7} [{_category(record.name)}] {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if payload is not None:
+            line += f"\n{payload}"
+        if record.exc_text:
+            line += f"\n{record.exc_text}"
+        return line
+
+
+def _category(logger_name: str) -> str:
+    """brainstormia.rag.search -> rag.search"""
+    if logger_name.startswith(ROOT_LOGGER + "."):
+        return logger_name[len(ROOT_LOGGER) + 1:]
+    return logger_name
+
+
+def _parse_sampling(spec: str) -> Tuple[Dict[str, float], List[str]]:
+    """Parse "rag=0.1,websocket=0.05" -> ({"rag": 0.1, "websocket": 0.05}, [entrées invalides])"""
+    rates = {}
+    invalid = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            category, rate = item.split("=", 1)
+            rates[category.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            invalid.append(item)
+    return rates, invalid
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt_type: Optional[str] = None,
+    sampling: Optional[Dict[str, float]] = None,
+    max_payload: Optional[int] = None,
+    queue_size: Optional[int] = None,
+    stream=None
+) -> None:
+    """
+    Configure le logger "brainstormia" (idempotent, paramètres par défaut depuis l'env).
+
+    Args:
+        level: Niveau minimum (DEBUG, INFO...)
+        fmt_type: "text" ou "json"
+        sampling: Taux d'échantillonnage par catégorie
+        max_payload: Taille max d'un payload en caractères
+        queue_size: Taille de la file d'attente
+        stream: Flux de sortie (défaut: stderr)
+    """
+    global _listener
+
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+        root = logging.getLogger(ROOT_LOGGER)
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        fmt_type = fmt_type or os.getenv("LOG_FORMAT", "text")
+        invalid_sampling = []
+        if sampling is None:
+            sampling, invalid_sampling = _parse_sampling(os.getenv("LOG_SAMPLING", ""))
+        max_payload = max_payload or int(os.getenv("LOG_MAX_PAYLOAD", "500"))
+        queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(StructuredFormatter(fmt_type, max_payload))
+
+        queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        queue_handler.addFilter(ContextFilter())
+        queue_handler.addFilter(SamplingFilter(sampling))
+
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(queue_handler.queue, output, respect_handler_level=True)
+        _listener.start()
+
+    # Signalé une fois le logging en place
+    for item in invalid_sampling:
+        logging.getLogger(f"{ROOT_LOGGER}.monitoring").warning(f"LOG_SAMPLING invalide ignoré : '{item}'")
+
+
+def shutdown_logging() -> None:
+    """Vide la file et arrête le thread d'écriture."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(category: str) -> logging.Logger:
+    """
+    Récupère le logger d'une catégorie (configure le logging au premier appel).
+
+    Args:
+        category: Catégorie (ex. "rag", "orchestrator", "websocket")
+
+    Returns:
+        Logger "brainstormia.<catégorie>"
+    """
+    if _listener is None:
+        with _configure_lock:
+            if _listener is None:
+                configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{category}")
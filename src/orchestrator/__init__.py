@@ -2,5 +2,6 @@
 Module d'orchestration des réunions multi-agents.
 """
 from .orchestrator import Orchestrator
+from .coalescer import HumanTurnCoalescer
 
-__all__ = ['Orchestrator']
+__all__ = ['Orchestrator', 'HumanTurnCoalescer']
@@ -0,0 +1,154 @@
+"""
+Regroupement (debounce) des messages humains dans le flux web.
+Garantit qu'un seul cycle de réponse des agents tourne à la fois par réunion.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from monitoring import get_logger
+
+logger = get_logger("coalescer")
+
+# Politiques appliquées au cycle en cours quand de nouveaux messages arrivent
+POLICY_FINISH = "finish"        # le cycle en cours termine toutes ses réponses
+POLICY_SUPERSEDE = "supersede"  # le cycle s'arrête avant la prochaine réponse d'agent
+
+
+class HumanTurnCoalescer:
+    """
+    Fusionne les messages humains rapprochés en un seul tour.
+
+    Les messages reçus pendant la fenêtre de debounce, ou pendant qu'un cycle de
+    réponse est en cours, sont regroupés et traités par UN seul cycle suivant.
+    Le cycle (synchrone) tourne dans un thread pour ne pas bloquer l'event loop.
+    """
+
+    def __init__(
+        self,
+        run_cycle: Callable[[List[str], Callable[[], bool]], Any],
+        window: float = 0.8,
+        max_wait: float = 3.0,
+        policy: str = POLICY_FINISH
+    ):
+        """
+        Initialise le regroupeur.
+
+        Args:
+            run_cycle: Fonction exécutant un cycle de réponse ; reçoit les messages
+                       fusionnés et un callable `should_stop()` à consulter entre deux
+                       réponses d'agents
+            window: Silence (secondes) attendu avant de lancer le cycle
+            max_wait: Attente maximale (secondes) avant de lancer le cycle malgré
+                      l'arrivée continue de messages
+            policy: POLICY_FINISH ou POLICY_SUPERSEDE
+        """
+        if policy not in (POLICY_FINISH, POLICY_SUPERSEDE):
+            raise ValueError(f"Politique de regroupement inconnue : {policy}")
+
+        self.run_cycle = run_cycle
+        self.window = window
+        self.max_wait = max_wait
+        self.policy = policy
+
+        self._pending: List[str] = []
+        self._pending_future: Optional[asyncio.Future] = None
+        self._generation = 0
+        self._wake = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+
+        # Statistiques
+        self.messages_received = 0
+        self.cycles_run = 0
+        self.cycles_superseded = 0
+
+    @property
+    def cycle_running(self) -> bool:
+        """True si un cycle de réponse est en cours ou programmé."""
+        return self._worker is not None and not self._worker.done()
+
+    async def submit(self, message: str) -> Dict[str, Any]:
+        """
+        Ajoute un message humain et attend la fin du cycle qui le traite.
+
+        Args:
+            message: Message humain
+
+        Returns:
+            Résultat du cycle ({"result": ..., "messages": nombre de messages fusionnés})
+        """
+        loop = asyncio.get_running_loop()
+
+        self._pending.append(message)
+        self._generation += 1
+        self.messages_received += 1
+
+        if self._pending_future is None:
+            self._pending_future = loop.create_future()
+        future = self._pending_future
+
+        if self.cycle_running:
+            # Relance la fenêtre de debounce si elle est en cours
+            self._wake.set()
+        else:
+            self._worker = asyncio.create_task(self._drain())
+
+        # shield : l'annulation d'une requête ne doit pas annuler le cycle partagé
+        return await asyncio.shield(future)
+
+    async def _wait_for_quiet(self) -> None:
+        """Attend `window` secondes sans nouveau message (au plus `max_wait`)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while True:
+            self._wake.clear()
+            timeout = min(self.window, deadline - loop.time())
+            if timeout <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+    async def _drain(self) -> None:
+        """Boucle de traitement : un cycle à la fois tant que des messages attendent."""
+        while self._pending:
+            await self._wait_for_quiet()
+
+            messages, future = self._pending, self._pending_future
+            self._pending, self._pending_future = [], None
+            generation = self._generation
+            superseded = False
+
+            def should_stop() -> bool:
+                nonlocal superseded
+                if self.policy == POLICY_SUPERSEDE and self._generation != generation:
+                    superseded = True
+                return superseded
+
+            if len(messages) > 1:
+                logger.info("Messages humains regroupés", extra={"messages": len(messages)})
+
+            try:
+                result = await asyncio.to_thread(self.run_cycle, messages, should_stop)
+                self.cycles_run += 1
+                self.cycles_superseded += int(superseded)
+                future.set_result({"result": result, "messages": len(messages)})
+            except Exception as e:
+                logger.error(f"Erreur cycle de réponse : {e}")
+                future.set_exception(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques du regroupement.
+
+        Returns:
+            Messages reçus, cycles exécutés et interrompus
+        """
+        return {
+            "messages_received": self.messages_received,
+            "cycles_run": self.cycles_run,
+            "cycles_superseded": self.cycles_superseded,
+            "cycle_running": self.cycle_running,
+        }
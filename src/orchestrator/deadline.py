@@ -0,0 +1,200 @@
+"""
+Budgets de latence par tour de parole.
+
+Chaque tour porte une échéance (Deadline). Les étapes optionnelles (RAG, routeur LLM,
+TTS) vérifient le budget restant et sont bornées dans le temps : si une dépendance
+est lente, le tour se dégrade (pas de RAG, routeur par mots-clés, texte seul) au lieu
+d'accumuler de la latence.
+
+Configuration par variables d'environnement :
+    TURN_BUDGET_SECONDS   Budget total d'un tour (défaut: 30)
+    RAG_TIMEOUT_SECONDS   Durée max de la recherche RAG (défaut: 3)
+    ROUTER_TIMEOUT_SECONDS Durée max du routeur LLM (défaut: 5)
+    TTS_TIMEOUT_SECONDS   Durée max de la synthèse vocale (défaut: 10)
+    MIN_STAGE_BUDGET_SECONDS Budget minimum pour lancer une étape (défaut: 0.5)
+    STAGE_WORKERS         Appels d'étapes simultanés au maximum, abandonnés compris
+                          (défaut: 16)
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional
+
+TURN_BUDGET_SECONDS = float(os.getenv("TURN_BUDGET_SECONDS", "30"))
+MIN_STAGE_BUDGET_SECONDS = float(os.getenv("MIN_STAGE_BUDGET_SECONDS", "0.5"))
+
+# Durée maximale de chaque étape optionnelle
+STAGE_TIMEOUTS = {
+    "rag": float(os.getenv("RAG_TIMEOUT_SECONDS", "3")),
+    "router": float(os.getenv("ROUTER_TIMEOUT_SECONDS", "5")),
+    "tts": float(os.getenv("TTS_TIMEOUT_SECONDS", "10")),
+}
+
+STAGE_WORKERS = int(os.getenv("STAGE_WORKERS", "16"))
+
+# Les appels lents continuent en arrière-plan après l'échéance : le pool les isole.
+# Leur résultat n'est jamais lu ; les étapes ne doivent donc pas modifier l'état
+# partagé elles-mêmes, mais rendre un résultat appliqué par l'appelant.
+_stage_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="turn-stage")
+
+# Appels soumis au pool et pas encore terminés (y compris ceux abandonnés à l'échéance)
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Levée quand une étape n'a pas (ou plus) le budget pour s'exécuter."""
+
+    def __init__(self, stage: str, remaining: float, message: Optional[str] = None):
+        super().__init__(message or f"Budget épuisé pour l'étape '{stage}' (restant : {remaining:.2f}s)")
+        self.stage = stage
+        self.remaining = remaining
+
+
+class StagePoolSaturated(DeadlineExceeded):
+    """Levée quand tous les workers du pool sont occupés (appels lents abandonnés)."""
+
+    def __init__(self, stage: str, remaining: float):
+        super().__init__(
+            stage, remaining, f"Pool d'étapes saturé ({STAGE_WORKERS} appels en cours), étape '{stage}' sautée"
+        )
+
+
+def _release(_future) -> None:
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight -= 1
+
+
+def stage_pool_stats() -> dict:
+    """Occupation du pool des étapes (appels en cours, abandonnés compris)."""
+    with _in_flight_lock:
+        return {"in_flight": _in_flight, "workers": STAGE_WORKERS}
+
+
+class Deadline:
+    """Échéance d'un tour de parole."""
+
+    def __init__(self, budget: float = TURN_BUDGET_SECONDS):
+        """
+        Démarre le chronomètre du tour.
+
+        Args:
+            budget: Budget total du tour en secondes
+        """
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+        # Étapes sautées ou interrompues faute de budget
+        self.degraded: List[str] = []
+
+    def remaining(self) -> float:
+        """Secondes restantes avant l'échéance."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        """Secondes écoulées depuis le début du tour."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, stage: str) -> bool:
+        """
+        Indique si une étape peut être lancée : budget restant suffisant, et étape
+        pas déjà sautée ou interrompue dans ce tour (l'appel interrompu tourne
+        encore en arrière-plan : on ne l'empile pas).
+
+        Args:
+            stage: Nom de l'étape ("rag", "router", "tts")
+
+        Returns:
+            True si l'étape peut être lancée
+        """
+        return stage not in self.degraded and self.remaining() >= MIN_STAGE_BUDGET_SECONDS
+
+    def degrade(self, stage: str) -> None:
+        """
+        Marque une étape comme sautée ou interrompue pour le reste du tour.
+
+        Args:
+            stage: Nom de l'étape
+        """
+        if stage not in self.degraded:
+            self.degraded.append(stage)
+
+    def timeout_for(self, stage: str) -> float:
+        """
+        Durée max accordée à une étape : sa limite propre, bornée par le budget restant.
+
+        Args:
+            stage: Nom de l'étape
+
+        Returns:
+            Timeout en secondes
+        """
+        remaining = self.remaining()
+        return min(STAGE_TIMEOUTS.get(stage, remaining), remaining)
+
+
+def run_within(deadline: Optional[Deadline], stage: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Exécute une étape dans le budget du tour.
+
+    Sans échéance, l'appel est direct (comportement historique).
+
+    Un appel qui dépasse son timeout est abandonné mais occupe son worker jusqu'à
+    sa fin. Quand tous les workers sont pris, l'étape est sautée (dégradée) plutôt
+    que mise en file derrière des appels abandonnés.
+
+    Args:
+        deadline: Échéance du tour (ou None)
+        stage: Nom de l'étape
+        func: Fonction à exécuter
+        *args, **kwargs: Arguments de la fonction
+
+    Returns:
+        Résultat de la fonction
+
+    Raises:
+        DeadlineExceeded: Si le budget est insuffisant ou dépassé
+        StagePoolSaturated: Si tous les workers du pool sont occupés
+    """
+    global _in_flight
+
+    if deadline is None:
+        return func(*args, **kwargs)
+
+    if not deadline.allows(stage):
+        deadline.degrade(stage)
+        raise DeadlineExceeded(stage, deadline.remaining())
+
+    with _in_flight_lock:
+        saturated = _in_flight >= STAGE_WORKERS
+        if not saturated:
+            _in_flight += 1
+    if saturated:
+        deadline.degrade(stage)
+        raise StagePoolSaturated(stage, deadline.remaining())
+
+    timeout = deadline.timeout_for(stage)
+    try:
+        future = _stage_executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+    except RuntimeError:
+        # Pool arrêté (fin du processus)
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        # Le résultat tardif est abandonné avec le future (annulé s'il n'a pas démarré)
+        future.cancel()
+        deadline.degrade(stage)
+        raise DeadlineExceeded(stage, deadline.remaining())
@@ -1,15 +1,38 @@
 """
 Orchestrateur de réunion multi-agents avec conversation naturelle.
 Gère l'intervention intelligente des agents selon le contexte.
+
+Configuration par variables d'environnement :
+    HUMAN_INPUT_WAIT_SECONDS  Attente max d'une intervention humaine entre deux tours
+                              en mode CLI (défaut: 0 = simple relevé, sans attente)
 """
 
 import os
-from typing import List, Dict, Optional
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Any, List, Dict, Optional, Tuple
 from crewai import Agent, Task, Crew
 from langchain_openai import ChatOpenAI
-from agents.config import AGENTS_CONFIG, RESET_COLOR, HUMAN_COLOR
+from agents.config import (
+    AGENTS_CONFIG, RESET_COLOR, HUMAN_COLOR, ROUTING_PRIORITY, ROUTING_CONTEXT_CHARS, CONSENSUS_THRESHOLD
+)
+from agents.keywords import KeywordEngine
 from agents.prompts import AGENTS_PROMPTS
 from context import ContextStorage, get_qdrant_service
+from context.qdrant_service import CONTEXT_CANDIDATES
+from monitoring import get_logger, bind_log_fields
+from .deadline import Deadline, DeadlineExceeded, run_within, stage_pool_stats, TURN_BUDGET_SECONDS
+from .prefetch import MeetingPrefetch, build_prefetch_query
+from .retrieval_gate import RetrievalGate
+
+logger = get_logger("orchestrator")
+rag_logger = get_logger("rag")
+
+# Attente d'une intervention humaine entre deux tours (mode CLI)
+HUMAN_INPUT_WAIT_SECONDS = float(os.getenv("HUMAN_INPUT_WAIT_SECONDS", "0"))
 
 
 class Orchestrator:
@@ -18,16 +41,24 @@ class Orchestrator:
     Gère une conversation fluide où les agents interviennent selon leur expertise.
     """
 
-    def __init__(self, objective: str, model: str = "gpt-4o-mini"):
+    def __init__(self,
+                 objective: str,
+                 model: str = "gpt-4o-mini",
+                 tenant_id: Optional[str] = None,
+                 meeting_id: Optional[str] = None):
         """
         Initialise l'orchestrateur.
 
         Args:
             objective: Objectif de la réunion
             model: Modèle LLM à utiliser (défaut: gpt-4o-mini)
+            tenant_id: Tenant dont les documents RAG sont consultés (défaut: tenant par défaut)
+            meeting_id: ID de la réunion (statistiques du cache RAG ; défaut: généré)
         """
         self.objective = objective
         self.model = model
+        self.tenant_id = tenant_id
+        self.meeting_id = meeting_id or str(uuid.uuid4())
         self.llm = ChatOpenAI(model=model, temperature=0.7)
 
         # Historique de la conversation
@@ -40,13 +71,37 @@ class Orchestrator:
         # Service RAG (Qdrant)
         self.rag_service = get_qdrant_service()
 
+        # Jeu RAG de la réunion, pré-chargé en arrière-plan (objectif + contexte organisationnel)
+        self.prefetch = MeetingPrefetch(self.rag_service, tenant_id=tenant_id, meeting_id=self.meeting_id)
+        self.prefetch.start(build_prefetch_query(objective, self.organizational_context))
+
         # Créer les agents CrewAI
         self.agents = self._create_agents()
 
+        # Moteurs de mots-clés précompilés (routage de secours et consensus)
+        self.routing_engine = KeywordEngine.from_agents_config(AGENTS_CONFIG)
+        self.consensus_engine = KeywordEngine.for_consensus()
+
         # Statut de la réunion
         self.meeting_active = True
         self.consensus_detected = False
 
+        # Budget de latence du tour en cours
+        self.turn_budget = TURN_BUDGET_SECONDS
+        self.deadline: Optional[Deadline] = None
+
+        # Mémo des recherches RAG du tour : une requête = une recherche par tour
+        self._retrieval_memo: Dict[str, Tuple[List[Dict[str, Any]], str]] = {}
+
+        # Filtre des recherches RAG : les tours sans information nouvelle réutilisent
+        # le contexte de la dernière recherche
+        self.retrieval_gate = RetrievalGate()
+        self._last_retrieval: Optional[Tuple[List[Dict[str, Any]], str]] = None
+
+        # File des interventions humaines (alimentée par un thread de lecture)
+        self.human_input_queue: "queue.Queue[str]" = queue.Queue()
+        self._input_thread: Optional[threading.Thread] = None
+
     def _create_agents(self) -> Dict[str, Agent]:
         """
         Crée les agents CrewAI avec leurs configurations.
@@ -69,6 +124,42 @@ class Orchestrator:
 
         return agents
 
+    def start_turn(self, budget: Optional[float] = None) -> Deadline:
+        """
+        Démarre un nouveau tour avec son échéance. Les étapes optionnelles
+        (RAG, routeur LLM, TTS) se dégradent quand le budget s'épuise.
+
+        Args:
+            budget: Budget du tour en secondes (défaut: self.turn_budget)
+
+        Returns:
+            Échéance du tour
+        """
+        self.finish_turn()
+        self._retrieval_memo = {}
+        self.deadline = Deadline(budget if budget is not None else self.turn_budget)
+        return self.deadline
+
+    def finish_turn(self, turn: Optional[Deadline] = None) -> None:
+        """
+        Clôt le tour en cours et journalise son bilan (durée, étapes dégradées).
+
+        Args:
+            turn: Tour à clore (défaut: le tour en cours) ; sans effet si un tour
+                  plus récent l'a remplacé
+        """
+        if self.deadline is None or (turn is not None and turn is not self.deadline):
+            return
+
+        extra = {"elapsed": round(self.deadline.elapsed(), 2), "budget": self.deadline.budget}
+        if self.deadline.degraded:
+            logger.warning("Tour dégradé par le budget de latence",
+                           extra={**extra, "degraded": ",".join(self.deadline.degraded)})
+        else:
+            logger.debug("Tour terminé dans le budget", extra=extra)
+
+        self.deadline = None
+
     def speak(self, agent_id: str, message: str) -> None:
         """
         Affiche un message d'un agent avec style terminal.
@@ -121,38 +212,42 @@ class Orchestrator:
         # Contexte RAG pertinent (TOUJOURS ACTIVÉ POUR TESTS)
         if include_rag and self.conversation_history:
             try:
-                last_message = self.conversation_history[-1]["message"]
-                print(f"🔍 [RAG SYSTÉMATIQUE] Recherche pour : '{last_message[:50]}...'")
+                last_entry = self.conversation_history[-1]
+                last_message = last_entry["message"]
+                rag_logger.debug("Recherche RAG", extra={"query": last_message[:50]})
 
-                # Rechercher d'abord les résultats bruts
-                results = self.rag_service.search(last_message, top_k=5)
+                # Recherche bornée par le budget du tour
+                results, rag_context = self._rag_context_for_turn(last_message, last_entry["agent"])
 
                 if results:
-                    print(f"\n📄 RAG a trouvé {len(results)} documents pertinents:")
-                    for i, result in enumerate(results, 1):
-                        score = result['score']
-                        text_preview = result['text'][:100].replace('\n', ' ')
-                        print(f"  {i}. Score: {score:.3f} | Extrait: {text_preview}...")
-                    print()
-
-                    # Formater le contexte
-                    rag_context = self.rag_service.get_relevant_context(last_message, max_chars=2000)
+                    if rag_logger.isEnabledFor(logging.DEBUG):
+                        rag_logger.debug(
+                            "Documents RAG pertinents",
+                            extra={
+                                "results": len(results),
+                                "payload": "\n".join(
+                                    f"  {i}. Score: {result['score']:.3f} | Extrait: "
+                                    f"{result['text'][:100].replace(chr(10), ' ')}..."
+                                    for i, result in enumerate(results, 1)
+                                )
+                            }
+                        )
+
                     if rag_context:
-                        print(f"✅ RAG : {len(rag_context)} caractères formatés pour les agents")
-                        print(f"\n📋 CONTEXTE RAG ENVOYÉ AUX AGENTS:")
-                        print("=" * 80)
-                        print(rag_context[:500])  # Afficher les 500 premiers caractères
-                        if len(rag_context) > 500:
-                            print(f"\n... ({len(rag_context) - 500} caractères supplémentaires)")
-                        print("=" * 80)
-                        print()
+                        rag_logger.info(
+                            "Contexte RAG envoyé aux agents",
+                            extra={"results": len(results), "chars": len(rag_context)}
+                        )
+                        rag_logger.debug("Contexte RAG formaté", extra={"payload": rag_context})
 
                         context_parts.append(rag_context)
                         context_parts.append("\n" + "=" * 80 + "\n")
                 else:
-                    print("⚠️ RAG : Aucun document pertinent trouvé (base de données vide?)")
+                    rag_logger.info("Aucun document pertinent trouvé (base de données vide?)")
+            except DeadlineExceeded as e:
+                rag_logger.warning(f"RAG ignoré : {e}")
             except Exception as e:
-                print(f"❌ Erreur RAG : {e}")
+                rag_logger.error(f"Erreur RAG : {e}")
 
         # Historique de la conversation
         context_parts.append("HISTORIQUE DE LA CONVERSATION :\n")
@@ -167,6 +262,95 @@ class Orchestrator:
 
         return "\n".join(context_parts)
 
+    def _rag_context_for_turn(self, query: str, speaker: str = "human") -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Recherche RAG pour le tour : résultats bruts et contexte formaté.
+        Mémoïsée par tour : chaque requête distincte n'est embarquée et
+        cherchée qu'une fois, même si le contexte est reconstruit plusieurs fois.
+        Les tours sans information nouvelle (voir `retrieval_gate`) réutilisent
+        le contexte de la dernière recherche.
+
+        La recherche s'exécute dans le budget du tour (`run_within`) ; le mémo, la
+        dernière recherche et le filtre ne sont mis à jour qu'ici, et seulement si le
+        tour est toujours en cours. Une recherche interrompue continue en arrière-plan
+        mais son résultat est abandonné : elle ne modifie pas l'état de l'orchestrateur.
+
+        Args:
+            query: Requête (dernier message)
+            speaker: Auteur du message ("human" ou ID d'agent)
+
+        Returns:
+            Tuple (résultats, contexte formaté)
+
+        Raises:
+            DeadlineExceeded: Si la recherche n'a pas le budget pour aboutir
+        """
+        memo = self._retrieval_memo
+        if query in memo:
+            rag_logger.debug("Recherche RAG réutilisée (mémo du tour)")
+            return memo[query]
+
+        # L'échéance identifie le tour : un cycle remplacé entre-temps (start_turn
+        # d'un tour plus récent) ne met pas à jour l'état du nouveau tour
+        turn = self.deadline
+        decision, query_embedding, retrieved, seconds = run_within(
+            turn, "rag", self._retrieve_rag_context, query, speaker
+        )
+        if turn is not self.deadline:
+            rag_logger.debug("Résultat RAG d'un tour remplacé abandonné")
+            return retrieved if retrieved is not None else self._last_retrieval
+
+        self.retrieval_gate.record_decision(decision)
+        if retrieved is None:
+            rag_logger.debug("Recherche RAG évitée : contexte précédent réutilisé", extra={"reason": decision.reason})
+            memo[query] = self._last_retrieval
+        else:
+            memo[query] = self._last_retrieval = retrieved
+            self.retrieval_gate.record_retrieval(query_embedding, seconds)
+        return memo[query]
+
+    def _retrieve_rag_context(self, query: str, speaker: str = "human") -> Tuple[Any, Any, Any, float]:
+        """
+        Décision du filtre, puis recherche et assemblage du contexte si nécessaire.
+        Exécutée dans un thread du budget de latence : ne modifie pas l'état
+        de l'orchestrateur (voir `_rag_context_for_turn`).
+
+        Args:
+            query: Requête (dernier message)
+            speaker: Auteur du message ("human" ou ID d'agent)
+
+        Returns:
+            Tuple (décision du filtre, embedding de la requête,
+            (résultats, contexte formaté) ou None si la recherche est évitée, durée)
+        """
+        started = time.perf_counter()
+        embed_query = self.rag_service.embeddings.embed_query
+        decision = self.retrieval_gate.evaluate(query, speaker, embed_query)
+        if not decision.retrieve:
+            return decision, decision.embedding, None, time.perf_counter() - started
+
+        # Jeu pré-chargé de la réunion si le sujet n'a pas dérivé, sinon une seule recherche
+        # (l'embedding est caché : la recherche ne le recalcule pas). Les résultats bruts
+        # servent aussi à l'assemblage du contexte (doublons et recouvrements retirés, MMR,
+        # budget de tokens)
+        query_embedding = decision.embedding if decision.embedding is not None else embed_query(query)
+        results = self.prefetch.retrieve(
+            query, query_embedding, top_k=CONTEXT_CANDIDATES,
+            min_score=self.rag_service.context_assembler.min_score
+        )
+        if results is None:
+            results = self.rag_service.search(
+                query, top_k=CONTEXT_CANDIDATES, tenant_id=self.tenant_id, with_vectors=True,
+                meeting_id=self.meeting_id
+            )
+        else:
+            rag_logger.debug("Recherche RAG servie par le jeu pré-chargé")
+        assembled = self.rag_service.assemble_context(query, results=results)
+        rag_context = assembled.text
+        rag_logger.debug("Contexte RAG assemblé", extra={"tokens": assembled.tokens, **assembled.stats})
+
+        return decision, query_embedding, (results, rag_context), time.perf_counter() - started
+
     def _select_next_speaker(self, context: str) -> Optional[str]:
         """
         Utilise un LLM pour déterminer intelligemment quel agent doit parler.
@@ -227,7 +411,8 @@ RÈGLES IMPORTANTES :
 Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou none"""
 
         try:
-            response = self.llm.invoke(selection_prompt)
+            # Routeur LLM borné par le budget du tour (sinon routeur local par mots-clés)
+            response = run_within(self.deadline, "router", self.llm.invoke, selection_prompt)
             choice = response.content.strip().lower()
 
             # Vérifier que le choix n'est pas un agent exclu
@@ -237,6 +422,7 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
                 return None
         except Exception as e:
             # Fallback sur système de mots-clés amélioré
+            logger.warning(f"Sélection LLM indisponible, fallback mots-clés : {e}")
             return self._fallback_speaker_selection(context, excluded_agents)
 
     def _fallback_speaker_selection(self, context: str, excluded_agents: List[str] = None) -> Optional[str]:
@@ -253,37 +439,17 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
         if excluded_agents is None:
             excluded_agents = []
 
-        context_lower = context.lower()
-        last_message = self.conversation_history[-1]["message"].lower() if self.conversation_history else ""
-
-        # Mots-clés améliorés
-        tech_keywords = ["technique", "technologie", "code", "développeur", "dev", "faisable",
-                        "architecture", "stack", "api", "database", "performance",
-                        "implementation", "techniquement", "programmer", "coder"]
+        last_message = self.conversation_history[-1]["message"] if self.conversation_history else ""
 
-        business_keywords = ["business", "marché", "market", "économique", "risque", "rentabilité",
-                           "stratégie", "concurrent", "roi", "revenu", "viabilité", "monetisation"]
-
-        creative_keywords = ["design", "designer", "ux", "ui", "créatif", "utilisateur",
-                           "branding", "expérience", "interface", "visuel", "graphique"]
-
-        # Priorité au dernier message
-        if any(kw in last_message for kw in tech_keywords) and "tech" not in excluded_agents:
-            return "tech"
-        if any(kw in last_message for kw in business_keywords) and "strategie" not in excluded_agents:
-            return "strategie"
-        if any(kw in last_message for kw in creative_keywords) and "creatif" not in excluded_agents:
-            return "creatif"
-
-        # Sinon chercher dans tout le contexte récent
-        if any(kw in context_lower for kw in tech_keywords) and "tech" not in excluded_agents:
-            return "tech"
-        if any(kw in context_lower for kw in business_keywords) and "strategie" not in excluded_agents:
-            return "strategie"
-        if any(kw in context_lower for kw in creative_keywords) and "creatif" not in excluded_agents:
-            return "creatif"
-
-        return None
+        # Priorité au dernier message, sinon le contexte (ses ROUTING_CONTEXT_CHARS
+        # derniers caractères si une fenêtre est configurée) ; ordre strict
+        # tech > strategie > creatif
+        return (
+            self.routing_engine.first_match(last_message, ROUTING_PRIORITY, excluded_agents)
+            or self.routing_engine.first_match(
+                context, ROUTING_PRIORITY, excluded_agents, window=ROUTING_CONTEXT_CHARS
+            )
+        )
 
     def _get_agent_response(self, agent_id: str, context: str) -> str:
         """
@@ -331,15 +497,11 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
         if len(self.conversation_history) < 5:
             return False
 
-        recent_messages = [entry["message"].lower() for entry in self.conversation_history[-3:]]
-
-        positive_indicators = ["d'accord", "valide", "ok", "parfait", "exactement",
-                              "je suis pour", "allons-y", "approuvé", "validé",
-                              "consensus", "go"]
+        recent_messages = [entry["message"] for entry in self.conversation_history[-3:]]
 
         positive_count = sum(
             1 for msg in recent_messages
-            if any(indicator in msg for indicator in positive_indicators)
+            if self.consensus_engine.scores(msg)["consensus"] >= CONSENSUS_THRESHOLD
         )
 
         return positive_count >= 2
@@ -382,9 +544,12 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
         print("🎯 RÉUNION MULTI-AGENTS")
         print("=" * 80)
         print(f"Objectif : {self.objective}")
-        print("\nTapez votre message pour intervenir (ou 'exit' pour quitter)")
+        print("\nTapez votre message à tout moment puis Entrée pour intervenir (ou 'exit' pour quitter)")
         print("=" * 80)
 
+        # Lecture du clavier en arrière-plan : les agents n'attendent plus l'humain
+        self._start_input_reader()
+
         # 1. Le facilitateur ouvre la réunion
         context = self._build_context()
         opening = self._get_agent_response("facilitateur", context)
@@ -395,9 +560,12 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
         max_turns = 30  # Limite de sécurité
 
         while self.meeting_active and turn_count < max_turns:
+            # Intervention humaine relevée entre deux tours : une éventuelle attente
+            # (HUMAN_INPUT_WAIT_SECONDS) n'entame pas le budget du tour suivant
+            self.finish_turn()
             turn_count += 1
+            bind_log_fields(turn_id=turn_count)
 
-            # Vérifier si l'humain veut intervenir
             human_input = self._get_human_input_async()
 
             if human_input:
@@ -407,6 +575,8 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
 
                 self.speak("human", human_input)
 
+            self.start_turn()
+
             # Déterminer quel agent doit parler
             context = self._build_context()
 
@@ -430,6 +600,8 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
                                                      context + "\n\nFais une synthèse rapide des points clés.")
                 self.speak("facilitateur", synthesis)
 
+        self.finish_turn()
+
         # 3. Synthèse finale
         if turn_count >= max_turns:
             final_context = self._build_context()
@@ -440,23 +612,84 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
         print("\n" + "=" * 80)
         print("✅ RÉUNION TERMINÉE")
         print("=" * 80)
+        logger.info("Statistiques de la réunion", extra=self.get_stats())
 
         return self._generate_summary()
 
-    def _get_human_input_async(self) -> Optional[str]:
+    def _start_input_reader(self) -> None:
+        """Démarre le thread de lecture de l'entrée standard (une seule fois)."""
+        if self._input_thread and self._input_thread.is_alive():
+            return
+
+        self._input_thread = threading.Thread(
+            target=self._read_human_input,
+            name="human-input-reader",
+            daemon=True
+        )
+        self._input_thread.start()
+
+    def _read_human_input(self) -> None:
         """
-        Récupère l'input humain de manière non-bloquante.
+        Boucle du thread de lecture : chaque ligne saisie (vide comprise, pour passer
+        son tour) est placée dans la file. Entrée standard fermée ou Ctrl+C : "exit".
+        Le thread est daemon, il s'arrête avec le processus.
+        """
+        while self.meeting_active:
+            try:
+                line = input().strip()
+            except (EOFError, KeyboardInterrupt):
+                # Entrée standard fermée (pipe, redirection) ou interruption : fin de réunion
+                self.human_input_queue.put("exit")
+                return
+            except Exception:
+                return
+
+            self.human_input_queue.put(line)
+
+            if line.lower() == "exit":
+                return
+
+    def _get_human_input_async(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Récupère l'input humain sans bloquer la réunion indéfiniment.
+        Attend au plus `timeout` secondes une première ligne (Entrée pour passer),
+        puis vide la file remplie par le thread de lecture.
+
+        Args:
+            timeout: Attente max en secondes (défaut: HUMAN_INPUT_WAIT_SECONDS)
 
         Returns:
-            Input de l'humain ou None
+            Input de l'humain (lignes fusionnées), "exit" ou None
         """
+        timeout = HUMAN_INPUT_WAIT_SECONDS if timeout is None else timeout
+        reader_alive = self._input_thread is not None and self._input_thread.is_alive()
+
+        lines = []
         try:
-            print(f"\n{HUMAN_COLOR}[Votre intervention (Entrée pour passer)] :{RESET_COLOR} ", end="")
-            user_input = input().strip()
-            return user_input if user_input else None
+            if timeout > 0 and reader_alive and self.human_input_queue.empty():
+                print(f"\n{HUMAN_COLOR}[Votre intervention ({timeout:g}s, Entrée pour passer)] :{RESET_COLOR} ",
+                      end="", flush=True)
+                lines.append(self.human_input_queue.get(timeout=timeout))
+        except queue.Empty:
+            print()
         except KeyboardInterrupt:
             return "exit"
 
+        while True:
+            try:
+                lines.append(self.human_input_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        lines = [line for line in lines if line]
+        if not lines:
+            return None
+
+        if any(line.lower() == "exit" for line in lines):
+            return "exit"
+
+        return "\n".join(lines)
+
     def _generate_summary(self) -> str:
         """
         Génère un résumé structuré de la réunion.
@@ -477,3 +710,20 @@ Réponds UNIQUEMENT avec un mot : strategie, tech, creatif, facilitateur, ou non
                 summary += f"  - {AGENTS_CONFIG[participant]['name']}\n"
 
         return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Statistiques RAG et latence de la réunion.
+
+        Returns:
+            Cache sémantique (recherches de la réunion), jeu pré-chargé, filtre des
+            recherches et occupation du pool des étapes
+        """
+        return {
+            "rag_cache": self.rag_service.query_cache.get_stats(
+                self.rag_service.tenants.resolve(self.tenant_id), self.meeting_id
+            ),
+            "rag_prefetch": self.prefetch.get_stats(),
+            "rag_gate": self.retrieval_gate.get_stats(),
+            "stage_pool": stage_pool_stats(),
+        }
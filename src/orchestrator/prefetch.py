@@ -0,0 +1,220 @@
+"""
+Pré-chargement RAG à l'échelle d'une réunion.
+
+L'objectif est connu dès le lancement : un jeu de chunks (avec leurs vecteurs) est
+récupéré en arrière-plan pour l'objectif et les mots-clés du contexte organisationnel.
+Les premiers tours sont servis localement, par similarité cosinus entre l'embedding
+du message et les vecteurs du jeu, sans requête Qdrant.
+
+Quand la conversation dérive (distance cosinus entre le message et la requête de
+pré-chargement au-delà du seuil), le tour est servi par une recherche classique et le
+jeu est rechargé en arrière-plan autour du sujet courant. Une écriture dans les
+documents du tenant (version de données, voir `context.query_cache`) invalide le jeu.
+
+Configuration par variables d'environnement :
+    RAG_PREFETCH_TOP_K       Chunks pré-chargés (défaut: 32, 0 = désactivé)
+    RAG_PREFETCH_MAX_DRIFT   Distance cosinus maximale servie localement (défaut: 0.5)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from monitoring import get_logger
+
+logger = get_logger("rag")
+
+# Longueur max de la requête de pré-chargement (objectif + contexte organisationnel)
+MAX_PREFETCH_QUERY_CHARS = 1500
+
+
+def build_prefetch_query(objective: str, organizational_context: Any = None) -> str:
+    """
+    Requête de pré-chargement : objectif + mots-clés du contexte organisationnel.
+
+    Args:
+        objective: Objectif de la réunion
+        organizational_context: OrganizationalContext (ou None)
+
+    Returns:
+        Texte de la requête
+    """
+    parts = [objective]
+    if organizational_context is not None:
+        for value in (
+            organizational_context.company_name,
+            organizational_context.industry,
+            organizational_context.strategic_goals,
+            organizational_context.target_audience,
+        ):
+            if value:
+                parts.append(str(value))
+        for field_data in organizational_context.custom_fields.values():
+            if isinstance(field_data.get("value"), str):
+                parts.append(field_data["value"])
+
+    return "\n".join(parts)[:MAX_PREFETCH_QUERY_CHARS]
+
+
+class MeetingPrefetch:
+    """Jeu de chunks pré-chargé pour une réunion, servi localement tant que le sujet ne dérive pas."""
+
+    def __init__(self,
+                 rag_service: Any,
+                 tenant_id: Optional[str] = None,
+                 meeting_id: Optional[str] = None,
+                 top_k: Optional[int] = None,
+                 max_drift: Optional[float] = None):
+        """
+        Args:
+            rag_service: Service RAG (QdrantRAGService)
+            tenant_id: Tenant dont les documents sont consultés
+            meeting_id: ID de la réunion (statistiques du cache)
+            top_k: Chunks pré-chargés (défaut: RAG_PREFETCH_TOP_K)
+            max_drift: Distance cosinus maximale servie localement (défaut: RAG_PREFETCH_MAX_DRIFT)
+        """
+        self.rag_service = rag_service
+        self.tenant_id = tenant_id
+        self.meeting_id = meeting_id
+        self.top_k = top_k if top_k is not None else int(os.getenv("RAG_PREFETCH_TOP_K", "32"))
+        self.max_drift = max_drift if max_drift is not None else float(os.getenv("RAG_PREFETCH_MAX_DRIFT", "0.5"))
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._anchor: Optional[np.ndarray] = None
+        self._results: List[Dict[str, Any]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._version: Optional[int] = None
+
+        self.stats = {"local": 0, "fallback": 0, "refreshes": 0, "saved_seconds": 0.0}
+        self._avg_search_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.top_k > 0
+
+    def start(self, query: str) -> None:
+        """
+        Lance le pré-chargement en arrière-plan (ne bloque pas le lancement de la réunion).
+
+        Args:
+            query: Requête de pré-chargement (voir `build_prefetch_query`)
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self._load, args=(query,), daemon=True, name="rag-prefetch").start()
+
+    def _load(self, query: str) -> None:
+        try:
+            tenant = self.rag_service.tenants.resolve(self.tenant_id)
+            version = self.rag_service.data_versions.get(tenant)
+            anchor = self._normalize(self.rag_service.embeddings.embed_query(query))
+
+            started = time.perf_counter()
+            results = self.rag_service.search(
+                query, top_k=self.top_k, tenant_id=self.tenant_id, with_vectors=True, meeting_id=self.meeting_id
+            )
+            elapsed = time.perf_counter() - started
+
+            results = [result for result in results if result.get("vector") is not None]
+            vectors = np.asarray([result["vector"] for result in results], dtype=np.float32)
+            if len(vectors):
+                vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+            with self._lock:
+                self._anchor = anchor
+                self._results = results
+                self._vectors = vectors if len(vectors) else None
+                self._version = version
+                self._avg_search_seconds = self._avg_search_seconds or elapsed
+                self.stats["refreshes"] += 1
+
+            logger.info("Jeu RAG de la réunion pré-chargé",
+                        extra={"chunks": len(results), "seconds": round(elapsed, 2)})
+        except Exception as e:
+            logger.warning(f"Pré-chargement RAG impossible : {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def retrieve(self,
+                 query: str,
+                 query_embedding: Sequence[float],
+                 top_k: int,
+                 min_score: float = 0.0) -> Optional[List[Dict[str, Any]]]:
+        """
+        Résultats servis localement depuis le jeu pré-chargé.
+
+        Args:
+            query: Message du tour (sert de requête au rechargement en cas de dérive)
+            query_embedding: Embedding du message
+            top_k: Nombre de résultats
+            min_score: Similarité minimale du meilleur résultat pour servir localement
+
+        Returns:
+            Résultats (scores cosinus, comme `search`), ou None si le tour doit passer
+            par une recherche classique
+        """
+        if not self.enabled:
+            return None
+
+        query_vector = self._normalize(query_embedding)
+        tenant = self.rag_service.tenants.resolve(self.tenant_id)
+
+        with self._lock:
+            anchor, results, vectors, version = self._anchor, self._results, self._vectors, self._version
+
+        # Pas encore chargé, ou documents modifiés depuis
+        if anchor is None or version != self.rag_service.data_versions.get(tenant):
+            if anchor is not None:
+                self.start(query)
+            self.stats["fallback"] += 1
+            return None
+
+        drift = 1.0 - float(anchor @ query_vector)
+        if drift > self.max_drift or vectors is None:
+            # Le sujet a changé : recherche classique, puis jeu rechargé autour du sujet courant
+            self.start(query)
+            self.stats["fallback"] += 1
+            logger.debug("Dérive du sujet : rechargement du jeu RAG", extra={"drift": round(drift, 3)})
+            return None
+
+        scores = vectors @ query_vector
+        order = np.argsort(-scores)[:top_k]
+        if not len(order) or scores[order[0]] < min_score:
+            self.stats["fallback"] += 1
+            return None
+
+        self.stats["local"] += 1
+        self.stats["saved_seconds"] += self._avg_search_seconds
+        return [
+            {**results[i], "score": float(scores[i]), "score_type": "cosine"}
+            for i in order
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tours servis localement, recherches classiques, rechargements et latence économisée."""
+        served = self.stats["local"] + self.stats["fallback"]
+        return {
+            "local": self.stats["local"],
+            "fallback": self.stats["fallback"],
+            "local_rate": round(self.stats["local"] / served, 4) if served else 0.0,
+            "refreshes": self.stats["refreshes"],
+            "latency_saved_ms": round(self.stats["saved_seconds"] * 1000, 1),
+            "chunks": len(self._results),
+        }
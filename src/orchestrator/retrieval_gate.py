@@ -0,0 +1,198 @@
+"""
+Filtrage des recherches RAG par tour de parole.
+
+Tous les messages n'appellent pas une nouvelle recherche : « ok », « merci », les
+relances du facilitateur ou les réponses d'agents (déjà construites sur le contexte
+RAG du tour précédent) n'apportent pas d'information à chercher. Le filtre décide à
+moindre coût, dans l'ordre :
+1. premier tour RAG de la réunion → recherche
+2. message d'un agent → contexte précédent réutilisé
+3. question explicite de l'humain → recherche
+4. message court ou simple acquiescement → contexte précédent réutilisé
+5. message proche (cosinus) de la dernière requête cherchée → contexte précédent réutilisé
+
+Seule la dernière étape calcule l'embedding du message (caché, et réutilisé par la
+recherche s'il faut chercher).
+
+Configuration par variables d'environnement :
+    RAG_GATE_ENABLED       Active le filtre (défaut: true ; false = recherche à chaque tour)
+    RAG_GATE_MIN_CHARS     Longueur minimale d'un message cherché (défaut: 25)
+    RAG_GATE_MAX_SIMILARITY Similarité cosinus à la dernière requête au-delà de
+                           laquelle le message n'est pas cherché (défaut: 0.9)
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+# Poids de la dernière mesure dans la durée moyenne d'une recherche
+LATENCY_SMOOTHING = 0.2
+
+# Début de question explicite (français, anglais)
+QUESTION_PATTERN = re.compile(
+    r"\?|^\s*(?:qui|que|quoi|qu['’]|quel(?:le)?s?|comment|pourquoi|combien|où|quand|lequel|laquelle"
+    r"|est[- ]ce que|peux[- ]tu|pouvez[- ]vous|sais[- ]tu|savez[- ]vous"
+    r"|who|what|which|how|why|when|where|can you|could you|do you|is there|are there)\b",
+    re.IGNORECASE
+)
+
+# Messages sans contenu à chercher
+ACKNOWLEDGEMENTS = {
+    "ok", "okay", "oui", "non", "merci", "d'accord", "daccord", "parfait", "super", "top", "bien",
+    "très bien", "exactement", "entendu", "ça marche", "je vois", "continuez", "continue", "allez-y",
+    "yes", "no", "thanks", "thank you", "great", "right", "sure", "agreed",
+}
+
+
+def is_question(message: str) -> bool:
+    """Détecte une question explicite (point d'interrogation ou tournure interrogative)."""
+    return bool(QUESTION_PATTERN.search(message))
+
+
+def is_acknowledgement(message: str) -> bool:
+    """Détecte un simple acquiescement (« ok », « merci, parfait »...)."""
+    words = re.sub(r"[^\w\s'’-]", " ", message.lower()).split()
+    if not words:
+        return True
+    return " ".join(words) in ACKNOWLEDGEMENTS or all(word in ACKNOWLEDGEMENTS for word in words)
+
+
+@dataclass
+class GateDecision:
+    """Décision du filtre pour un message."""
+    retrieve: bool
+    reason: str
+    # Embedding du message s'il a été calculé (réutilisable par la recherche)
+    embedding: Optional[Sequence[float]] = None
+
+
+class RetrievalGate:
+    """Décide si un tour justifie une nouvelle recherche RAG, et mesure les recherches évitées."""
+
+    def __init__(self,
+                 enabled: Optional[bool] = None,
+                 min_chars: Optional[int] = None,
+                 max_similarity: Optional[float] = None):
+        """
+        Args:
+            enabled: Active le filtre (défaut: RAG_GATE_ENABLED)
+            min_chars: Longueur minimale d'un message cherché (défaut: RAG_GATE_MIN_CHARS)
+            max_similarity: Similarité à la dernière requête au-delà de laquelle le message
+                            n'est pas cherché (défaut: RAG_GATE_MAX_SIMILARITY)
+        """
+        self.enabled = enabled if enabled is not None else os.getenv("RAG_GATE_ENABLED", "true").lower() == "true"
+        self.min_chars = min_chars if min_chars is not None else int(os.getenv("RAG_GATE_MIN_CHARS", "25"))
+        self.max_similarity = max_similarity if max_similarity is not None else float(
+            os.getenv("RAG_GATE_MAX_SIMILARITY", "0.9")
+        )
+
+        # Dernière requête effectivement cherchée
+        self._last_embedding: Optional[np.ndarray] = None
+        self._has_previous = False
+
+        self.avg_retrieval_seconds = 0.0
+        self.stats: Dict[str, Any] = {"turns": 0, "retrieved": 0, "skipped": 0, "saved_seconds": 0.0, "reasons": {}}
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def decide(self,
+               message: str,
+               speaker: str,
+               embed_query: Callable[[str], Sequence[float]]) -> GateDecision:
+        """
+        Décide si le message doit être cherché, et comptabilise la décision.
+
+        Args:
+            message: Dernier message de la conversation
+            speaker: Auteur du message ("human" ou ID d'agent)
+            embed_query: Calcul de l'embedding (appelé seulement pour le test de nouveauté)
+
+        Returns:
+            Décision (et embedding du message s'il a été calculé)
+        """
+        decision = self.evaluate(message, speaker, embed_query)
+        self.record_decision(decision)
+        return decision
+
+    def record_decision(self, decision: GateDecision) -> None:
+        """
+        Comptabilise une décision prise par `evaluate`.
+
+        Args:
+            decision: Décision du filtre
+        """
+        self.stats["turns"] += 1
+        self.stats["reasons"][decision.reason] = self.stats["reasons"].get(decision.reason, 0) + 1
+        if not decision.retrieve:
+            self.stats["skipped"] += 1
+            self.stats["saved_seconds"] += self.avg_retrieval_seconds
+
+    def evaluate(self,
+                 message: str,
+                 speaker: str,
+                 embed_query: Callable[[str], Sequence[float]]) -> GateDecision:
+        """
+        Décide si le message doit être cherché, sans modifier le filtre
+        (appelable hors du thread du tour ; voir `record_decision`).
+
+        Args:
+            message: Dernier message de la conversation
+            speaker: Auteur du message ("human" ou ID d'agent)
+            embed_query: Calcul de l'embedding (appelé seulement pour le test de nouveauté)
+
+        Returns:
+            Décision (et embedding du message s'il a été calculé)
+        """
+        if not self.enabled:
+            return GateDecision(True, "disabled")
+        if not self._has_previous:
+            return GateDecision(True, "first")
+        if speaker != "human":
+            return GateDecision(False, "agent")
+        if is_question(message):
+            return GateDecision(True, "question")
+        if len(message.strip()) < self.min_chars or is_acknowledgement(message):
+            return GateDecision(False, "short")
+
+        embedding = embed_query(message)
+        if self._last_embedding is not None:
+            similarity = float(self._normalize(embedding) @ self._last_embedding)
+            if similarity >= self.max_similarity:
+                return GateDecision(False, "redundant", embedding)
+        return GateDecision(True, "novel", embedding)
+
+    def record_retrieval(self, embedding: Sequence[float], seconds: float) -> None:
+        """
+        Enregistre une recherche effectuée (référence du test de nouveauté).
+
+        Args:
+            embedding: Embedding de la requête cherchée
+            seconds: Durée de la recherche et de l'assemblage du contexte
+        """
+        self._last_embedding = self._normalize(embedding)
+        self._has_previous = True
+        self.stats["retrieved"] += 1
+        if self.avg_retrieval_seconds:
+            self.avg_retrieval_seconds += LATENCY_SMOOTHING * (seconds - self.avg_retrieval_seconds)
+        else:
+            self.avg_retrieval_seconds = seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Tours filtrés, part des recherches évitées (par motif) et latence économisée."""
+        turns = self.stats["turns"]
+        return {
+            "turns": turns,
+            "retrieved": self.stats["retrieved"],
+            "skipped": self.stats["skipped"],
+            "skip_rate": round(self.stats["skipped"] / turns, 4) if turns else 0.0,
+            "reasons": dict(self.stats["reasons"]),
+            "latency_saved_ms": round(self.stats["saved_seconds"] * 1000, 1),
+            "avg_retrieval_ms": round(self.avg_retrieval_seconds * 1000, 1),
+        }
@@ -9,6 +9,9 @@ import firebase_admin
 from firebase_admin import storage
 import tempfile
 import uuid
+from monitoring import get_logger
+
+logger = get_logger("tts")
 
 
 class TTSService:
@@ -80,7 +83,7 @@ class TTSService:
 
         try:
             # Générer l'audio avec ElevenLabs
-            print(f"🔊 Génération audio pour '{agent_id}' (voix: {voice_id})...")
+            logger.debug("Génération audio", extra={"agent": agent_id, "voice_id": voice_id, "chars": len(text)})
 
             audio_data = self.client.text_to_speech.convert(
                 text=text,
@@ -99,7 +102,7 @@ class TTSService:
             temp_file.write(b"".join(audio_data))
             temp_file.close()
 
-            print(f"✅ Audio généré : {os.path.getsize(temp_file.name)} bytes")
+            logger.debug("Audio généré", extra={"agent": agent_id, "bytes": os.path.getsize(temp_file.name)})
 
             # Uploader vers Firebase Storage
             if self.use_firebase and self.bucket:
@@ -109,7 +112,7 @@ class TTSService:
                 return f"file://{temp_file.name}"
 
         except Exception as e:
-            print(f"❌ Erreur génération audio : {e}")
+            logger.error(f"Erreur génération audio : {e}", extra={"agent": agent_id})
             raise
 
     def _upload_to_firebase(self, local_path: str, agent_id: str) -> str:
@@ -137,11 +140,11 @@ class TTSService:
             # Supprimer le fichier temporaire
             os.remove(local_path)
 
-            print(f"☁️  Audio uploadé : {blob.public_url}")
+            logger.debug("Audio uploadé", extra={"url": blob.public_url})
             return blob.public_url
 
         except Exception as e:
-            print(f"❌ Erreur upload Firebase : {e}")
+            logger.error(f"Erreur upload Firebase : {e}")
             # Fallback : retourner le fichier local
             return f"file://{local_path}"
 
@@ -1,12 +1,23 @@
 """
 Tâches Celery pour BrainStormIA.
 Gestion asynchrone des réunions multi-agents avec streaming WebSocket.
+
+Les indexations sont routées sur leur propre file (INGEST_QUEUE), servie par un worker
+`--pool=threads` : l'extraction des PDF y utilise le pool de processus (voir
+`context.ingestion`), impossible dans les processus enfants d'un worker "prefork".
+Les réunions restent sur la file par défaut, en "prefork" (limites de durée).
+
+    celery -A src.tasks worker --loglevel=info
+    celery -A src.tasks worker -Q ingestion --pool=threads --concurrency=2 --loglevel=info
+
+Configuration par variables d'environnement :
+    INGEST_QUEUE   File Celery des indexations (défaut: ingestion)
 """
 
 import os
 import sys
 from celery import Celery
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import asyncio
 from dotenv import load_dotenv
 
@@ -31,16 +42,27 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=3600,  # 1 heure max par tâche
     worker_prefetch_multiplier=1,
+    # Indexations sur un worker à threads (pool de processus d'extraction des PDF)
+    task_routes={
+        "brainstormia.index_document": {"queue": os.getenv("INGEST_QUEUE", "ingestion")},
+        "brainstormia.index_documents": {"queue": os.getenv("INGEST_QUEUE", "ingestion")},
+    },
 )
 
 # Import des services (après initialisation Celery)
 try:
     from src.orchestrator.orchestrator import Orchestrator
+    from src.orchestrator.deadline import DeadlineExceeded, run_within
     from src.services.tts_service import get_tts_service
+    from src.monitoring import get_logger, bind_log_fields
 except ImportError:
     # Fallback pour imports locaux
     from orchestrator.orchestrator import Orchestrator
+    from orchestrator.deadline import DeadlineExceeded, run_within
     from services.tts_service import get_tts_service
+    from monitoring import get_logger, bind_log_fields
+
+logger = get_logger("tasks")
 
 
 class WebSocketOrchestrator(Orchestrator):
@@ -53,7 +75,8 @@ class WebSocketOrchestrator(Orchestrator):
         objective: str,
         job_id: str,
         model: str = "gpt-4o-mini",
-        websocket_callback=None
+        websocket_callback=None,
+        tenant_id: Optional[str] = None
     ):
         """
         Initialise l'orchestrateur avec callback WebSocket.
@@ -63,8 +86,9 @@ class WebSocketOrchestrator(Orchestrator):
             job_id: ID du job Celery
             model: Modèle LLM
             websocket_callback: Fonction async pour envoyer des messages WebSocket
+            tenant_id: Tenant dont les documents RAG sont consultés
         """
-        super().__init__(objective, model)
+        super().__init__(objective, model, tenant_id=tenant_id, meeting_id=job_id)
         self.job_id = job_id
         self.websocket_callback = websocket_callback
         self.tts_service = None
@@ -74,7 +98,7 @@ class WebSocketOrchestrator(Orchestrator):
             try:
                 self.tts_service = get_tts_service(use_firebase=False)
             except Exception as e:
-                print(f"⚠️  TTS non disponible : {e}")
+                logger.warning(f"TTS non disponible : {e}")
 
     def speak(self, agent_id: str, message: str) -> None:
         """
@@ -87,13 +111,15 @@ class WebSocketOrchestrator(Orchestrator):
         # Ajouter à l'historique (hérité)
         super().speak(agent_id, message)
 
-        # Générer l'audio si TTS disponible
+        # Générer l'audio si TTS disponible (texte seul si le budget du tour est épuisé)
         audio_url = None
         if self.tts_service:
             try:
-                audio_url = self.tts_service.generate_audio(message, agent_id)
+                audio_url = run_within(self.deadline, "tts", self.tts_service.generate_audio, message, agent_id)
+            except DeadlineExceeded as e:
+                logger.warning(f"TTS ignoré, envoi texte seul : {e}", extra={"agent": agent_id})
             except Exception as e:
-                print(f"⚠️  Erreur TTS pour {agent_id}: {e}")
+                logger.warning(f"Erreur TTS : {e}", extra={"agent": agent_id})
 
         # Envoyer via WebSocket (callback synchrone via Redis)
         if self.websocket_callback:
@@ -111,7 +137,7 @@ class WebSocketOrchestrator(Orchestrator):
                 self.websocket_callback(self.job_id, ws_message)
 
             except Exception as e:
-                print(f"⚠️  Erreur WebSocket : {e}")
+                logger.warning(f"Erreur WebSocket : {e}")
 
 
 @celery_app.task(bind=True, name="brainstormia.start_meeting")
@@ -130,17 +156,20 @@ def start_meeting_task(
             - context_static: Contexte statique (injection directe)
             - use_rag: Utiliser le RAG ou non
             - max_turns: Nombre max de tours
+            - tenant_id: Tenant dont les documents RAG sont consultés
         job_id: ID unique du job
 
     Returns:
         Résultat de la réunion avec synthèse
     """
-    print(f"🚀 Démarrage meeting task : {job_id}")
+    bind_log_fields(job_id=job_id, turn_id=0)
+    logger.info("Démarrage meeting task")
 
     # Extraire les paramètres
     objective = meeting_params.get("objective", "Discussion générale")
     max_turns = meeting_params.get("max_turns", 20)
     model = meeting_params.get("model", "gpt-4o-mini")
+    tenant_id = meeting_params.get("tenant_id")
 
     # Fonction callback pour WebSocket (via Redis PubSub)
     def websocket_callback(job_id: str, message: dict):
@@ -158,7 +187,8 @@ def start_meeting_task(
             objective=objective,
             job_id=job_id,
             model=model,
-            websocket_callback=websocket_callback
+            websocket_callback=websocket_callback,
+            tenant_id=tenant_id
         )
 
         # Message de début
@@ -172,6 +202,8 @@ def start_meeting_task(
 
         while turn_count < max_turns and orchestrator.meeting_active:
             turn_count += 1
+            bind_log_fields(turn_id=turn_count)
+            orchestrator.start_turn()
 
             # Mettre à jour le statut Celery
             self.update_state(
@@ -210,6 +242,8 @@ def start_meeting_task(
                 )
                 orchestrator.speak("facilitateur", synthesis)
 
+        orchestrator.finish_turn()
+
         # Synthèse finale
         if turn_count >= max_turns:
             final_context = orchestrator._build_context()
@@ -231,14 +265,14 @@ def start_meeting_task(
             "status": "completed",
             "job_id": job_id,
             "turns": len(orchestrator.conversation_history),
-            "summary": orchestrator._generate_summary()
+            "summary": orchestrator._generate_summary(),
+            **orchestrator.get_stats()
         }
 
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
-        print(f"❌ Erreur meeting task : {e}")
-        print(f"📋 Traceback complet:\n{error_trace}")
+        logger.error(f"Erreur meeting task : {e}", extra={"payload": error_trace})
 
         # Envoyer erreur via WebSocket
         try:
@@ -257,46 +291,187 @@ def start_meeting_task(
         }
 
 
-@celery_app.task(name="brainstormia.index_document")
-def index_document_task(file_path: str, doc_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+@celery_app.task(bind=True, name="brainstormia.index_document")
+def index_document_task(self,
+                        file_path: str,
+                        doc_id: str,
+                        metadata: Dict[str, Any],
+                        tenant_id: Optional[str] = None) -> Dict[str, Any]:
     """
     Tâche Celery pour indexer un document dans le RAG.
 
+    La progression est publiée sur le canal "ingest:{job_id}" (voir `context.progress`).
+
     Args:
         file_path: Chemin du fichier
         doc_id: ID unique du document
         metadata: Métadonnées du document
+        tenant_id: Tenant propriétaire du document
 
     Returns:
         Résultat de l'indexation
     """
     from context.qdrant_service import get_qdrant_service
+    from context.document_registry import file_sha256, get_document_registry
+    from context.progress import IngestionProgress
+
+    bind_log_fields(job_id=doc_id, turn_id=None)
+
+    filename = metadata.get("filename", os.path.basename(file_path))
+    progress = IngestionProgress(self.request.id or doc_id, worker=self.request.hostname)
 
     try:
-        print(f"📄 Indexation document : {file_path}")
+        logger.info("Indexation document", extra={"file_path": file_path})
 
         rag_service = get_qdrant_service()
 
-        # Charger et indexer
-        content = rag_service.load_document(file_path)
-        chunk_ids = rag_service.index_document(
+        # Charger et indexer en flux (mémoire bornée, chunks interrogeables au fil de l'eau)
+        progress.start_document(doc_id, filename)
+        chunk_ids = rag_service.index_file(
+            file_path=file_path,
             doc_id=doc_id,
-            content=content,
-            metadata=metadata
+            metadata=metadata,
+            progress_callback=progress,
+            tenant_id=tenant_id
         )
 
-        print(f"✅ Document indexé : {len(chunk_ids)} chunks")
+        logger.info("Document indexé", extra={"chunks": len(chunk_ids)})
 
-        return {
+        # Enregistrer l'empreinte du fichier (dédoublonnage des uploads groupés)
+        get_document_registry().register(tenant_id, file_sha256(file_path), doc_id, filename, len(chunk_ids))
+
+        result = {
             "status": "completed",
             "doc_id": doc_id,
             "chunks_count": len(chunk_ids)
         }
+        progress.finish_document("indexed", len(chunk_ids))
+        progress.complete(result)
+        return result
 
     except Exception as e:
-        print(f"❌ Erreur indexation : {e}")
+        logger.error(f"Erreur indexation : {e}")
+        progress.finish_document("failed", error=str(e))
+        progress.fail(str(e))
         return {
             "status": "failed",
             "doc_id": doc_id,
             "error": str(e)
         }
+
+
+@celery_app.task(bind=True, name="brainstormia.index_documents")
+def index_documents_task(self,
+                         documents: List[Dict[str, Any]],
+                         tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Tâche Celery pour indexer un lot de documents (upload groupé) dans le RAG.
+
+    Les documents sont indexés l'un après l'autre ; la progression agrégée du lot
+    est publiée dans l'état de la tâche (PROGRESS) et, en détail, sur le canal
+    "ingest:{job_id}" (voir `context.progress`).
+
+    Args:
+        documents: Documents à indexer
+            - file_path: Chemin du fichier
+            - doc_id: ID unique du document
+            - filename: Nom du fichier d'origine
+            - sha256: Empreinte du fichier
+        tenant_id: Tenant propriétaire des documents
+
+    Returns:
+        Bilan du lot (documents indexés, doublons, échecs, chunks)
+    """
+    from context.qdrant_service import get_qdrant_service
+    from context.document_registry import get_document_registry
+    from context.progress import IngestionProgress
+
+    batch_id = self.request.id
+    bind_log_fields(job_id=batch_id, turn_id=None)
+    logger.info("Indexation groupée", extra={"documents": len(documents), "tenant_id": tenant_id})
+
+    rag_service = get_qdrant_service()
+    registry = get_document_registry()
+
+    total = len(documents)
+    events = IngestionProgress(batch_id, documents=total, worker=self.request.hostname)
+    indexed: List[Dict[str, Any]] = []
+    duplicates: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+    chunks_total = 0
+
+    def publish(position: int, filename: Optional[str], chunks: int = 0) -> None:
+        self.update_state(
+            state='PROGRESS',
+            meta={
+                'current': position,
+                'total': total,
+                'indexed': len(indexed),
+                'duplicates': len(duplicates),
+                'failed': len(failed),
+                'chunks': chunks_total + chunks,
+                'document': filename,
+                'status': f'Document {position}/{total}'
+            }
+        )
+
+    for position, document in enumerate(documents, 1):
+        filename = document["filename"]
+        publish(position, filename)
+        events.start_document(document["doc_id"], filename)
+
+        def progress(stage: str, done: int, stage_total: Optional[int]) -> None:
+            events(stage, done, stage_total)
+            if stage == "upserted":
+                publish(position, filename, done)
+
+        keep_file = False
+        try:
+            # Indexé entre-temps par un autre lot (même contenu)
+            existing = registry.lookup(tenant_id, document["sha256"])
+            if existing is not None:
+                duplicates.append({"filename": filename, "duplicate_of": existing["doc_id"]})
+                events.finish_document("duplicate", duplicate_of=existing["doc_id"])
+                continue
+
+            chunk_ids = rag_service.index_file(
+                file_path=document["file_path"],
+                doc_id=document["doc_id"],
+                metadata={"filename": filename, "sha256": document["sha256"]},
+                progress_callback=progress,
+                tenant_id=tenant_id
+            )
+            registry.register(tenant_id, document["sha256"], document["doc_id"], filename, len(chunk_ids))
+            chunks_total += len(chunk_ids)
+            indexed.append({"filename": filename, "doc_id": document["doc_id"], "chunks": len(chunk_ids)})
+            events.finish_document("indexed", len(chunk_ids))
+            keep_file = True
+        except Exception as e:
+            logger.error(f"Erreur indexation {filename} : {e}")
+            failed.append({"filename": filename, "doc_id": document["doc_id"], "error": str(e)})
+            events.finish_document("failed", error=str(e))
+        finally:
+            # Doublon ou échec : fichier supprimé (déjà absent : ignoré)
+            if not keep_file:
+                try:
+                    os.remove(document["file_path"])
+                except FileNotFoundError:
+                    pass
+
+    logger.info(
+        "Indexation groupée terminée",
+        extra={"indexed": len(indexed), "duplicates": len(duplicates), "failed": len(failed),
+               "chunks": chunks_total}
+    )
+
+    result = {
+        "status": "completed" if not failed else "partial",
+        "batch_id": batch_id,
+        "documents": total,
+        "indexed": indexed,
+        "duplicates": duplicates,
+        "failed": failed,
+        "chunks_count": chunks_total
+    }
+    events.complete(result)
+    return result
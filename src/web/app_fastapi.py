@@ -7,14 +7,16 @@ Avec WebSocket pour streaming temps réel et Celery pour async.
 import sys
 import os
 import io
+import hashlib
+import zipfile
 import requests
-from fastapi import FastAPI, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, File, UploadFile, HTTPException, Request, WebSocket, WebSocketDisconnect, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, BinaryIO
 from threading import Thread, Lock
 from queue import Queue
 from dotenv import load_dotenv
@@ -22,6 +24,7 @@ from werkzeug.utils import secure_filename
 import uuid
 import json
 import redis
+import redis.asyncio as aioredis
 import asyncio
 from openai import OpenAI
 from elevenlabs.client import ElevenLabs
@@ -32,12 +35,21 @@ load_dotenv()
 # Ajouter le répertoire parent au PYTHONPATH
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from orchestrator import Orchestrator
+from orchestrator import Orchestrator, HumanTurnCoalescer
+from orchestrator.deadline import Deadline, DeadlineExceeded, STAGE_TIMEOUTS, run_within, stage_pool_stats
 from context import OrganizationalContext, ContextStorage
 from context.qdrant_service import get_qdrant_service
-from middleware.firebase_auth import FirebaseAuthMiddleware, get_current_user
+from context.async_qdrant_service import get_async_qdrant_service, close_async_qdrant_service
+from context.document_registry import get_document_registry, file_sha256, HASH_BLOCK_SIZE
+from context.progress import ingestion_channel
+from context.tenancy import DEFAULT_TENANT, tenant_slug
+from middleware.firebase_auth import FirebaseAuthMiddleware, get_current_user, get_tenant_id, get_websocket_tenant_id
 from models.user import UserCreate, UserUpdate, UserProfile
 from services.user_service import get_user_service
+from monitoring import get_logger, bind_log_fields
+
+logger = get_logger("api")
+ws_logger = get_logger("websocket")
 
 # Import Celery tasks (import lazy pour éviter les dépendances circulaires)
 # Les tasks seront importés seulement quand on en a besoin
@@ -64,6 +76,32 @@ UPLOAD_FOLDER = 'data/uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'txt', 'doc', 'docx', 'xls', 'xlsx'}
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 MAX_UPLOAD_SIZE = 16 * 1024 * 1024  # 16MB
+MAX_ARCHIVE_SIZE = 256 * 1024 * 1024  # 256MB (archive .zip d'un upload groupé)
+MAX_BULK_FILES = 500  # Documents indexés au maximum par upload groupé
+
+
+def tenant_upload_folder(tenant_id: Optional[str]) -> str:
+    """
+    Dossier des fichiers uploadés d'un tenant (créé au besoin).
+
+    Le tenant par défaut garde la racine de UPLOAD_FOLDER (fichiers antérieurs à
+    l'isolation par tenant) ; chaque autre tenant a son sous-dossier de "tenants/".
+    """
+    slug = tenant_slug(tenant_id)
+    folder = UPLOAD_FOLDER if slug == DEFAULT_TENANT else os.path.join(UPLOAD_FOLDER, "tenants", slug)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def new_ingestion_job_id(tenant_id: Optional[str]) -> str:
+    """ID d'un job d'indexation, préfixé par son tenant (voir `owns_ingestion_job`)."""
+    return f"{tenant_slug(tenant_id)}.{uuid.uuid4()}"
+
+
+def owns_ingestion_job(job_id: str, tenant_id: Optional[str]) -> bool:
+    """Indique si le job d'indexation appartient au tenant."""
+    owner, separator, _ = job_id.partition(".")
+    return bool(separator) and owner == tenant_slug(tenant_id)
 
 # Créer les répertoires nécessaires
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
@@ -75,6 +113,22 @@ os.makedirs(TEMPLATES_DIR, exist_ok=True)
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
+
+@app.on_event("startup")
+async def warm_rag_index():
+    """
+    Construit les services RAG au démarrage (RAG_SNAPSHOT_LOAD_ON_STARTUP), dont le
+    chargement du dernier instantané de l'index, hors de la boucle d'événements.
+    """
+    if os.getenv("RAG_SNAPSHOT_LOAD_ON_STARTUP", "false").lower() == "true":
+        await get_async_qdrant_service()
+
+
+@app.on_event("shutdown")
+async def close_rag_clients():
+    """Ferme le client Qdrant asynchrone."""
+    await close_async_qdrant_service()
+
 # Initialiser le gestionnaire de contexte
 context_storage = ContextStorage()
 
@@ -91,9 +145,15 @@ AGENT_VOICES = {
 }
 ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")
 
+# Regroupement des messages humains rapprochés (un seul cycle de réponse à la fois)
+COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", "0.8"))
+COALESCE_MAX_WAIT_SECONDS = float(os.getenv("COALESCE_MAX_WAIT_SECONDS", "3.0"))
+COALESCE_POLICY = os.getenv("COALESCE_POLICY", "finish")  # "finish" ou "supersede"
+
 # État global de la réunion
 meeting_state = {
     'orchestrator': None,
+    'coalescer': None,
     'objective': '',
     'messages': [],
     'new_messages': Queue(),
@@ -124,6 +184,7 @@ class ContextPreview(BaseModel):
 class SearchQuery(BaseModel):
     query: str
     top_k: int = 5
+    filters: Optional[Dict[str, Any]] = None
 
 
 class RAGQuery(BaseModel):
@@ -156,6 +217,57 @@ class WebOrchestrator(Orchestrator):
     def _get_human_input_async(self):
         return None
 
+    def run_response_cycle(self, messages: List[str], should_stop=lambda: False) -> int:
+        """
+        Exécute un cycle de réponse des agents pour un tour humain (éventuellement
+        composé de plusieurs messages regroupés).
+
+        Args:
+            messages: Messages humains du tour
+            should_stop: Callable consulté avant chaque réponse d'agent ; True si le
+                         cycle est remplacé par un tour plus récent
+
+        Returns:
+            Nombre d'agents ayant répondu
+        """
+        self.speak('human', "\n".join(messages))
+        turn = self.start_turn()
+        try:
+            context_with_rag = self._build_context(include_rag=True)
+
+            logger.info("Contexte construit", extra={"chars": len(context_with_rag)})
+            logger.debug("Contexte complet envoyé aux agents", extra={"payload": context_with_rag})
+
+            agents_spoken = []
+            max_responses = 2
+
+            for i in range(max_responses):
+                if should_stop():
+                    logger.info("Cycle remplacé par de nouveaux messages humains", extra={"round": i + 1})
+                    break
+
+                # CHAQUE agent interroge le RAG systématiquement
+                logger.debug(f"Tour {i+1}/{max_responses} : reconstruction du contexte avec RAG")
+                context = self._build_context(include_rag=True)
+
+                next_speaker = self._select_next_speaker(context)
+                logger.info("Agent sélectionné", extra={"agent": next_speaker, "round": i + 1})
+
+                if not next_speaker or next_speaker in agents_spoken:
+                    logger.debug(f"Arrêt : {'Aucun agent' if not next_speaker else 'Agent déjà parlé'}")
+                    break
+
+                response = self._get_agent_response(next_speaker, context)
+                logger.info("Réponse générée", extra={"agent": next_speaker, "chars": len(response)})
+
+                self.speak(next_speaker, response)
+                agents_spoken.append(next_speaker)
+
+            return len(agents_spoken)
+        finally:
+            # Tour clos même si un agent ou le RAG échoue (sauf s'il a déjà été remplacé)
+            self.finish_turn(turn)
+
     def run_meeting_web(self):
         meeting_state['meeting_active'] = True
         self.speak("facilitateur", f"Bonjour ! Je suis le facilitateur de cette réunion. Notre objectif aujourd'hui : {self.objective}\n\nN'hésitez pas à lancer la discussion quand vous êtes prêt. Les agents réagiront selon leur expertise.")
@@ -185,14 +297,21 @@ async def context_page(request: Request):
 
 
 @app.post("/start_meeting")
-async def start_meeting(data: MeetingStart):
+async def start_meeting(data: MeetingStart, tenant_id: Optional[str] = Depends(get_tenant_id)):
     """Démarre une nouvelle réunion."""
     with meeting_state['lock']:
         meeting_state['objective'] = data.objective
         meeting_state['messages'] = []
         meeting_state['orchestrator'] = WebOrchestrator(
             objective=data.objective,
-            model="gpt-4o-mini"
+            model="gpt-4o-mini",
+            tenant_id=tenant_id
+        )
+        meeting_state['coalescer'] = HumanTurnCoalescer(
+            meeting_state['orchestrator'].run_response_cycle,
+            window=COALESCE_WINDOW_SECONDS,
+            max_wait=COALESCE_MAX_WAIT_SECONDS,
+            policy=COALESCE_POLICY
         )
 
     thread = Thread(target=meeting_state['orchestrator'].run_meeting_web)
@@ -215,44 +334,17 @@ async def send_message(data: MessageSend):
     if not orchestrator:
         raise HTTPException(status_code=400, detail="Réunion non démarrée")
 
-    print(f"\n📨 Message humain reçu : {data.message}")
-
-    orchestrator.speak('human', data.message)
-
-    context_with_rag = orchestrator._build_context(include_rag=True)
-
-    print(f"📊 Contexte construit : {len(context_with_rag)} caractères")
-    print(f"\n🔍 CONTEXTE COMPLET ENVOYÉ AUX AGENTS:")
-    print("=" * 80)
-    print(context_with_rag)
-    print("=" * 80)
-    print()
-
-    agents_spoken = []
-    max_responses = 2
-
-    for i in range(max_responses):
-        print(f"\n🤖 Tour {i+1}/{max_responses}")
-
-        # CHAQUE agent interroge le RAG systématiquement
-        print(f"🔄 Reconstruction du contexte avec RAG pour agent {i+1}...")
-        context = orchestrator._build_context(include_rag=True)
+    bind_log_fields(turn_id=str(uuid.uuid4())[:8])
+    logger.info("Message humain reçu", extra={"chars": len(data.message)})
 
-        next_speaker = orchestrator._select_next_speaker(context)
-        print(f"🎯 Agent sélectionné : {next_speaker}")
+    # Les messages rapprochés (ou reçus pendant un cycle) sont fusionnés en un tour
+    cycle = await meeting_state['coalescer'].submit(data.message)
 
-        if not next_speaker or next_speaker in agents_spoken:
-            print(f"⏹️ Arrêt : {'Aucun agent' if not next_speaker else 'Agent déjà parlé'}")
-            break
-
-        print(f"⏳ Génération réponse de {next_speaker}...")
-        response = orchestrator._get_agent_response(next_speaker, context)
-        print(f"✅ Réponse générée : {len(response)} caractères")
-
-        orchestrator.speak(next_speaker, response)
-        agents_spoken.append(next_speaker)
-
-    return {'status': 'ok', 'agents_responded': len(agents_spoken)}
+    return {
+        'status': 'ok',
+        'agents_responded': cycle['result'],
+        'coalesced_messages': cycle['messages']
+    }
 
 
 @app.get("/get_messages")
@@ -360,7 +452,7 @@ async def preview_context(data: ContextPreview):
 
 
 @app.post("/api/context/upload")
-async def upload_document(file: UploadFile = File(...)):
+async def upload_document(file: UploadFile = File(...), tenant_id: Optional[str] = Depends(get_tenant_id)):
     """
     Upload un document pour le RAG via Celery (asynchrone).
     """
@@ -380,25 +472,27 @@ async def upload_document(file: UploadFile = File(...)):
         # Générer un nom de fichier unique
         filename = secure_filename(file.filename)
         unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+        file_path = os.path.join(tenant_upload_folder(tenant_id), unique_filename)
 
         # Sauvegarder le fichier
         with open(file_path, "wb") as f:
             f.write(contents)
 
         # Déclencher l'ingestion via Celery
-        print(f"📤 Déclenchement indexation Celery pour : {file_path}")
+        logger.info("Déclenchement indexation Celery", extra={"file_path": file_path})
 
         from src.tasks import index_document_task
         task = index_document_task.apply_async(
-            args=[file_path, filename, "default"]
+            args=[file_path, filename, {"filename": filename}, tenant_id],
+            task_id=new_ingestion_job_id(tenant_id)
         )
 
         return {
             'status': 'ok',
             'message': 'Fichier uploadé, indexation en cours',
             'file_path': file_path,
-            'task_id': task.id
+            'task_id': task.id,
+            'websocket_url': f"/ws/ingestion/{task.id}"
         }
 
     except HTTPException:
@@ -410,20 +504,28 @@ async def upload_document(file: UploadFile = File(...)):
 
 
 @app.delete("/api/context/document/{filename}")
-async def delete_document(filename: str):
-    """Supprime un document."""
+async def delete_document(filename: str, tenant_id: Optional[str] = Depends(get_tenant_id)):
+    """Supprime un document du tenant."""
     try:
-        file_path = None
+        folder = tenant_upload_folder(tenant_id)
+        name = secure_filename(filename)
+        registry = get_document_registry()
 
-        for f in os.listdir(UPLOAD_FOLDER):
-            if filename in f:
-                file_path = os.path.join(UPLOAD_FOLDER, f)
-                break
+        # Fichiers enregistrés sous "{uuid}_{nom}", dans le dossier du tenant
+        for f in os.listdir(folder):
+            file_path = os.path.join(folder, f)
+            if f.split("_", 1)[-1] != name or not os.path.isfile(file_path):
+                continue
+
+            # doc_id retrouvé par l'empreinte du fichier (UUID pour les uploads API et
+            # groupés) ; à défaut, nom du fichier (indexations antérieures au registre)
+            entry = registry.lookup(tenant_id, await asyncio.to_thread(file_sha256, file_path))
+            doc_id = entry["doc_id"] if entry else name
 
-        if file_path and os.path.exists(file_path):
             # Supprimer de Qdrant
             rag_service = get_qdrant_service()
-            rag_service.delete_document(filename)
+            rag_service.delete_document(doc_id, tenant_id=tenant_id)
+            registry.forget(tenant_id, doc_id)
 
             # Supprimer le fichier
             os.remove(file_path)
@@ -435,32 +537,36 @@ async def delete_document(filename: str):
 
 
 @app.post("/api/context/search")
-async def search_context(data: SearchQuery):
+async def search_context(data: SearchQuery, tenant_id: Optional[str] = Depends(get_tenant_id)):
     """
-    Recherche dans le contexte RAG via Qdrant (synchrone).
+    Recherche dans le contexte RAG via Qdrant (synchrone), limitée au tenant de l'utilisateur.
     """
     try:
         if not data.query:
             raise HTTPException(status_code=400, detail="Requête vide")
 
-        rag_service = get_qdrant_service()
-        results = rag_service.search(data.query, top_k=data.top_k)
+        # Service asynchrone : la boucle d'événements n'est pas bloquée pendant la recherche
+        rag_service = await get_async_qdrant_service()
+        results = await rag_service.search(data.query, top_k=data.top_k, filters=data.filters, tenant_id=tenant_id)
 
         return {
             'status': 'ok',
             'results': results
         }
 
+    except ValueError as e:
+        # Expression de filtre invalide
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/context/stats")
-async def context_stats():
+async def context_stats(tenant_id: Optional[str] = Depends(get_tenant_id)):
     """Statistiques Qdrant."""
     try:
-        rag_service = get_qdrant_service()
-        stats = rag_service.get_collection_stats()
+        rag_service = await get_async_qdrant_service()
+        stats = await rag_service.get_collection_stats(tenant_id=tenant_id)
 
         return {
             'status': 'ok',
@@ -473,12 +579,15 @@ async def context_stats():
 @app.get("/health")
 async def health():
     """Health check."""
+    rag_service = await asyncio.to_thread(get_qdrant_service)
     return {
         "status": "healthy",
-        "qdrant": "connected" if get_qdrant_service() else "disconnected",
+        "qdrant": "connected" if rag_service else "disconnected",
         "inngest_dashboard": "http://localhost:8288",
         "celery": "connected",
-        "redis": "connected"
+        "redis": "connected",
+        # Étapes de tour en cours (appels lents abandonnés compris)
+        "stage_pool": stage_pool_stats()
     }
 
 
@@ -495,13 +604,13 @@ class ConnectionManager:
         """Accepte une nouvelle connexion."""
         await websocket.accept()
         self.active_connections[job_id] = websocket
-        print(f"🔌 WebSocket connecté : {job_id}")
+        ws_logger.info("WebSocket connecté", extra={"job_id": job_id})
 
     def disconnect(self, job_id: str):
         """Déconnecte un client."""
         if job_id in self.active_connections:
             del self.active_connections[job_id]
-            print(f"🔌 WebSocket déconnecté : {job_id}")
+            ws_logger.info("WebSocket déconnecté", extra={"job_id": job_id})
 
     async def send_message(self, job_id: str, message: dict):
         """Envoie un message à un client."""
@@ -509,7 +618,7 @@ class ConnectionManager:
             try:
                 await self.active_connections[job_id].send_json(message)
             except Exception as e:
-                print(f"❌ Erreur envoi WebSocket : {e}")
+                ws_logger.error(f"Erreur envoi WebSocket : {e}", extra={"job_id": job_id})
                 self.disconnect(job_id)
 
     async def broadcast(self, message: dict):
@@ -518,14 +627,14 @@ class ConnectionManager:
             try:
                 await connection.send_json(message)
             except Exception as e:
-                print(f"❌ Erreur broadcast WebSocket : {e}")
+                ws_logger.error(f"Erreur broadcast WebSocket : {e}", extra={"job_id": job_id})
 
 
 manager = ConnectionManager()
 
 
 @app.post("/api/v1/start_meeting")
-async def api_start_meeting(data: MeetingStart):
+async def api_start_meeting(data: MeetingStart, tenant_id: Optional[str] = Depends(get_tenant_id)):
     """
     Démarre une nouvelle réunion via Celery (asynchrone).
 
@@ -546,7 +655,8 @@ async def api_start_meeting(data: MeetingStart):
         meeting_params = {
             "objective": data.objective,
             "max_turns": 20,
-            "model": "gpt-4o-mini"
+            "model": "gpt-4o-mini",
+            "tenant_id": tenant_id
         }
 
         # Déclencher la tâche Celery
@@ -612,7 +722,7 @@ async def websocket_meeting(websocket: WebSocket, job_id: str):
                         # Parser et envoyer le message
                         import json
                         msg_dict = json.loads(message['data'])
-                        print(f"📤 Envoi WebSocket: {msg_dict.get('type')}")
+                        ws_logger.debug("Envoi WebSocket", extra={"job_id": job_id, "type": msg_dict.get('type')})
                         await websocket.send_json(msg_dict)
 
                         # Si message de fin ou erreur, arrêter
@@ -620,7 +730,7 @@ async def websocket_meeting(websocket: WebSocket, job_id: str):
                             meeting_ended = True
 
                     except Exception as e:
-                        print(f"❌ Erreur parsing message : {e}")
+                        ws_logger.error(f"Erreur parsing message : {e}", extra={"job_id": job_id})
 
                 # Petit délai pour ne pas surcharger le CPU
                 await asyncio.sleep(0.1)
@@ -642,11 +752,11 @@ async def websocket_meeting(websocket: WebSocket, job_id: str):
             pubsub.close()
 
     except WebSocketDisconnect:
-        print(f"🔌 Client déconnecté : {job_id}")
+        ws_logger.info("Client déconnecté", extra={"job_id": job_id})
         manager.disconnect(job_id)
 
     except Exception as e:
-        print(f"❌ Erreur WebSocket : {e}")
+        ws_logger.error(f"Erreur WebSocket : {e}", extra={"job_id": job_id})
         await websocket.send_json({
             "type": "error",
             "error": str(e)
@@ -684,7 +794,7 @@ async def get_meeting_status(job_id: str):
 
 
 @app.post("/api/v1/upload_document")
-async def api_upload_document(file: UploadFile = File(...)):
+async def api_upload_document(file: UploadFile = File(...), tenant_id: Optional[str] = Depends(get_tenant_id)):
     """
     Upload et indexe un document via Celery (asynchrone).
 
@@ -709,7 +819,7 @@ async def api_upload_document(file: UploadFile = File(...)):
 
         filename = secure_filename(file.filename)
         unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
+        file_path = os.path.join(tenant_upload_folder(tenant_id), unique_filename)
 
         with open(file_path, "wb") as f:
             f.write(contents)
@@ -718,7 +828,8 @@ async def api_upload_document(file: UploadFile = File(...)):
         from src.tasks import index_document_task
         doc_id = str(uuid.uuid4())
         task = index_document_task.apply_async(
-            args=[file_path, doc_id, {"filename": filename}]
+            args=[file_path, doc_id, {"filename": filename}, tenant_id],
+            task_id=new_ingestion_job_id(tenant_id)
         )
 
         return {
@@ -726,7 +837,8 @@ async def api_upload_document(file: UploadFile = File(...)):
             "job_id": task.id,
             "doc_id": doc_id,
             "message": "Indexation en cours",
-            "file_path": file_path
+            "file_path": file_path,
+            "websocket_url": f"/ws/ingestion/{task.id}"
         }
 
     except HTTPException:
@@ -737,6 +849,251 @@ async def api_upload_document(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def stage_bulk_documents(uploads: List[tuple], tenant_id: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Prépare un upload groupé : extrait les archives .zip, écarte les doublons
+    (même sha256 dans le lot ou déjà indexé pour le tenant) et sauvegarde les
+    fichiers à indexer.
+
+    Chaque fichier est copié par blocs vers son fichier d'attente, l'empreinte
+    étant calculée pendant la copie : aucun fichier n'est chargé entier en mémoire.
+
+    Args:
+        uploads: Liste de (nom du fichier, flux binaire lisible)
+        tenant_id: Tenant propriétaire des documents
+
+    Returns:
+        Documents à indexer ("documents"), doublons ("duplicates") et refus ("rejected")
+    """
+    registry = get_document_registry()
+    folder = tenant_upload_folder(tenant_id)
+    staged: Dict[str, List[Dict[str, Any]]] = {"documents": [], "duplicates": [], "rejected": []}
+    seen: Dict[str, str] = {}
+
+    def add(name: str, stream: BinaryIO) -> None:
+        filename = secure_filename(os.path.basename(name))
+        if not filename or not allowed_file(filename):
+            staged["rejected"].append({"filename": name, "error": "Type de fichier non autorisé"})
+            return
+
+        file_path = os.path.join(folder, f"{uuid.uuid4()}_{filename}")
+        digest = hashlib.sha256()
+        size = 0
+        keep = False
+        try:
+            with open(file_path, "wb") as f:
+                for block in iter(lambda: stream.read(HASH_BLOCK_SIZE), b""):
+                    size += len(block)
+                    if size > MAX_UPLOAD_SIZE:
+                        staged["rejected"].append({"filename": filename, "error": "Fichier trop volumineux"})
+                        return
+                    digest.update(block)
+                    f.write(block)
+
+            sha256 = digest.hexdigest()
+            duplicate_of = seen.get(sha256)
+            if duplicate_of is None:
+                existing = registry.lookup(tenant_id, sha256)
+                duplicate_of = existing["doc_id"] if existing else None
+            if duplicate_of is not None:
+                staged["duplicates"].append({"filename": filename, "duplicate_of": duplicate_of})
+                return
+
+            if len(staged["documents"]) >= MAX_BULK_FILES:
+                staged["rejected"].append({"filename": filename, "error": f"Plus de {MAX_BULK_FILES} documents"})
+                return
+
+            doc_id = str(uuid.uuid4())
+            seen[sha256] = doc_id
+            staged["documents"].append(
+                {"file_path": file_path, "doc_id": doc_id, "filename": filename, "sha256": sha256}
+            )
+            keep = True
+        finally:
+            if not keep and os.path.exists(file_path):
+                os.remove(file_path)
+
+    for name, stream in uploads:
+        if not name.lower().endswith(".zip"):
+            add(name, stream)
+            continue
+
+        stream.seek(0, os.SEEK_END)
+        archive_size = stream.tell()
+        stream.seek(0)
+        if archive_size > MAX_ARCHIVE_SIZE:
+            staged["rejected"].append({"filename": name, "error": "Archive trop volumineuse"})
+            continue
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    # Taille décompressée vérifiée avant lecture (archives piégées)
+                    if info.file_size > MAX_UPLOAD_SIZE:
+                        staged["rejected"].append({"filename": info.filename, "error": "Fichier trop volumineux"})
+                        continue
+                    with archive.open(info) as member:
+                        add(info.filename, member)
+        except zipfile.BadZipFile:
+            staged["rejected"].append({"filename": name, "error": "Archive invalide"})
+
+    return staged
+
+
+@app.post("/api/v1/upload_documents")
+async def api_upload_documents(files: List[UploadFile] = File(...), tenant_id: Optional[str] = Depends(get_tenant_id)):
+    """
+    Upload groupé : plusieurs fichiers et/ou archives .zip, indexés par une seule
+    tâche Celery. Les fichiers déjà indexés pour le tenant (même contenu) ne sont
+    pas ré-indexés.
+
+    Args:
+        files: Fichiers (ou archives .zip) à uploader
+
+    Returns:
+        Job ID de l'indexation groupée, documents acceptés, doublons et refus
+    """
+    try:
+        # Fichiers temporaires de l'upload (UploadFile.file) lus par blocs ;
+        # extraction, empreintes et écriture disque hors de la boucle d'événements
+        uploads = [(file.filename or "", file.file) for file in files]
+        staged = await asyncio.to_thread(stage_bulk_documents, uploads, tenant_id)
+
+        job_id = None
+        if staged["documents"]:
+            from src.tasks import index_documents_task
+            task = index_documents_task.apply_async(
+                args=[staged["documents"], tenant_id], task_id=new_ingestion_job_id(tenant_id)
+            )
+            job_id = task.id
+
+        logger.info(
+            "Upload groupé",
+            extra={"documents": len(staged["documents"]), "duplicates": len(staged["duplicates"]),
+                   "rejected": len(staged["rejected"])}
+        )
+
+        return {
+            "status": "ok",
+            "job_id": job_id,
+            "documents": [{"filename": d["filename"], "doc_id": d["doc_id"]} for d in staged["documents"]],
+            "duplicates": staged["duplicates"],
+            "rejected": staged["rejected"],
+            "message": "Indexation en cours" if job_id else "Aucun nouveau document à indexer",
+            "websocket_url": f"/ws/ingestion/{job_id}" if job_id else None
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/v1/ingestion_status/{job_id}")
+async def get_ingestion_status(job_id: str, tenant_id: Optional[str] = Depends(get_tenant_id)):
+    """
+    Récupère la progression d'une indexation (document seul ou upload groupé) du tenant.
+
+    Args:
+        job_id: ID du job Celery
+
+    Returns:
+        Statut de la tâche et progression agrégée
+    """
+    if not owns_ingestion_job(job_id, tenant_id):
+        raise HTTPException(status_code=404, detail="Job d'indexation inconnu")
+
+    try:
+        from src.tasks import celery_app
+        task = celery_app.AsyncResult(job_id)
+
+        return {
+            "status": "ok",
+            "job_id": job_id,
+            "task_status": task.status,
+            "progress": task.info if task.status == "PROGRESS" else None,
+            "task_result": task.result if task.ready() else None
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.websocket("/ws/ingestion/{job_id}")
+async def websocket_ingestion(websocket: WebSocket,
+                              job_id: str,
+                              tenant_id: Optional[str] = Depends(get_websocket_tenant_id)):
+    """
+    Endpoint WebSocket pour suivre une indexation en temps réel (voir `context.progress`).
+    Le Firebase ID Token se passe en paramètre `?token=<token>` ; seuls les jobs du
+    tenant peuvent être suivis.
+
+    Args:
+        job_id: ID du job Celery (upload simple ou groupé)
+
+    Streame les événements :
+    - {"type": "document_started" | "progress" | "document_completed", "pages": ..., "embedded": ...,
+       "upserted": ..., "throughput": {...}, "job": {...}}
+    - {"type": "completed", "result": {...}}
+    - {"type": "error", "error": "..."}
+    """
+    if not owns_ingestion_job(job_id, tenant_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    ws_logger.info("WebSocket indexation connecté", extra={"job_id": job_id})
+
+    # Client Redis asynchrone : l'attente des événements ne bloque pas la boucle
+    r = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    pubsub = r.pubsub()
+
+    try:
+        await pubsub.subscribe(ingestion_channel(job_id))
+        await websocket.send_json({
+            "type": "connected",
+            "job_id": job_id,
+            "message": "Connecté au suivi de l'indexation"
+        })
+
+        from src.tasks import celery_app
+        task_result = celery_app.AsyncResult(job_id)
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is not None:
+                event = json.loads(message["data"])
+                await websocket.send_json(event)
+                if event.get("type") in ["completed", "error"]:
+                    break
+                continue
+
+            # Job terminé sans événement reçu (fini avant l'abonnement)
+            if await asyncio.to_thread(task_result.ready):
+                await websocket.send_json({
+                    "type": "completed",
+                    "job_id": job_id,
+                    "result": task_result.result
+                })
+                break
+
+    except WebSocketDisconnect:
+        ws_logger.info("Client déconnecté", extra={"job_id": job_id})
+
+    except Exception as e:
+        ws_logger.error(f"Erreur WebSocket indexation : {e}", extra={"job_id": job_id})
+        await websocket.send_json({
+            "type": "error",
+            "error": str(e)
+        })
+
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+        await r.aclose()
+
+
 # ==================== ROUTES VOCAL SYSTEM ====================
 
 @app.get("/meeting", response_class=HTMLResponse)
@@ -748,10 +1105,13 @@ async def meeting_room(request: Request):
 class RAGQueryRequest(BaseModel):
     query: str
     top_k: int = 3
+    filters: Optional[Dict[str, Any]] = None
+    token_budget: Optional[int] = None
+    meeting_id: Optional[str] = None  # statistiques du cache sémantique par réunion
 
 
 @app.post("/api/rag")
-async def rag_query_for_vocal(request: RAGQueryRequest):
+async def rag_query_for_vocal(request: RAGQueryRequest, tenant_id: Optional[str] = Depends(get_tenant_id)):
     """
     Interroge le RAG et retourne le contexte formaté pour le meeting vocal.
     Utilisé pour enrichir les prompts de l'orchestrateur en temps réel.
@@ -760,38 +1120,75 @@ async def rag_query_for_vocal(request: RAGQueryRequest):
         if not request.query:
             return {'context': '', 'results': []}
 
-        # Chercher dans Qdrant
-        rag_service = get_qdrant_service()
-        results = rag_service.search(request.query, top_k=request.top_k)
+        # Chercher dans Qdrant (sans bloquer la boucle d'événements) : candidats en surnombre
+        # pour le dédoublonnage et le MMR
+        rag_service = await get_async_qdrant_service()
+        results = await rag_service.search(
+            request.query,
+            top_k=request.top_k * 3,
+            filters=request.filters,
+            tenant_id=tenant_id,
+            with_vectors=True,
+            meeting_id=request.meeting_id
+        )
 
         if not results:
             return {'context': '', 'results': []}
 
-        # Formater le contexte pour l'injection dans le prompt
-        context_parts = ["=== CONTEXTE DOCUMENTAIRE PERTINENT ===\n"]
-        for i, result in enumerate(results, 1):
-            text = result.get('text', '')
-            score = result.get('score', 0)
-            if score > 0.7:  # Seuil de pertinence
-                context_parts.append(f"[Document {i} - Score: {score:.2f}]")
-                context_parts.append(text[:500])  # Limiter à 500 caractères
-                context_parts.append("")
-
-        formatted_context = "\n".join(context_parts)
+        # Contexte pour l'injection dans le prompt : seuil 0.7 (cosinus), doublons et
+        # recouvrements retirés, MMR, budget de tokens
+        assembled = rag_service.service.context_assembler.assemble(
+            results, token_budget=request.token_budget, max_chunks=request.top_k
+        )
+        for result in results:
+            result.pop('vector', None)
 
-        print(f"🔍 RAG Query: '{request.query}' → {len(results)} résultats")
+        logger.info(
+            "RAG query vocal",
+            extra={"query": request.query[:50], "results": len(results), "tokens": assembled.tokens}
+        )
 
         return {
-            'context': formatted_context,
+            'context': assembled.text,
             'results': results,
-            'count': len(results)
+            'count': len(results),
+            'tokens': assembled.tokens,
+            'assembly': assembled.stats
         }
 
     except Exception as e:
-        print(f"❌ Erreur RAG query: {e}")
+        logger.error(f"Erreur RAG query: {e}")
         return {'context': '', 'results': [], 'error': str(e)}
 
 
+@app.get("/api/rag/cache/stats")
+async def rag_cache_stats(meeting_id: Optional[str] = None, tenant_id: Optional[str] = Depends(get_tenant_id)):
+    """
+    Statistiques du cache sémantique des recherches RAG du tenant (taux de hit,
+    latence économisée), et de la réunion web en cours si elle appartient au tenant
+    (filtre des recherches, jeu pré-chargé, regroupement des messages).
+
+    Args:
+        meeting_id: Réunion (défaut: toutes les recherches du tenant sur ce worker API)
+    """
+    rag_service = await get_async_qdrant_service()
+    tenant = rag_service.service.tenants.resolve(tenant_id)
+    response = {
+        'status': 'ok',
+        'stats': rag_service.service.query_cache.get_stats(tenant, meeting_id)
+    }
+
+    orchestrator = meeting_state['orchestrator']
+    if orchestrator and rag_service.service.tenants.resolve(orchestrator.tenant_id) == tenant:
+        response['meeting'] = {
+            'meeting_id': orchestrator.meeting_id,
+            **orchestrator.get_stats(),
+            'coalescer': meeting_state['coalescer'].get_stats()
+        }
+
+    return response
+
+
 class SpeakRequest(BaseModel):
     text: str
     agent: Optional[str] = None
@@ -848,6 +1245,9 @@ async def text_to_speech(request: SpeakRequest):
     """
     Convertit le texte en audio avec ElevenLabs et renvoie le fichier audio.
     Supporte les multi-voix pour le système d'agents.
+
+    La synthèse est bornée par TTS_TIMEOUT_SECONDS (pool des étapes de tour) : au-delà,
+    ou si le pool est saturé, la réponse est 504 et le client garde le texte seul.
     """
     try:
         text = request.text
@@ -859,20 +1259,26 @@ async def text_to_speech(request: SpeakRequest):
         # Choisir la voix: agent spécifique ou voix par défaut
         if agent_id and agent_id in AGENT_VOICES:
             voice_id = AGENT_VOICES[agent_id]
-            print(f"🎵 Génération audio pour agent '{agent_id}' ({voice_id}): '{text[:50]}...'")
+            logger.debug("Génération audio", extra={"agent": agent_id, "voice_id": voice_id, "chars": len(text)})
         else:
             voice_id = ELEVENLABS_VOICE_ID
-            print(f"🔊 Génération audio pour: '{text[:50]}...'")
+            logger.debug("Génération audio", extra={"voice_id": voice_id, "chars": len(text)})
 
-        # Générer l'audio avec ElevenLabs
-        audio_generator = elevenlabs_client.text_to_speech.convert(
-            voice_id=voice_id,
-            text=text,
-            model_id="eleven_multilingual_v2"
-        )
+        def synthesize() -> bytes:
+            # Générer l'audio avec ElevenLabs et le convertir en bytes
+            return b"".join(elevenlabs_client.text_to_speech.convert(
+                voice_id=voice_id,
+                text=text,
+                model_id="eleven_multilingual_v2"
+            ))
 
-        # Convertir en bytes
-        audio_bytes = b"".join(audio_generator)
+        try:
+            audio_bytes = await asyncio.to_thread(
+                run_within, Deadline(STAGE_TIMEOUTS["tts"]), "tts", synthesize
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"TTS ignoré, texte seul : {e}", extra={"agent": agent_id})
+            raise HTTPException(status_code=504, detail="Synthèse vocale indisponible, texte seul")
 
         # Retourner l'audio en streaming
         return StreamingResponse(
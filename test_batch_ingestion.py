@@ -0,0 +1,85 @@
+"""
+Test de l'indexation groupée : chaque document est traité indépendamment ; un
+doublon ou un échec n'interrompt pas le lot et son fichier est supprimé, les
+documents indexés sont enregistrés et gardent le leur.
+
+Usage :
+    python -m pytest test_batch_ingestion.py
+"""
+
+import os
+import sys
+
+import pytest
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from context import document_registry, qdrant_service
+from context.document_registry import DocumentRegistry, file_sha256
+from tasks import index_documents_task
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = DocumentRegistry(path=str(tmp_path / "registry.json"))
+    monkeypatch.setattr(document_registry, "get_document_registry", lambda: registry)
+    return registry
+
+
+@pytest.fixture
+def run_batch(rag_service, registry, monkeypatch):
+    monkeypatch.setattr(qdrant_service, "get_qdrant_service", lambda: rag_service)
+    monkeypatch.setattr(index_documents_task, "update_state", lambda **kwargs: None)
+
+    # Fichier illisible simulé, indépendamment des extracteurs
+    index_file = rag_service.index_file
+
+    def failing_index_file(**kwargs):
+        if kwargs["doc_id"] == "bad":
+            raise ValueError("fichier illisible")
+        return index_file(**kwargs)
+
+    monkeypatch.setattr(rag_service, "index_file", failing_index_file)
+    return lambda documents, tenant_id: index_documents_task(documents, tenant_id)
+
+
+def make_document(tmp_path, doc_id, text):
+    path = tmp_path / f"{doc_id}_{doc_id}.txt"
+    path.write_text(text, encoding="utf-8")
+    return {"file_path": str(path), "doc_id": doc_id, "filename": f"{doc_id}.txt", "sha256": file_sha256(str(path))}
+
+
+def test_each_document_is_cleaned_up_independently(tmp_path, rag_service, registry, run_batch):
+    ok = make_document(tmp_path, "ok", "Plan stratégique : ouverture du marché allemand.")
+    duplicate = make_document(tmp_path, "dup", "Budget marketing 2024 : 120 k€.")
+    bad = make_document(tmp_path, "bad", "Contenu illisible.")
+    registry.register("acme", duplicate["sha256"], "budget-existant", "budget.txt", 1)
+
+    result = run_batch([bad, duplicate, ok], "acme")
+
+    assert result["status"] == "partial"
+    assert [d["doc_id"] for d in result["indexed"]] == ["ok"]
+    assert result["duplicates"] == [{"filename": "dup.txt", "duplicate_of": "budget-existant"}]
+    assert [d["doc_id"] for d in result["failed"]] == ["bad"]
+
+    # Seul le document indexé garde son fichier
+    assert os.path.exists(ok["file_path"])
+    assert not os.path.exists(duplicate["file_path"])
+    assert not os.path.exists(bad["file_path"])
+
+    assert registry.lookup("acme", ok["sha256"])["doc_id"] == "ok"
+    assert registry.lookup("acme", bad["sha256"]) is None
+    assert rag_service.count_tenant_points("acme") == result["chunks_count"] > 0
+
+
+def test_same_content_twice_in_a_batch_is_indexed_once(tmp_path, rag_service, registry, run_batch):
+    first = make_document(tmp_path, "first", "Roadmap produit : lancement au T3.")
+    second = make_document(tmp_path, "second", "Roadmap produit : lancement au T3.")
+
+    result = run_batch([first, second], "acme")
+
+    assert result["status"] == "completed"
+    assert [d["doc_id"] for d in result["indexed"]] == ["first"]
+    assert result["duplicates"] == [{"filename": "second.txt", "duplicate_of": "first"}]
+    assert not os.path.exists(second["file_path"])
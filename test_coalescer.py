@@ -0,0 +1,83 @@
+"""
+Test du regroupement des messages humains : les messages rapprochés sont fusionnés
+en un seul cycle, et la politique "supersede" interrompt le cycle en cours quand un
+nouveau message arrive.
+
+Usage :
+    python -m pytest test_coalescer.py
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from orchestrator.coalescer import HumanTurnCoalescer, POLICY_FINISH, POLICY_SUPERSEDE
+
+
+def test_close_messages_are_merged_into_one_cycle():
+    calls = []
+
+    def run_cycle(messages, should_stop):
+        calls.append(list(messages))
+        return len(calls)
+
+    async def scenario():
+        coalescer = HumanTurnCoalescer(run_cycle, window=0.05, max_wait=1.0)
+        return await asyncio.gather(*(coalescer.submit(m) for m in ["a", "b", "c"])), coalescer.get_stats()
+
+    results, stats = asyncio.run(scenario())
+
+    assert calls == [["a", "b", "c"]]
+    assert all(result == {"result": 1, "messages": 3} for result in results)
+    assert stats["messages_received"] == 3
+    assert stats["cycles_run"] == 1
+
+
+def run_interrupted_cycle(policy):
+    """Un message arrive pendant le premier cycle ; renvoie (résultats, cycles, stats)."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def run_cycle(messages, should_stop):
+        calls.append(list(messages))
+        if len(calls) == 1:
+            started.set()
+            release.wait(2)
+        return "stopped" if should_stop() else "done"
+
+    async def scenario():
+        coalescer = HumanTurnCoalescer(run_cycle, window=0.01, max_wait=0.5, policy=policy)
+        first = asyncio.create_task(coalescer.submit("a"))
+        await asyncio.to_thread(started.wait, 2)
+
+        second = asyncio.create_task(coalescer.submit("b"))
+        await asyncio.sleep(0)
+        release.set()
+
+        return [await first, await second], coalescer.get_stats()
+
+    results, stats = asyncio.run(scenario())
+    return results, calls, stats
+
+
+def test_supersede_stops_the_running_cycle():
+    results, calls, stats = run_interrupted_cycle(POLICY_SUPERSEDE)
+
+    assert calls == [["a"], ["b"]]
+    assert results[0]["result"] == "stopped"
+    assert results[1] == {"result": "done", "messages": 1}
+    assert stats["cycles_run"] == 2
+    assert stats["cycles_superseded"] == 1
+
+
+def test_finish_lets_the_running_cycle_complete():
+    results, calls, stats = run_interrupted_cycle(POLICY_FINISH)
+
+    assert calls == [["a"], ["b"]]
+    assert [result["result"] for result in results] == ["done", "done"]
+    assert stats["cycles_superseded"] == 0
@@ -0,0 +1,70 @@
+"""
+Test de l'assemblage du contexte RAG : le compromis pertinence / diversité du MMR
+change la sélection, et les blocs sont injectés dans l'ordre de sélection.
+
+Usage :
+    python -m pytest test_context_assembly.py
+"""
+
+import os
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from context.assembly import ContextAssembler
+
+
+def make_results():
+    """Deux chunks quasi identiques très pertinents, un chunk différent un peu moins pertinent."""
+    return [
+        {"doc_id": "budget", "text": "Budget marketing 2024 : 120 k€.", "score": 0.95,
+         "vector": [1.0, 0.0, 0.0], "metadata": {"chunk_index": 0}},
+        {"doc_id": "budget-bis", "text": "Budget marketing 2024 : 120 k€ (copie).", "score": 0.94,
+         "vector": [0.9, 0.1, 0.0], "metadata": {"chunk_index": 0}},
+        {"doc_id": "roadmap", "text": "Roadmap produit : lancement au T3.", "score": 0.85,
+         "vector": [0.0, 0.0, 1.0], "metadata": {"chunk_index": 0}},
+    ]
+
+
+def make_assembler(mmr_lambda):
+    return ContextAssembler(
+        min_score=0.7, dedup_similarity=0.999, mmr_lambda=mmr_lambda, token_budget=1000,
+        max_chunks=2, token_counter=lambda text: max(1, len(text) // 4)
+    )
+
+
+def test_mmr_lambda_changes_selection():
+    relevance_only = make_assembler(1.0).assemble(make_results())
+    diverse = make_assembler(0.3).assemble(make_results())
+
+    assert [block.doc_id for block in relevance_only.blocks] == ["budget", "budget-bis"]
+    assert [block.doc_id for block in diverse.blocks] == ["budget", "roadmap"]
+    assert diverse.stats["mmr_dropped"] == 1
+
+
+def test_default_cap_limits_chunks():
+    assembler = ContextAssembler(
+        min_score=0.7, dedup_similarity=0.999, max_chunks=1, token_budget=1000,
+        token_counter=lambda text: max(1, len(text) // 4)
+    )
+    assembled = assembler.assemble(make_results())
+
+    assert len(assembled.blocks) == 1
+    assert assembled.stats["mmr_dropped"] == 2
+
+
+def test_blocks_packed_in_selection_order():
+    results = make_results()
+    # Chunk suivant du document le moins pertinent : fusionné, le bloc garde son rang
+    results.append({"doc_id": "roadmap", "text": "Recrutement de deux développeurs.", "score": 0.8,
+                    "vector": [0.0, 1.0, 0.0], "metadata": {"chunk_index": 1}})
+    assembler = ContextAssembler(
+        min_score=0.7, dedup_similarity=0.999, mmr_lambda=0.3, token_budget=1000, max_chunks=3,
+        token_counter=lambda text: max(1, len(text) // 4)
+    )
+    assembled = assembler.assemble(results)
+
+    assert [block.doc_id for block in assembled.blocks] == ["budget", "roadmap"]
+    assert assembled.blocks[1].chunk_indexes == [0, 1]
+    assert assembled.text.index("Budget marketing") < assembled.text.index("Roadmap produit")
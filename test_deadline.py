@@ -0,0 +1,84 @@
+"""
+Test des budgets de latence par tour : une étape trop lente est abandonnée à
+l'échéance et sautée pour le reste du tour, et un pool saturé par des appels
+abandonnés fait sauter l'étape au lieu de la mettre en file.
+
+Usage :
+    python -m pytest test_deadline.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from orchestrator import deadline
+from orchestrator.deadline import Deadline, DeadlineExceeded, StagePoolSaturated, run_within, stage_pool_stats
+
+
+@pytest.fixture
+def release():
+    """Débloque les appels lents abandonnés à la fin du test."""
+    event = threading.Event()
+    yield event
+    event.set()
+    for _ in range(100):
+        if stage_pool_stats()["in_flight"] == 0:
+            break
+        time.sleep(0.01)
+
+
+def test_slow_stage_expires_and_is_skipped_for_the_turn(release):
+    turn = Deadline(budget=0.6)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        run_within(turn, "rag", release.wait, 5)
+    assert time.monotonic() - started < 1.5
+    assert turn.degraded == ["rag"]
+
+    # L'appel abandonné tourne encore : l'étape n'est pas relancée dans ce tour
+    calls = []
+    with pytest.raises(DeadlineExceeded):
+        run_within(turn, "rag", calls.append, 1)
+    assert calls == []
+
+
+def test_exhausted_budget_skips_the_stage():
+    turn = Deadline(budget=0.1)
+    calls = []
+
+    with pytest.raises(DeadlineExceeded):
+        run_within(turn, "router", calls.append, 1)
+    assert calls == []
+    assert turn.degraded == ["router"]
+
+
+def test_without_deadline_the_call_is_direct():
+    assert run_within(None, "rag", lambda value: value * 2, 21) == 42
+
+
+def test_saturated_pool_skips_the_stage(monkeypatch, release):
+    monkeypatch.setattr(deadline, "STAGE_WORKERS", 1)
+
+    with pytest.raises(DeadlineExceeded):
+        run_within(Deadline(budget=0.6), "tts", release.wait, 5)
+    assert stage_pool_stats()["in_flight"] == 1
+
+    turn = Deadline(budget=5)
+    with pytest.raises(StagePoolSaturated):
+        run_within(turn, "rag", lambda: "jamais exécuté")
+    assert turn.degraded == ["rag"]
+
+    # Le worker libéré, les étapes repartent
+    release.set()
+    for _ in range(100):
+        if stage_pool_stats()["in_flight"] == 0:
+            break
+        time.sleep(0.01)
+    assert run_within(Deadline(budget=5), "rag", lambda: "ok") == "ok"
@@ -0,0 +1,97 @@
+"""
+Test du cache sémantique des recherches : une requête proche réutilise les résultats
+en cache, toute écriture du tenant (version de collection) les invalide, et les
+vecteurs des résultats sont gardés en float32 compacts.
+
+Usage :
+    python -m pytest test_query_cache.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from context.query_cache import CollectionVersion, SemanticQueryCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    return SemanticQueryCache(3, CollectionVersion("test"), max_entries=8, threshold=0.95, ttl=60)
+
+
+RESULTS = [{"id": "1", "score": 0.9, "text": "Budget 2024", "vector": [0.1, 0.2, 0.3]}]
+
+
+def test_close_query_hits_and_write_invalidates(cache):
+    scope = cache.scope_key("acme", top_k=5)
+    cached, version = cache.lookup([1.0, 0.0, 0.0], scope)
+    assert cached is None
+    cache.store([1.0, 0.0, 0.0], scope, RESULTS, version, 0.05)
+
+    cached, _ = cache.lookup([0.99, 0.05, 0.0], scope)
+    assert [result["id"] for result in cached] == ["1"]
+    assert cache.lookup([0.0, 1.0, 0.0], scope)[0] is None
+
+    # Écriture d'un autre tenant : sans effet ; écriture du tenant : entrée périmée
+    cache.versions.bump("globex")
+    assert cache.lookup([1.0, 0.0, 0.0], scope)[0] is not None
+    cache.versions.bump("acme")
+    assert cache.lookup([1.0, 0.0, 0.0], scope)[0] is None
+
+    stats = cache.get_stats("acme")
+    assert (stats["lookups"], stats["hits"]) == (5, 2)
+
+
+def test_store_after_concurrent_write_is_stale(cache):
+    scope = cache.scope_key("acme", top_k=5)
+    _, version = cache.lookup([1.0, 0.0, 0.0], scope)
+
+    # Indexation pendant la recherche : le résultat stocké ne doit jamais servir
+    cache.versions.bump("acme")
+    cache.store([1.0, 0.0, 0.0], scope, RESULTS, version, 0.05)
+    assert cache.lookup([1.0, 0.0, 0.0], scope)[0] is None
+
+
+def test_scopes_do_not_answer_each_other(cache):
+    scope = cache.scope_key("acme", top_k=5)
+    _, version = cache.lookup([1.0, 0.0, 0.0], scope)
+    cache.store([1.0, 0.0, 0.0], scope, RESULTS, version, 0.05)
+
+    assert cache.lookup([1.0, 0.0, 0.0], cache.scope_key("globex", top_k=5))[0] is None
+    assert cache.lookup([1.0, 0.0, 0.0], cache.scope_key("acme", top_k=10))[0] is None
+
+
+def test_cached_vectors_are_compact_and_shared_read_only(cache):
+    scope = cache.scope_key("acme", top_k=5)
+    results = [dict(result) for result in RESULTS]
+    cache.store([1.0, 0.0, 0.0], scope, results, 0, 0.05)
+    results[0]["vector"][0] = 42.0
+
+    first, _ = cache.lookup([1.0, 0.0, 0.0], scope)
+    vector = first[0]["vector"]
+    assert isinstance(vector, np.ndarray) and vector.dtype == np.float32
+    assert vector[0] == pytest.approx(0.1)
+    assert not vector.flags.writeable
+
+    # Les copies rendues peuvent retirer le vecteur sans toucher au cache
+    first[0].pop("vector")
+    assert "vector" in cache.lookup([1.0, 0.0, 0.0], scope)[0][0]
+
+
+def test_indexing_invalidates_service_searches(rag_service):
+    rag_service.index_document("plan", "Plan stratégique : ouverture du marché allemand.", tenant_id="acme")
+
+    rag_service.search("marché allemand", tenant_id="acme", meeting_id="m1")
+    rag_service.search("marché allemand", tenant_id="acme", meeting_id="m1")
+    assert rag_service.query_cache.get_stats("acme", "m1")["hits"] == 1
+
+    rag_service.index_document("budget", "Budget marketing du marché allemand : 120 k€.", tenant_id="acme")
+    results = rag_service.search("marché allemand", tenant_id="acme", meeting_id="m1")
+    assert rag_service.query_cache.get_stats("acme", "m1")["hits"] == 1
+    assert {result["doc_id"] for result in results} == {"plan", "budget"}
@@ -0,0 +1,88 @@
+"""
+Test du filtre des recherches RAG : décision prise pour chaque type de message
+(premier tour, agent, question, acquiescement, redite, information nouvelle) et
+recherches évitées comptabilisées.
+
+Usage :
+    python -m pytest test_retrieval_gate.py
+"""
+
+import os
+import sys
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from orchestrator.retrieval_gate import RetrievalGate, is_acknowledgement, is_question
+
+VECTORS = {
+    "Parlons du budget marketing de l'année prochaine": [1.0, 0.0, 0.0],
+    "Revenons au budget marketing de l'année prochaine": [0.98, 0.1, 0.0],
+    "Et le recrutement des commerciaux en Allemagne": [0.0, 1.0, 0.0],
+}
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return VECTORS[text]
+
+
+def make_gate():
+    gate = RetrievalGate(enabled=True, min_chars=25, max_similarity=0.9)
+    return gate, CountingEmbedder()
+
+
+def test_first_turn_always_retrieves():
+    gate, embed = make_gate()
+    decision = gate.decide("ok", "human", embed)
+    assert (decision.retrieve, decision.reason) == (True, "first")
+    assert embed.calls == []
+
+
+def test_decisions_after_a_retrieval():
+    gate, embed = make_gate()
+    gate.record_retrieval(VECTORS["Parlons du budget marketing de l'année prochaine"], 0.2)
+
+    def decide(message, speaker="human"):
+        decision = gate.decide(message, speaker, embed)
+        return decision.retrieve, decision.reason
+
+    assert decide("Je propose de doubler le budget.", "tech") == (False, "agent")
+    assert decide("Combien coûte la campagne ?") == (True, "question")
+    assert decide("ok, merci") == (False, "short")
+    assert embed.calls == []
+
+    assert decide("Revenons au budget marketing de l'année prochaine") == (False, "redundant")
+    assert decide("Et le recrutement des commerciaux en Allemagne") == (True, "novel")
+    assert len(embed.calls) == 2
+
+    stats = gate.get_stats()
+    assert (stats["turns"], stats["skipped"]) == (5, 3)
+    assert stats["reasons"] == {"agent": 1, "question": 1, "short": 1, "redundant": 1, "novel": 1}
+    assert stats["latency_saved_ms"] == 600.0
+
+
+def test_novel_decision_carries_the_embedding():
+    gate, embed = make_gate()
+    gate.record_retrieval([1.0, 0.0, 0.0], 0.2)
+
+    decision = gate.decide("Et le recrutement des commerciaux en Allemagne", "human", embed)
+    assert decision.embedding == VECTORS["Et le recrutement des commerciaux en Allemagne"]
+
+
+def test_disabled_gate_always_retrieves():
+    gate = RetrievalGate(enabled=False)
+    gate.record_retrieval([1.0, 0.0, 0.0], 0.2)
+    assert gate.decide("ok", "tech", lambda text: [1.0, 0.0, 0.0]).reason == "disabled"
+
+
+def test_message_classifiers():
+    assert is_question("Pourquoi ce choix")
+    assert is_question("what about the budget")
+    assert not is_question("Je pense que c'est bien")
+    assert is_acknowledgement("Merci, parfait !")
+    assert not is_acknowledgement("Merci pour le budget détaillé")
@@ -0,0 +1,109 @@
+"""
+Test de l'isolation par tenant : la dépendance `get_tenant_id` refuse les requêtes
+anonymes hors développement, et les documents d'un tenant ne sont ni visibles ni
+supprimables depuis un autre.
+
+Usage :
+    python -m pytest test_tenancy.py
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi import Depends, FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from middleware import firebase_auth
+from middleware.firebase_auth import get_tenant_id, get_websocket_tenant_id
+from context.tenancy import tenant_slug
+
+TOKENS = {
+    "alice-token": {"uid": "alice"},
+    "bob-token": {"uid": "bob", "tenant_id": "acme"},
+}
+
+
+def verify_id_token(token):
+    if token not in TOKENS:
+        raise firebase_auth.auth.InvalidIdTokenError("token inconnu")
+    return TOKENS[token]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(firebase_auth, "init_firebase", lambda *args: None)
+    monkeypatch.setattr(firebase_auth.auth, "verify_id_token", verify_id_token)
+
+    app = FastAPI()
+
+    @app.get("/tenant")
+    def tenant(tenant_id=Depends(get_tenant_id)):
+        return {"tenant_id": tenant_id}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket, tenant_id=Depends(get_websocket_tenant_id)):
+        await websocket.accept()
+        await websocket.send_json({"tenant_id": tenant_id})
+        await websocket.close()
+
+    return TestClient(app)
+
+
+def test_anonymous_request_is_rejected_outside_development(client, monkeypatch):
+    monkeypatch.setenv("ENVIRONMENT", "production")
+    assert client.get("/tenant").status_code == 401
+
+    monkeypatch.setenv("ENVIRONMENT", "development")
+    assert client.get("/tenant").json() == {"tenant_id": None}
+
+
+def test_tenant_comes_from_the_token(client, monkeypatch):
+    monkeypatch.setenv("ENVIRONMENT", "production")
+
+    def tenant(token):
+        return client.get("/tenant", headers={"Authorization": f"Bearer {token}"})
+
+    assert tenant("alice-token").json() == {"tenant_id": "alice"}
+    assert tenant("bob-token").json() == {"tenant_id": "acme"}
+    assert tenant("forged-token").status_code == 401
+
+
+def test_websocket_token_in_query_string(client, monkeypatch):
+    monkeypatch.setenv("ENVIRONMENT", "production")
+
+    with client.websocket_connect("/ws?token=bob-token") as websocket:
+        assert websocket.receive_json() == {"tenant_id": "acme"}
+
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/ws") as websocket:
+            websocket.receive_json()
+    assert refused.value.code == 1008
+
+
+def test_tenant_slug_is_path_safe_and_unique():
+    assert tenant_slug("acme") == "acme"
+    assert tenant_slug(None) == tenant_slug("default")
+
+    unsafe = tenant_slug("../acme")
+    assert "/" not in unsafe and ".." not in unsafe
+    assert unsafe != tenant_slug("acme") != tenant_slug("_acme")
+
+
+def test_documents_are_isolated_per_tenant(rag_service):
+    rag_service.index_document("plan", "Plan stratégique : ouverture du marché allemand.", tenant_id="acme")
+
+    assert rag_service.search("marché allemand", tenant_id="acme")
+    assert rag_service.search("marché allemand", tenant_id="globex") == []
+    assert rag_service.search("marché allemand") == []
+
+    # Même doc_id chez un autre tenant : seul son propre document est supprimé
+    rag_service.index_document("plan", "Plan de recrutement 2025.", tenant_id="globex")
+    rag_service.delete_document("plan", tenant_id="globex")
+
+    assert rag_service.count_tenant_points("globex") == 0
+    assert rag_service.count_tenant_points("acme") > 0
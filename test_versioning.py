@@ -0,0 +1,81 @@
+"""
+Test du versionnement des chunks : les IDs de points dépendent du contenu, une
+ré-indexation n'embarque que les chunks modifiés, et les points de l'ancien schéma
+d'IDs (uuid5(doc_id:position)) sont migrés sans ré-embedding.
+
+Usage :
+    python -m pytest test_versioning.py
+"""
+
+import os
+import sys
+import uuid
+
+# Ajouter src au path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from qdrant_client.models import PointStruct
+
+from context.versioning import ChunkIdentity
+
+
+def make_document(changed_section: int = None) -> str:
+    """Document de 8 sections (un chunk chacune) ; `changed_section` est réécrite."""
+    sections = []
+    for i in range(8):
+        topic = "révisé entièrement" if i == changed_section else "initial"
+        sections.append(f"Section {i} ({topic}). " + f"Contenu {topic} de la section numéro {i}. " * 18)
+    return "\n\n".join(sections)
+
+
+def test_ids_depend_on_content_not_position():
+    first = ChunkIdentity("doc")
+    second = ChunkIdentity("doc")
+
+    a = [first.record(i, text).point_id for i, text in enumerate(["intro", "budget", "intro"])]
+    b = [second.record(i, text).point_id for i, text in enumerate(["nouveau", "intro", "budget", "intro"])]
+
+    # Chunks identiques distingués par leur n° d'occurrence, retrouvés après insertion
+    assert len(set(a)) == 3
+    assert set(a) <= set(b)
+
+
+def test_ids_are_tenant_specific():
+    assert ChunkIdentity("doc", "acme").record(0, "texte").point_id != ChunkIdentity("doc").record(0, "texte").point_id
+
+
+def test_reindex_embeds_only_changed_chunks(rag_service, fake_embeddings):
+    ids = rag_service.index_document("rapport", make_document())
+    assert fake_embeddings.embedded == len(ids) > 2
+
+    fake_embeddings.embedded = 0
+    assert rag_service.index_document("rapport", make_document()) == ids
+    assert fake_embeddings.embedded == 0
+
+    changed = rag_service.index_document("rapport", make_document(changed_section=3))
+    assert 0 < fake_embeddings.embedded < len(ids)
+    assert len(set(changed) - set(ids)) == fake_embeddings.embedded
+    assert rag_service.count_tenant_points() == len(changed)
+
+
+def test_legacy_point_ids_are_migrated_without_embedding(rag_service, fake_embeddings):
+    chunks = rag_service.text_splitter.split_text(make_document())
+    legacy_points = [
+        PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"rapport:{i}")),
+            vector=fake_embeddings.embed_query(chunk),
+            payload={"doc_id": "rapport", "chunk_index": i, "text": chunk, "tenant_id": "default"},
+        )
+        for i, chunk in enumerate(chunks)
+    ]
+    rag_service.client.upsert(rag_service.collection_name, points=legacy_points)
+
+    assert rag_service.migrate_point_ids() == len(chunks)
+    assert rag_service.migrate_point_ids() == 0
+    assert rag_service.count_tenant_points() == len(chunks)
+
+    # Les IDs migrés sont ceux du schéma versionné : rien à ré-embarquer
+    fake_embeddings.embedded = 0
+    rag_service.index_document("rapport", make_document())
+    assert fake_embeddings.embedded == 0
+    assert rag_service.count_tenant_points() == len(chunks)